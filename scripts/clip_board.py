@@ -1,19 +1,117 @@
 #!/usr/bin/env python3
 
 import argparse
+import ast
+import codecs
+import hashlib
+import io
+import json
 import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from stat import S_ISREG
 
-import pyperclip
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 8 * 1024
+DEFAULT_MAX_FILE_BYTES = 1024 * 1024
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)
+TEXT_CONTROL_BYTES = frozenset(b'\t\n\r\f\b\x1b')
+CACHE_FORMAT = 1
+# Files modified this recently are not cached: a second write within the same mtime tick would go unnoticed.
+BLOB_GRACE_SECONDS = 60
+RACY_MTIME_NS = 2 * 10**9
 
+GLOB_CHARS = frozenset('*?[')
+IGNORE_FILES = ('.gitignore', '.ignore')
 
-def copy_files_to_clipboard(root_dirs, extensions, file_paths=None, exclude_dirs=None, exclude_files=None, exclude_ext=None):
-    combined_content = ''
-    if exclude_dirs is None:
-        exclude_dirs = []
-    if exclude_files is None:
-        exclude_files = []
-    if exclude_ext is None:
-        exclude_ext = []
+MIN_PACK_TOKENS = 16
+DIFF_PATHSPEC_BATCH = 500
+OUTLINE_LINE_CHARS = 200
+OUTLINE_PATTERN = re.compile(
+    r'^(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:pub(?:\([a-z]+\))?\s+)?'
+    r'(?:function|class|interface|type|enum|struct|trait|impl|fn|func|def|module|namespace)\b'
+)
+
+Candidate = namedtuple('Candidate', 'path explicit stat root')
+# A block with text None refers to the earlier block at same_as with identical content.
+Block = namedtuple('Block', 'path text note same_as', defaults=('', None))
+
+
+def copy_files_to_clipboard(
+    root_dirs,
+    extensions,
+    file_paths=None,
+    exclude_dirs=None,
+    exclude_files=None,
+    exclude_ext=None,
+    max_bytes=None,
+    to_stdout=False,
+    max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+    jobs=DEFAULT_JOBS,
+    use_cache=True,
+    use_git=False,
+    use_ignore=True,
+    budget_tokens=None,
+    tokenizer=None,
+    rank='recency',
+    archive=None,
+    changed=None,
+    hunks=None,
+):
+    paths = iter_file_paths(
+        root_dirs,
+        extensions,
+        file_paths,
+        exclude_dirs,
+        exclude_files,
+        exclude_ext,
+        use_git=use_git,
+        use_ignore=use_ignore,
+        changed=changed,
+    )
+    cache = FileCache() if use_cache else None
+    if budget_tokens is not None:
+        # Ranking needs every candidate's stat, but nothing is read until packing asks for it.
+        paths = rank_candidates(list(paths), rank)
+    if changed is not None and hunks is not None:
+        files = read_changed(paths, changed, hunks, max_file_bytes=max_file_bytes, jobs=jobs, cache=cache)
+    else:
+        files = read_files(paths, max_file_bytes=max_file_bytes, jobs=jobs, cache=cache)
+    files = dedupe_blocks(files)
+    if budget_tokens is not None:
+        files = pack_tokens(files, budget_tokens, make_token_counter(tokenizer))
+    try:
+        if archive is not None:
+            return write_archive(files, archive)
+        with open_output(to_stdout) as out:
+            return write_files(files, out, max_bytes=max_bytes)
+    finally:
+        if cache is not None:
+            cache.save()
+
+
+def iter_file_paths(
+    root_dirs,
+    extensions,
+    file_paths=None,
+    exclude_dirs=None,
+    exclude_files=None,
+    exclude_ext=None,
+    use_git=False,
+    use_ignore=True,
+    changed=None,
+):
+    filters = Filters(extensions, exclude_dirs, exclude_files, exclude_ext, use_ignore)
     if isinstance(root_dirs, str):
         root_dirs = [root_dirs]
     if not root_dirs:
@@ -26,35 +124,980 @@ def copy_files_to_clipboard(root_dirs, extensions, file_paths=None, exclude_dirs
     if isinstance(file_paths, str):
         file_paths = [file_paths]
 
-    for root_dir in root_dirs:
-        for dirpath, dir_names, filenames in os.walk(root_dir):
-            dir_names[:] = [d for d in dir_names if d not in exclude_dirs]
-            for filename in filenames:
-                if filename in exclude_files:
+    for root_dir in expand_dir_patterns(root_dirs, filters):
+        if changed is not None:
+            entries = changed_files(root_dir, filters, changed)
+        else:
+            entries = git_files(root_dir, filters) if use_git else None
+        if entries is None:
+            entries = walk_files(root_dir, filters)
+        for entry in entries:
+            if not filters.accepts(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            # git lists symlinks to directories and submodule gitlinks; neither has contents to copy.
+            if not S_ISREG(stat.st_mode):
+                continue
+            yield Candidate(entry.path, False, stat, root_dir)
+    for filepath in expand_file_patterns(file_paths, filters):
+        if filters.accepts(os.path.basename(filepath)):
+            yield Candidate(filepath, True, None, '.')
+
+
+class Filters:
+    # Every include/exclude option compiled once; the walk only runs precompiled matchers.
+    def __init__(self, extensions, exclude_dirs, exclude_files, exclude_ext, use_ignore):
+        self.extensions = tuple(extensions or [])
+        self.exclude_ext = tuple(exclude_ext or [])
+        self.exclude_dirs = PatternSet(exclude_dirs)
+        self.exclude_files = PatternSet(exclude_files)
+        self.use_ignore = use_ignore
+
+    def accepts(self, filename):
+        if self.exclude_files.match_name(filename):
+            return False
+        if self.exclude_ext and filename.endswith(self.exclude_ext):
+            return False
+        return not self.extensions or filename.endswith(self.extensions)
+
+
+class PatternSet:
+    # Plain names keep the old exact-match behaviour; glob patterns are folded into a single regex.
+    def __init__(self, patterns):
+        patterns = list(patterns or [])
+        self.names = {pattern for pattern in patterns if not GLOB_CHARS.intersection(pattern) and '/' not in pattern}
+        name_globs = [p for p in patterns if p not in self.names and '/' not in p.strip('/')]
+        path_globs = [p.strip('/') for p in patterns if p not in self.names and '/' in p.strip('/')]
+        self.name_regex = combine_globs(name_globs)
+        self.path_regex = combine_globs(path_globs)
+
+    def __bool__(self):
+        return bool(self.names or self.name_regex or self.path_regex)
+
+    def match_name(self, name):
+        return name in self.names or (self.name_regex is not None and self.name_regex.fullmatch(name) is not None)
+
+    def match(self, name, relpath):
+        if self.match_name(name):
+            return True
+        return self.path_regex is not None and self.path_regex.fullmatch(relpath) is not None
+
+
+def combine_globs(patterns):
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{glob_to_regex(pattern.strip("/"))})' for pattern in patterns))
+
+
+def glob_to_regex(pattern):
+    # gitignore-style globs: `*` and `?` stop at `/`, `**/` spans any number of directories.
+    out = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '*':
+            if pattern.startswith('**', i) and (i == 0 or pattern[i - 1] == '/'):
+                if i + 2 == n:
+                    out.append('.*')
+                    i += 2
                     continue
-                if exclude_ext and filename.endswith(tuple(exclude_ext)):
+                if pattern[i + 2] == '/':
+                    out.append('(?:.*/)?')
+                    i += 3
                     continue
-                if not extensions or filename.endswith(tuple(extensions)):
-                    filepath = os.path.join(dirpath, filename)
-                    with open(filepath, 'r', encoding='utf-8', errors='replace') as file:
-                        file_content = file.read()
-                        comment_command = '#' if filepath.endswith('.py') else '//'
-                        combined_content += f'{comment_command} filepath: {filepath}\n{file_content}\n\n'
+            out.append('[^/]*')
+        elif char == '?':
+            out.append('[^/]')
+        elif char == '[':
+            start = i + 1
+            if start < n and pattern[start] in '!^':
+                start += 1
+            if start < n and pattern[start] == ']':
+                start += 1
+            close = pattern.find(']', start)
+            if close == -1:
+                out.append(re.escape(char))
+            else:
+                body = pattern[i + 1:close]
+                if body[:1] == '!':
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = close + 1
+                continue
+        elif char == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(char))
+        i += 1
+    return ''.join(out)
+
+
+def has_glob(pattern):
+    return bool(GLOB_CHARS.intersection(pattern))
+
+
+def split_glob(pattern):
+    # Literal leading components become the walk root; the rest is matched against paths below it.
+    parts = pattern.split('/')
+    for index, part in enumerate(parts):
+        if has_glob(part):
+            base = '/'.join(parts[:index]) or ('/' if pattern.startswith('/') else '.')
+            return base, '/'.join(parts[index:])
+    return pattern, ''
+
+
+def expand_dir_patterns(root_dirs, filters):
+    seen = []
+    for root_dir in root_dirs:
+        if not has_glob(root_dir):
+            yield root_dir
+            continue
+        base, rest = split_glob(root_dir.rstrip('/'))
+        # A trailing `**` matches the directory itself too: `src/**` is all of `src`, not just its
+        # subdirectories, and walking a matched directory already covers everything below it.
+        if rest == '**':
+            if os.path.isdir(base):
+                yield base
+            continue
+        if rest.endswith('/**'):
+            rest = rest[:-3]
+        regex = re.compile(glob_to_regex(rest))
+        for path, relpath, is_dir in walk_tree(base, filters):
+            if not is_dir or not regex.fullmatch(relpath):
+                continue
+            # `src/**` also matches every subdirectory; walking the top match already covers them.
+            if any(path.startswith(parent + os.sep) for parent in seen):
+                continue
+            seen.append(path)
+            yield path
+
+
+def expand_file_patterns(file_paths, filters):
     for filepath in file_paths:
-        if os.path.basename(filepath) in exclude_files:
+        if not has_glob(filepath):
+            yield filepath
             continue
-        if exclude_ext and filepath.endswith(tuple(exclude_ext)):
+        base, rest = split_glob(filepath)
+        regex = re.compile(glob_to_regex(rest))
+        for path, relpath, is_dir in walk_tree(base, filters):
+            if not is_dir and regex.fullmatch(relpath):
+                yield path
+
+
+def walk_files(root_dir, filters):
+    return walk_tree(root_dir, filters, entries=True)
+
+
+def walk_tree(root_dir, filters, entries=False):
+    # Same order as os.walk (files of a directory, then its subdirectories). Excluded and ignored
+    # directories are pruned before they are opened; DirEntry stat data is reused for the size cap.
+    root_dir = root_dir.rstrip('/') or '/'
+    ignores = ancestor_ignore_rules(root_dir) if filters.use_ignore else []
+    prefix_len = len(root_dir) + 1
+    stack = [(root_dir, ignores)]
+    while stack:
+        directory, ignores = stack.pop()
+        if filters.use_ignore:
+            local = IgnoreRules.load(directory)
+            if local is not None:
+                ignores = [*ignores, local]
+        try:
+            with os.scandir(directory) as iterator:
+                children = list(iterator)
+        except OSError:
             continue
-        if extensions and not filepath.endswith(tuple(extensions)):
+        subdirs = []
+        for entry in children:
+            relpath = entry.path[prefix_len:]
+            if entry.is_dir():
+                if entry.is_symlink() or entry.name == '.git':
+                    continue
+                if filters.exclude_dirs.match(entry.name, relpath) or is_ignored(ignores, entry.path, True):
+                    continue
+                subdirs.append(entry)
+                if not entries:
+                    yield entry.path, relpath, True
+            elif not is_ignored(ignores, entry.path, False):
+                yield entry if entries else (entry.path, relpath, False)
+        stack.extend((entry.path, ignores) for entry in reversed(subdirs))
+
+
+class IgnoreRules:
+    # Rules from one directory's .gitignore / .ignore, matched against paths relative to that directory.
+    def __init__(self, base, rules, prefix=''):
+        self.base_len = len(base) + 1
+        self.prefix = prefix
+        self.rules = rules
+
+    @classmethod
+    def load(cls, directory):
+        rules = []
+        for name in IGNORE_FILES:
+            rules.extend(read_ignore_file(os.path.join(directory, name)))
+        return cls(directory, rules) if rules else None
+
+    def match(self, path, is_dir):
+        relpath = self.prefix + path[self.base_len:]
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(relpath):
+                return not negate
+        return None
+
+
+def parse_ignore_line(line):
+    line = line.rstrip()
+    if not line or line.startswith('#'):
+        return None
+    negate = line.startswith('!')
+    if negate:
+        line = line[1:]
+    elif line.startswith('\\'):
+        line = line[1:]
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    anchored = '/' in line
+    line = line.lstrip('/')
+    if not line:
+        return None
+    regex = glob_to_regex(line)
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return re.compile(regex), negate, dir_only
+
+
+def is_ignored(ignores, path, is_dir):
+    # Deeper ignore files win over shallower ones, and within a file the last matching rule wins.
+    for rules in reversed(ignores):
+        result = rules.match(path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def read_ignore_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return []
+    return [rule for rule in map(parse_ignore_line, lines) if rule is not None]
+
+
+def ancestor_ignore_rules(root_dir):
+    # Ignore files between the repository root and root_dir still apply when walking a subdirectory.
+    root = os.path.realpath(root_dir)
+    chain = []
+    current = root
+    while not os.path.exists(os.path.join(current, '.git')):
+        parent = os.path.dirname(current)
+        if parent == current:
+            return []
+        current = parent
+        chain.append(current)
+
+    def prefix(base):
+        return '' if base == root else os.path.relpath(root, base) + '/'
+
+    rules = []
+    info_exclude = read_ignore_file(os.path.join(current, '.git', 'info', 'exclude'))
+    if info_exclude:
+        rules.append(IgnoreRules(root_dir, info_exclude, prefix(current)))
+    for ancestor in reversed(chain):
+        found = [rule for name in IGNORE_FILES for rule in read_ignore_file(os.path.join(ancestor, name))]
+        if found:
+            rules.append(IgnoreRules(root_dir, found, prefix(ancestor)))
+    return rules
+
+
+class GitEntry:
+    # The subset of os.DirEntry used by iter_file_paths, for paths listed by git.
+    __slots__ = ('name', 'path')
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+    def stat(self):
+        return os.stat(self.path)
+
+
+def git_files(root_dir, filters):
+    # Tracked plus untracked-but-not-ignored files; ignored trees such as node_modules are never walked.
+    try:
+        completed = subprocess.run(
+            ['git', '-C', root_dir, 'ls-files', '-z', '--cached', '--others', '--exclude-standard', '--deduplicate'],
+            capture_output=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        completed = None
+    if completed is None or completed.returncode != 0:
+        print(f'{root_dir}: not a git work tree, walking the directory instead', file=sys.stderr)
+        return None
+    return git_entries(root_dir, completed.stdout, filters)
+
+
+def changed_files(root_dir, filters, base):
+    # Paths changed since the merge base with `base` (committed or not) plus untracked files. The two
+    # git commands run side by side; deleted files have nothing to copy and are left out.
+    base = resolve_base(root_dir, base)
+    commands = [
+        ['git', '-C', root_dir, 'diff', '--name-only', '-z', '--relative', '--diff-filter=d', '--merge-base', base],
+        ['git', '-C', root_dir, 'ls-files', '-z', '--others', '--exclude-standard'],
+    ]
+    processes = [subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) for command in commands]
+    outputs = [process.communicate() for process in processes]
+    for process, (_, stderr) in zip(processes, outputs):
+        if process.returncode != 0:
+            raise SystemExit(f'{root_dir}: --changed {base}: {stderr.decode(errors="replace").strip()}')
+    return git_entries(root_dir, b'\0'.join(stdout for stdout, _ in outputs), filters)
+
+
+@lru_cache(maxsize=None)
+def resolve_base(root_dir, base):
+    if base:
+        return base
+    # `--changed` without a value: the remote's default branch, else a local main/master. Cached so
+    # git is asked once per root, not once per file.
+    for candidate in ('origin/HEAD', 'main', 'master'):
+        completed = subprocess.run(
+            ['git', '-C', root_dir, 'rev-parse', '--verify', '--quiet', f'{candidate}^{{commit}}'],
+            capture_output=True,
+            check=False,
+        )
+        if completed.returncode == 0:
+            return candidate
+    raise SystemExit(f'{root_dir}: no origin/HEAD, main or master to diff against; pass --changed BASE')
+
+
+def git_entries(root_dir, output, filters):
+    entries = []
+    seen = set()
+    for relpath in output.decode('utf-8', errors='surrogateescape').split('\0'):
+        if not relpath or relpath in seen:
+            continue
+        seen.add(relpath)
+        parts = relpath.split('/')
+        if filters.exclude_dirs and any(
+            filters.exclude_dirs.match(part, '/'.join(parts[:index + 1])) for index, part in enumerate(parts[:-1])
+        ):
+            continue
+        entries.append(GitEntry(os.path.join(root_dir, *parts)))
+    return entries
+
+
+def read_changed(candidates, base, context, max_file_bytes=DEFAULT_MAX_FILE_BYTES, jobs=DEFAULT_JOBS, cache=None):
+    # Tracked files become their diff hunks against the merge base; untracked and explicit files,
+    # which have no hunks, are read in full afterwards.
+    candidates = list(candidates)
+    roots = {}
+    for candidate in candidates:
+        if not candidate.explicit:
+            roots.setdefault(candidate.root, []).append(candidate)
+    diffs = {}
+    notes = {}
+    for root_dir, members in roots.items():
+        root_base = resolve_base(root_dir, base)
+        notes[root_dir] = f' (diff vs {root_base})'
+        diffs.update(diff_hunks(root_dir, members, root_base, context))
+    for candidate in candidates:
+        if candidate.path in diffs:
+            yield Block(candidate.path, diffs[candidate.path], notes[candidate.root])
+    rest = [candidate for candidate in candidates if candidate.path not in diffs]
+    yield from read_files(rest, max_file_bytes=max_file_bytes, jobs=jobs, cache=cache)
+
+
+def diff_hunks(root_dir, candidates, base, context):
+    # One `git diff` for every changed file under the root, split back into per-file hunks.
+    headers = {}
+    for candidate in candidates:
+        relpath = os.path.relpath(candidate.path, root_dir).replace(os.sep, '/')
+        headers[f'diff --git a/{relpath} b/{relpath}'] = candidate.path
+    relpaths = [header.partition(' b/')[2] for header in headers]
+    output = []
+    for start in range(0, len(relpaths), DIFF_PATHSPEC_BATCH):
+        pathspecs = [f':(literal){relpath}' for relpath in relpaths[start:start + DIFF_PATHSPEC_BATCH]]
+        completed = subprocess.run(
+            [
+                'git', '-C', root_dir, '-c', 'core.quotePath=false', 'diff', f'-U{context}', '--relative',
+                '--no-color', '--no-ext-diff', '--merge-base', base, '--', *pathspecs,
+            ],
+            capture_output=True,
+            check=False,
+        )
+        if completed.returncode != 0:
+            raise SystemExit(f'{root_dir}: git diff {base}: {completed.stderr.decode(errors="replace").strip()}')
+        output.append(completed.stdout.decode('utf-8', errors='replace'))
+    diffs = {}
+    path = None
+    in_hunks = False
+    for line in split_lines(''.join(output)):
+        if line.startswith('diff --git '):
+            path = headers.get(line.rstrip('\n'))
+            in_hunks = False
+            if path is not None:
+                diffs[path] = []
+            continue
+        # Skip the index/mode/---/+++ preamble; everything from the first @@ on belongs to the file.
+        in_hunks = in_hunks or line.startswith('@@')
+        if path is not None and in_hunks:
+            diffs[path].append(line)
+    return {path: ''.join(lines).rstrip('\n') for path, lines in diffs.items() if lines}
+
+
+class FileCache:
+    # Per-root index of path -> (mtime_ns, size, digest); decoded text lives in a content-addressed blob store.
+
+    def __init__(self, directory=None):
+        self.directory = directory or cache_dir()
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self._dirty = set()
+        self._new_blobs = False
+
+    def lookup(self, candidate):
+        entry = self._index(candidate.root).get(self._key(candidate))
+        if entry is None or entry[:2] != [candidate.stat.st_mtime_ns, candidate.stat.st_size]:
+            return None
+        digest = entry[2]
+        if digest is None:
+            return 'binary', None
+        try:
+            with open(self._blob_path(digest), 'r', encoding='utf-8') as file:
+                return 'text', file.read()
+        except OSError:
+            return None
+
+    def store(self, candidate, data, text):
+        stat = candidate.stat
+        if time.time_ns() - stat.st_mtime_ns < RACY_MTIME_NS:
+            return
+        digest = None
+        if text is not None:
+            digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+            blob_path = self._blob_path(digest)
+            if not os.path.exists(blob_path):
+                write_atomic(blob_path, text.encode('utf-8'))
+                self._new_blobs = True
+        index = self._index(candidate.root)
+        with self._lock:
+            index[self._key(candidate)] = [stat.st_mtime_ns, stat.st_size, digest]
+            self._dirty.add(candidate.root)
+
+    def save(self):
+        with self._lock:
+            for root in self._dirty:
+                payload = {'format': CACHE_FORMAT, 'root': os.path.realpath(root), 'files': self._indexes[root]}
+                write_atomic(self._index_path(root), json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+            self._dirty.clear()
+            if self._new_blobs:
+                self._prune_blobs()
+                self._new_blobs = False
+
+    def _prune_blobs(self):
+        # A changed file leaves its old blob behind; once written blobs exist, drop every blob that no
+        # index (for any root) references. Recent blobs may belong to a concurrent run not yet saved.
+        referenced = set()
+        index_dir = os.path.join(self.directory, 'index')
+        for name in os.listdir(index_dir):
+            try:
+                with open(os.path.join(index_dir, name), 'r', encoding='utf-8') as file:
+                    files = json.load(file).get('files') or {}
+            except (OSError, ValueError, AttributeError):
+                continue
+            referenced.update(entry[2] for entry in files.values() if entry[2])
+        cutoff = time.time() - BLOB_GRACE_SECONDS
+        blob_dir = os.path.join(self.directory, 'blobs')
+        for prefix in os.listdir(blob_dir):
+            try:
+                entries = list(os.scandir(os.path.join(blob_dir, prefix)))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if prefix + entry.name not in referenced and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    continue
+
+    def _index(self, root):
+        with self._lock:
+            index = self._indexes.get(root)
+            if index is None:
+                index = self._indexes[root] = self._load(root)
+            return index
+
+    def _load(self, root):
+        try:
+            with open(self._index_path(root), 'r', encoding='utf-8') as file:
+                payload = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        if payload.get('format') != CACHE_FORMAT or payload.get('root') != os.path.realpath(root):
+            return {}
+        return payload.get('files') or {}
+
+    def _key(self, candidate):
+        return os.path.relpath(candidate.path, candidate.root)
+
+    def _index_path(self, root):
+        name = hashlib.sha1(os.path.realpath(root).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, 'index', f'{name}.json')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest[2:])
+
+
+def cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'clip_board')
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_files(paths, max_file_bytes=DEFAULT_MAX_FILE_BYTES, jobs=DEFAULT_JOBS, cache=None):
+    def read(candidate):
+        return read_text_file(candidate, max_file_bytes=max_file_bytes, cache=cache)
+
+    for filepath, text, skipped in ordered_map(read, paths, jobs):
+        if skipped:
+            print(f'skipped {filepath} ({skipped})', file=sys.stderr)
             continue
+        if text is not None:
+            yield Block(filepath, text)
+
+
+def read_text_file(candidate, max_file_bytes=DEFAULT_MAX_FILE_BYTES, cache=None):
+    filepath = candidate.path
+    try:
+        if candidate.stat is None:
+            candidate = candidate._replace(stat=os.stat(filepath))
+        if not S_ISREG(candidate.stat.st_mode):
+            return filepath, None, 'not a regular file'
+        size = candidate.stat.st_size
+        if max_file_bytes and size > max_file_bytes:
+            return filepath, None, f'{size} bytes > --max-file-bytes {max_file_bytes}'
+        cached = cache.lookup(candidate) if cache is not None else None
+        if cached is not None:
+            kind, text = cached
+            return filepath, text, 'binary' if kind == 'binary' else None
+        with open(filepath, 'rb') as file:
+            head = file.read(SNIFF_BYTES)
+            if is_binary(head):
+                if cache is not None:
+                    cache.store(candidate, head, None)
+                return filepath, None, 'binary'
+            data = head + file.read()
+    except FileNotFoundError:
+        if candidate.explicit:
+            return filepath, None, None
+        raise
+    text = data.decode('utf-8', errors='replace')
+    if cache is not None:
+        cache.store(candidate, data, text)
+    return filepath, text, None
+
+
+def is_binary(sample):
+    if b'\0' in sample:
+        return True
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return False
+    except UnicodeDecodeError:
+        pass
+    # Not UTF-8: treat it as text only if it is mostly printable (latin-1 style files).
+    control = sum(1 for byte in sample if byte < 32 and byte not in TEXT_CONTROL_BYTES)
+    return control > len(sample) * 0.1
+
+
+def ordered_map(func, items, jobs):
+    # Keeps at most jobs * 4 reads in flight so output order is preserved without buffering the tree.
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    window = jobs * 4
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
         try:
-            with open(filepath, 'r', encoding='utf-8', errors='replace') as file:
-                file_content = file.read()
-                comment_command = '#' if filepath.endswith('.py') else '//'
-                combined_content += f'{comment_command} filepath: {filepath}\n{file_content}\n\n'
-        except FileNotFoundError:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def dedupe_blocks(blocks):
+    # The same file reached twice (a --file that is also under a --dir) is dropped; a different file
+    # with identical content (vendored copies, generated files) becomes a one-line reference, unless
+    # that line would be longer than the content itself (empty __init__.py and the like).
+    seen_files = set()
+    seen_content = {}
+    for block in blocks:
+        realpath = os.path.realpath(block.path)
+        if realpath in seen_files:
+            continue
+        seen_files.add(realpath)
+        digest = hashlib.blake2b(block.text.encode('utf-8'), digest_size=20).digest()
+        first = seen_content.setdefault(digest, block.path)
+        if first != block.path:
+            note = f' (same content as {first})'
+            if len(note) < len(block.text):
+                yield Block(block.path, None, note, first)
+                continue
+        yield block
+
+
+def rank_candidates(candidates, rank='recency'):
+    # Explicit --file paths keep their command-line order ahead of everything found by walking.
+    explicit = [candidate for candidate in candidates if candidate.explicit]
+    walked = [candidate for candidate in candidates if not candidate.explicit]
+    if rank == 'proximity':
+        anchors = [os.path.dirname(os.path.abspath(candidate.path)).split(os.sep) for candidate in explicit]
+
+        def key(candidate):
+            parts = os.path.abspath(candidate.path).split(os.sep)
+            shared = max((shared_prefix(parts, anchor) for anchor in anchors), default=0)
+            return -shared, len(parts), -candidate.stat.st_mtime_ns
+
+    else:
+
+        def key(candidate):
+            return -candidate.stat.st_mtime_ns
+
+    return explicit + sorted(walked, key=key)
+
+
+def shared_prefix(left, right):
+    count = 0
+    for a, b in zip(left, right):
+        if a != b:
+            break
+        count += 1
+    return count
+
+
+def pack_tokens(blocks, budget, count_tokens):
+    # Greedy: a file goes in whole if it fits, else as an outline, else it is left out. Reading
+    # stops as soon as the remaining budget is too small for anything useful.
+    remaining = budget
+    packed = outlined = omitted = 0
+    emitted = set()
+    for block in blocks:
+        if remaining < MIN_PACK_TOKENS:
+            print(f'--budget-tokens {budget} reached before {block.path}', file=sys.stderr)
+            break
+        if block.same_as is not None and block.same_as not in emitted:
+            omitted += 1
             continue
-    pyperclip.copy(combined_content)
+        cost = count_tokens(render_block(block))
+        if cost <= remaining:
+            remaining -= cost
+            packed += 1
+            emitted.add(block.path)
+            yield block
+            continue
+        outline = outline_text(block.path, block.text) if block.text is not None else ''
+        if outline:
+            summary = Block(block.path, outline, f' (outline; full file ~{cost} tokens)')
+            outline_cost = count_tokens(render_block(summary))
+            if outline_cost <= remaining:
+                remaining -= outline_cost
+                outlined += 1
+                yield summary
+                continue
+        omitted += 1
+    print(
+        f'packed {packed} files, {outlined} outlines, {omitted} omitted; ~{budget - remaining} of {budget} tokens',
+        file=sys.stderr,
+    )
+
+
+def make_token_counter(spec=None):
+    if not spec or spec == 'heuristic':
+        return estimate_tokens
+    name, _, encoding = spec.partition(':')
+    if name != 'tiktoken':
+        raise SystemExit(f'unknown tokenizer: {spec} (use heuristic or tiktoken[:encoding])')
+    try:
+        import tiktoken
+    except ImportError:
+        raise SystemExit('--tokenizer tiktoken requires the tiktoken package') from None
+    encoder = tiktoken.get_encoding(encoding or 'cl100k_base')
+    return lambda text: len(encoder.encode(text, disallowed_special=()))
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for code, but never fewer tokens than whitespace-separated words.
+    return max((len(text) + 3) // 4, len(text.split()))
+
+
+def outline_text(filepath, text):
+    if filepath.endswith('.py'):
+        outline = python_outline(text)
+        if outline is not None:
+            return outline
+    lines = [line[:OUTLINE_LINE_CHARS] for line in text.splitlines() if OUTLINE_PATTERN.match(line)]
+    return '\n'.join(lines)
+
+
+def python_outline(text):
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    lines = text.splitlines()
+    out = []
+
+    def signature(node, body=True):
+        # Decorators and the (possibly multi-line) def/class header as written; the body becomes '...'.
+        first = node.decorator_list[0].lineno if node.decorator_list else node.lineno
+        end = max(node.lineno, node.body[0].lineno - 1)
+        out.extend(lines[first - 1:end])
+        if body and node.body[0].lineno > node.lineno:
+            out.append(' ' * (node.col_offset + 4) + '...')
+
+    functions = (ast.FunctionDef, ast.AsyncFunctionDef)
+    for node in tree.body:
+        if isinstance(node, functions):
+            signature(node)
+        elif isinstance(node, ast.ClassDef):
+            methods = [child for child in node.body if isinstance(child, functions)]
+            signature(node, body=not methods)
+            for method in methods:
+                signature(method)
+    return '\n'.join(out)
+
+
+def render_block(block):
+    comment_command = '#' if block.path.endswith('.py') else '//'
+    header = f'{comment_command} filepath: {block.path}{block.note}\n'
+    if block.text is None:
+        return header + '\n'
+    return f'{header}{block.text}\n\n'
+
+
+def write_archive(files, path):
+    # Writes the snapshot to a file for other tools instead of the clipboard. Inside a tar duplicate
+    # content is stored once as hard links.
+    if path.endswith(('.patch', '.diff')):
+        with removed_on_error(path), open(path, 'w', encoding='utf-8') as out:
+            return write_patch(files, out)
+    with open_archive_stream(path) as stream:
+        with tarfile.open(fileobj=stream, mode='w|') as tar:
+            return write_tar(files, tar)
+
+
+def write_tar(files, tar):
+    count = 0
+    written = 0
+    members = {}
+    now = int(time.time())
+    for block in files:
+        name = archive_name(block.path)
+        info = tarfile.TarInfo(name)
+        info.mtime = now
+        info.mode = 0o644
+        if block.text is None:
+            info.type = tarfile.LNKTYPE
+            info.linkname = members[block.same_as]
+            tar.addfile(info)
+        else:
+            data = block.text.encode('utf-8')
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+            written += len(data)
+        members[block.path] = name
+        count += 1
+    return count, written
+
+
+def write_patch(files, out):
+    # A `git diff`-style bundle of new files, so `git apply` can recreate the snapshot. git apply
+    # cannot copy from a file the same patch creates, so duplicates are written out in full here.
+    count = 0
+    written = 0
+    texts = {}
+    for block in files:
+        name = archive_name(block.path)
+        text = texts[block.same_as] if block.text is None else block.text
+        texts[block.path] = text
+        lines = split_lines(text)
+        body = ''.join('+' + line for line in lines)
+        if lines and not lines[-1].endswith('\n'):
+            body += '\n\\ No newline at end of file\n'
+        chunk = f'diff --git a/{name} b/{name}\nnew file mode 100644\n'
+        if lines:
+            chunk += f'--- /dev/null\n+++ b/{name}\n@@ -0,0 +1,{len(lines)} @@\n{body}'
+        out.write(chunk)
+        written += len(chunk.encode('utf-8'))
+        count += 1
+    return count, written
+
+
+def split_lines(text):
+    # Lines as git counts them. str.splitlines() also breaks on \r, \v, \f, \x85, \u2028 and
+    # friends, which would make the hunk lengths disagree with what git apply reads.
+    lines = text.split('\n')
+    last = lines.pop()
+    lines = [line + '\n' for line in lines]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def archive_name(filepath):
+    name = os.path.normpath(filepath)
+    if os.path.isabs(name) or name.startswith('..'):
+        name = os.path.relpath(os.path.abspath(filepath), '/')
+    return name.replace(os.sep, '/')
+
+
+@contextmanager
+def open_archive_stream(path):
+    if path.endswith(('.tar.gz', '.tgz')):
+        import gzip
+
+        with removed_on_error(path), gzip.open(path, 'wb') as stream:
+            yield stream
+        return
+    if not path.endswith(('.tar.zst', '.tzst')):
+        if not path.endswith('.tar'):
+            raise SystemExit(f'unknown archive format: {path} (use .tar, .tar.gz, .tar.zst, .patch or .diff)')
+        with removed_on_error(path), open(path, 'wb') as stream:
+            yield stream
+        return
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+    if zstandard is not None:
+        with removed_on_error(path), open(path, 'wb') as file, zstandard.ZstdCompressor().stream_writer(file) as stream:
+            yield stream
+        return
+    if not shutil.which('zstd'):
+        raise SystemExit('.tar.zst output requires the zstandard package or the zstd command')
+    with removed_on_error(path):
+        process = subprocess.Popen(['zstd', '-q', '-f', '-o', path], stdin=subprocess.PIPE)
+        try:
+            yield process.stdin
+        except BaseException:
+            # Closing stdin would let zstd finish a valid-looking frame from the truncated tar; kill it
+            # first so the partial file is left for removed_on_error to delete.
+            process.kill()
+            process.wait()
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+            raise
+        process.stdin.close()
+        returncode = process.wait()
+        if returncode != 0:
+            raise SystemExit(f'zstd exited with status {returncode}')
+
+
+@contextmanager
+def removed_on_error(path):
+    # A failed run must not leave a truncated archive behind that looks like a finished one.
+    try:
+        yield
+    except BaseException:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+
+
+def write_files(files, out, max_bytes=None):
+    written = 0
+    count = 0
+    for block in files:
+        filepath = block.path
+        rendered = render_block(block)
+        size = len(rendered.encode('utf-8'))
+        if max_bytes is not None and written + size > max_bytes:
+            print(
+                f'--max-bytes {max_bytes} reached: stopped before {filepath} ({count} files, {written} bytes)',
+                file=sys.stderr,
+            )
+            break
+        for start in range(0, len(rendered), CHUNK_SIZE):
+            out.write(rendered[start:start + CHUNK_SIZE])
+        written += size
+        count += 1
+    return count, written
+
+
+@contextmanager
+def open_output(to_stdout=False):
+    if to_stdout:
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    command = clipboard_command()
+    if command is None:
+        # pyperclip needs the whole payload as one string; this is the only path that buffers it.
+        import pyperclip
+
+        buffer = io.StringIO()
+        yield buffer
+        pyperclip.copy(buffer.getvalue())
+        return
+    env = dict(os.environ, LANG=os.environ.get('LANG', 'en_US.UTF-8'))
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, env=env, text=True, encoding='utf-8')
+    try:
+        yield process.stdin
+    except BaseException:
+        # Closing stdin would hand the partial output to the clipboard; kill the copier instead so
+        # a failed run leaves the clipboard as it was.
+        process.kill()
+        process.wait()
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        raise
+    process.stdin.close()
+    returncode = process.wait()
+    if returncode != 0:
+        raise SystemExit(f'{command[0]} exited with status {returncode}')
+
+
+def clipboard_command():
+    if sys.platform == 'darwin' and shutil.which('pbcopy'):
+        return ['pbcopy']
+    if os.environ.get('WAYLAND_DISPLAY') and shutil.which('wl-copy'):
+        return ['wl-copy']
+    if os.environ.get('DISPLAY'):
+        if shutil.which('xclip'):
+            return ['xclip', '-selection', 'clipboard']
+        if shutil.which('xsel'):
+            return ['xsel', '--clipboard', '--input']
+    return None
 
 
 if __name__ == '__main__':
@@ -75,6 +1118,96 @@ if __name__ == '__main__':
     parser.add_argument('--exclude-dir', nargs='*', default=[], help='Directories to exclude (multiple allowed).')
     parser.add_argument('--exclude-file', nargs='*', default=[], help='Files to exclude (multiple allowed).')
     parser.add_argument('--exclude-ext', nargs='*', default=[], help='File extensions to exclude (multiple allowed).')
+    parser.add_argument(
+        '--max-bytes',
+        type=int,
+        default=None,
+        help='Stop before the first file that would push the output past this many bytes.',
+    )
+    parser.add_argument('--stdout', action='store_true', help='Write to stdout instead of the clipboard.')
+    parser.add_argument(
+        '--max-file-bytes',
+        type=int,
+        default=DEFAULT_MAX_FILE_BYTES,
+        help='Skip files larger than this without reading them (0 disables the cap).',
+    )
+    parser.add_argument('--jobs', type=int, default=DEFAULT_JOBS, help='Number of files read concurrently.')
+    parser.add_argument(
+        '--git',
+        action='store_true',
+        help='List files with `git ls-files` (tracked and untracked, minus ignored) instead of walking directories.',
+    )
+    parser.add_argument(
+        '--changed',
+        nargs='?',
+        const='',
+        default=None,
+        metavar='BASE',
+        help='Only files changed since the merge base with BASE (default: origin/HEAD, main or master), plus untracked.',
+    )
+    parser.add_argument(
+        '--hunks',
+        nargs='?',
+        type=int,
+        const=3,
+        default=None,
+        metavar='N',
+        help='With --changed, copy only the diff hunks with N lines of context (default 3) instead of whole files.',
+    )
+    parser.add_argument(
+        '--archive',
+        default=None,
+        help='Write the files to this archive instead of the clipboard: .tar, .tar.gz, .tar.zst, or .patch/.diff.',
+    )
+    parser.add_argument(
+        '--budget-tokens',
+        type=int,
+        default=None,
+        help='Pack files by priority into roughly this many tokens; files that do not fit become outlines.',
+    )
+    parser.add_argument(
+        '--tokenizer',
+        default='heuristic',
+        help='Token counter for --budget-tokens: heuristic (default) or tiktoken[:encoding].',
+    )
+    parser.add_argument(
+        '--rank',
+        choices=('recency', 'proximity'),
+        default='recency',
+        help='Order of walked files under --budget-tokens: newest first, or closest to the --file paths.',
+    )
+    parser.add_argument(
+        '--no-ignore',
+        action='store_true',
+        help='Do not apply .gitignore / .ignore / .git/info/exclude rules while walking.',
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or update the file index under $XDG_CACHE_HOME/clip_board.',
+    )
 
     args = parser.parse_args()
-    copy_files_to_clipboard(args.dir, args.ext, args.file, args.exclude_dir, args.exclude_file, args.exclude_ext)
+    if args.hunks is not None and args.changed is None:
+        parser.error('--hunks requires --changed')
+    copy_files_to_clipboard(
+        args.dir,
+        args.ext,
+        args.file,
+        args.exclude_dir,
+        args.exclude_file,
+        args.exclude_ext,
+        max_bytes=args.max_bytes,
+        to_stdout=args.stdout,
+        max_file_bytes=args.max_file_bytes,
+        jobs=args.jobs,
+        use_cache=not args.no_cache,
+        use_git=args.git,
+        use_ignore=not args.no_ignore,
+        budget_tokens=args.budget_tokens,
+        tokenizer=args.tokenizer,
+        rank=args.rank,
+        archive=args.archive,
+        changed=args.changed,
+        hunks=args.hunks,
+    )
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from codex_worktree import config as config_module
+from codex_worktree import ref_reader
+from codex_worktree.bootstrap import bootstrap_repository
+from codex_worktree.branching import plan_linked_worktree_branch
+from codex_worktree.config import parse_config
+from codex_worktree.create_worktree import create_primary_worktree
+from codex_worktree.git_ops import BatchGitRunner, GitRunner, NativeGitRunner, SubprocessGitRunner
+from codex_worktree.repo_resolution import resolve_repo_path
+
+from .synthetic_repo import RepoSpec, SyntheticWorkspace, build_workspace, remove_worktree
+
+
+RESULT_FORMAT = 1
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+RUNNERS: dict[str, Callable[[], GitRunner]] = {
+    "subprocess": SubprocessGitRunner,
+    "batch": BatchGitRunner,
+    "native": NativeGitRunner,
+}
+
+
+class Suite:
+    def __init__(self, workspace: SyntheticWorkspace, *, iterations: int, cache_dir: Path) -> None:
+        self.workspace = workspace
+        self.iterations = iterations
+        self.cache_dir = cache_dir
+        self.results: list[dict[str, Any]] = []
+        self._counter = 0
+
+    def run(self) -> list[dict[str, Any]]:
+        for cache in ("cold", "warm"):
+            self.bench_resolve_repo_path(cache)
+            for runner in RUNNERS:
+                self.bench_plan_linked_worktree_branch(cache, runner)
+            self.bench_create_primary_worktree(cache)
+            self.bench_bootstrap_repository(cache)
+        return self.results
+
+    def bench_resolve_repo_path(self, cache: str) -> None:
+        config = parse_config(self.workspace.config_path)
+        roots = {
+            "discover": self.workspace.consumer_root,
+            "worktree-fallback": self.workspace.base / "existing" / "wt-0000",
+        }
+        for label, root in roots.items():
+            self._measure(
+                f"resolve_repo_path[{label}]",
+                cache,
+                "native",
+                lambda root=root: resolve_repo_path(
+                    root_dir=root,
+                    repo_key="docs",
+                    repo_config=config.repos["docs"],
+                    env={},
+                ),
+            )
+
+    def bench_plan_linked_worktree_branch(self, cache: str, runner: str) -> None:
+        shared = RUNNERS[runner]()
+
+        def plan() -> None:
+            git = RUNNERS[runner]() if cache == "cold" else shared
+            plan_linked_worktree_branch(
+                consumer_root=self.workspace.consumer_root,
+                linked_repo=self.workspace.docs_repo,
+                strategy="mirror-current-or-parent",
+                git=git,
+            )
+            if git is not shared:
+                _close(git)
+
+        self._measure("plan_linked_worktree_branch", cache, runner, plan)
+        _close(shared)
+
+    def bench_create_primary_worktree(self, cache: str) -> None:
+        config = parse_config(self.workspace.config_path)
+        created: list[str] = []
+
+        def create() -> None:
+            name = self._next_name("create")
+            create_primary_worktree(
+                root_dir=self.workspace.consumer_root,
+                name=name,
+                config=config,
+                worktree_root=None,
+                env={},
+            )
+            created.append(name)
+
+        def cleanup() -> None:
+            while created:
+                name = created.pop()
+                remove_worktree(self.workspace.consumer_root, self.workspace.worktree_root / name, branch=name)
+
+        self._measure("create_primary_worktree", cache, "subprocess", create, after=cleanup)
+
+    def bench_bootstrap_repository(self, cache: str) -> None:
+        config = parse_config(self.workspace.config_path)
+        shared = NativeGitRunner()
+        pending: list[str] = []
+
+        def prepare() -> None:
+            name = self._next_name("bootstrap")
+            create_primary_worktree(
+                root_dir=self.workspace.consumer_root,
+                name=name,
+                config=config,
+                worktree_root=None,
+                env={},
+            )
+            pending.append(name)
+
+        def bootstrap() -> None:
+            bootstrap_repository(
+                root_dir=self.workspace.worktree_root / pending[-1],
+                config=parse_config(self.workspace.config_path),
+                env={},
+                git=None if cache == "cold" else shared,
+            )
+
+        def cleanup() -> None:
+            name = pending.pop()
+            remove_worktree(self.workspace.docs_repo, self.workspace.worktree_root / "docs-linked", branch=name)
+            remove_worktree(self.workspace.consumer_root, self.workspace.worktree_root / name, branch=name)
+
+        self._measure("bootstrap_repository", cache, "native", bootstrap, before=prepare, after=cleanup)
+        _close(shared)
+
+    def _measure(
+        self,
+        name: str,
+        cache: str,
+        runner: str,
+        call: Callable[[], object],
+        *,
+        before: Callable[[], None] | None = None,
+        after: Callable[[], None] | None = None,
+    ) -> None:
+        samples: list[float] = []
+        # Warm runs get one untimed pass so in-process caches and runners are populated.
+        rounds = self.iterations + (1 if cache == "warm" else 0)
+        for index in range(rounds):
+            if before is not None:
+                before()
+            if cache == "cold":
+                self._reset_caches()
+            started = time.perf_counter()
+            call()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if after is not None:
+                after()
+            if cache == "cold" or index > 0:
+                samples.append(elapsed_ms)
+        self.results.append(
+            {
+                "name": name,
+                "cache": cache,
+                "runner": runner,
+                "samples_ms": [round(sample, 3) for sample in samples],
+                "min_ms": round(min(samples), 3),
+                "median_ms": round(statistics.median(samples), 3),
+                "mean_ms": round(statistics.fmean(samples), 3),
+            }
+        )
+
+    def _reset_caches(self) -> None:
+        # The OS page cache is left alone: dropping it needs root, and "cold" here means a fresh process.
+        config_module._memo.clear()
+        with ref_reader._packed_refs_lock:
+            ref_reader._packed_refs_cache.clear()
+        os.environ["CODEX_WORKTREE_CACHE_DIR"] = tempfile.mkdtemp(dir=self.cache_dir)
+
+    def _next_name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"bench-{prefix}-{self._counter:04d}"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--files", type=int, default=RepoSpec.files)
+    parser.add_argument("--file-bytes", type=int, default=RepoSpec.file_bytes)
+    parser.add_argument("--refs", type=int, default=RepoSpec.refs)
+    parser.add_argument("--loose-refs", action="store_true")
+    parser.add_argument("--worktrees", type=int, default=RepoSpec.worktrees)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--work-dir")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args(argv)
+
+    spec = RepoSpec(
+        files=args.files,
+        file_bytes=args.file_bytes,
+        refs=args.refs,
+        packed_refs=not args.loose_refs,
+        worktrees=args.worktrees,
+    )
+    with tempfile.TemporaryDirectory(prefix="codex-worktree-bench-", dir=args.work_dir) as tmp:
+        base = Path(tmp)
+        cache_dir = base / "cache"
+        cache_dir.mkdir()
+        os.environ["CODEX_WORKTREE_CACHE_DIR"] = str(cache_dir)
+        started = time.perf_counter()
+        workspace = build_workspace(base / "workspace", spec)
+        print(f"generated workspace in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        results = Suite(workspace, iterations=args.iterations, cache_dir=cache_dir).run()
+
+    report = {
+        "format": RESULT_FORMAT,
+        "kit_commit": _kit_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": spec.to_json(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(rendered + "\n", encoding="utf-8")
+    else:
+        print(rendered)
+    baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")) if args.compare else None
+    _print_table(results, baseline)
+    return 0
+
+
+def _print_table(results: list[dict[str, Any]], baseline: dict[str, Any] | None) -> None:
+    previous = {
+        (row["name"], row["cache"], row["runner"]): row["median_ms"] for row in (baseline or {}).get("results", [])
+    }
+    print(f"{'BENCHMARK':<44}  {'CACHE':<5}  {'RUNNER':<10}  {'MEDIAN_MS':>9}  {'BASELINE':>9}  {'DELTA':>7}", file=sys.stderr)
+    for row in results:
+        median = row["median_ms"]
+        old = previous.get((row["name"], row["cache"], row["runner"]))
+        baseline_text = f"{old:9.2f}" if old is not None else f"{'-':>9}"
+        delta_text = f"{(median - old) / old * 100:+6.1f}%" if old else f"{'-':>7}"
+        print(
+            f"{row['name']:<44}  {row['cache']:<5}  {row['runner']:<10}  {median:9.2f}  {baseline_text}  {delta_text}",
+            file=sys.stderr,
+        )
+
+
+def _kit_commit() -> str | None:
+    completed = subprocess.run(
+        ["git", "-C", str(PROJECT_ROOT), "rev-parse", "HEAD"],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    return completed.stdout.strip() or None
+
+
+def _close(git: GitRunner) -> None:
+    close = getattr(git, "close", None)
+    if close is not None:
+        close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import textwrap
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+GIT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "bench",
+    "GIT_AUTHOR_EMAIL": "bench@example.com",
+    "GIT_COMMITTER_NAME": "bench",
+    "GIT_COMMITTER_EMAIL": "bench@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+FILES_PER_DIRECTORY = 200
+
+
+@dataclass(frozen=True)
+class RepoSpec:
+    files: int = 2000
+    file_bytes: int = 512
+    refs: int = 500
+    packed_refs: bool = True
+    worktrees: int = 10
+
+    def to_json(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SyntheticWorkspace:
+    base: Path
+    consumer_origin: Path
+    docs_origin: Path
+    consumer_root: Path
+    docs_repo: Path
+    worktree_root: Path
+    config_path: Path
+
+
+def build_workspace(base: Path, spec: RepoSpec) -> SyntheticWorkspace:
+    # Everything lives on disk under `base`; each clone's "origin" is a local bare repo.
+    base.mkdir(parents=True, exist_ok=True)
+    consumer_origin = _build_origin(base / "origin" / "backend.git", spec, seed=base / "seed" / "backend")
+    docs_origin = _build_origin(base / "origin" / "docs.git", spec, seed=base / "seed" / "docs")
+
+    consumer_root = base / "backend"
+    docs_repo = base / "docs"
+    _git(base, "clone", "-q", str(consumer_origin), str(consumer_root))
+    _git(base, "clone", "-q", str(docs_origin), str(docs_repo))
+    for repo in (consumer_root, docs_repo):
+        _create_branches(repo, spec.refs, prefix="local")
+        if spec.packed_refs:
+            _git(repo, "pack-refs", "--all")
+        else:
+            _unpack_refs(repo)
+
+    worktree_root = base / "worktrees"
+    for index in range(spec.worktrees):
+        _git(consumer_root, "worktree", "add", "-q", "--detach", str(base / "existing" / f"wt-{index:04d}"))
+    _git(consumer_root, "switch", "-q", "-c", "bench/consumer")
+
+    config_path = base / "worktree.toml"
+    config_path.write_text(
+        textwrap.dedent(
+            f"""
+            version = 1
+
+            [worktree]
+            default_root = "{worktree_root}"
+
+            [repos.docs]
+            discover = [".docs", "../docs"]
+            linked_worktree_path = "../docs-linked"
+            branch_strategy = "mirror-current-or-parent"
+            required = true
+
+            [[links]]
+            path = ".docs"
+            repo = "docs"
+
+            [[steps]]
+            name = "noop"
+            cwd = "."
+            run = ["true"]
+            """
+        ),
+        encoding="utf-8",
+    )
+    return SyntheticWorkspace(
+        base=base,
+        consumer_origin=consumer_origin,
+        docs_origin=docs_origin,
+        consumer_root=consumer_root,
+        docs_repo=docs_repo,
+        worktree_root=worktree_root,
+        config_path=config_path,
+    )
+
+
+def remove_worktree(repo: Path, path: Path, *, branch: str | None = None) -> None:
+    _git(repo, "worktree", "remove", "--force", str(path))
+    if branch is not None:
+        _git(repo, "branch", "-q", "-D", branch)
+
+
+def _build_origin(origin: Path, spec: RepoSpec, *, seed: Path) -> Path:
+    seed.mkdir(parents=True)
+    _git(seed, "init", "-q", "-b", "main")
+    payload = b"x" * max(0, spec.file_bytes - 1) + b"\n"
+    for index in range(spec.files):
+        path = seed / f"dir-{index // FILES_PER_DIRECTORY:04d}" / f"file-{index:06d}.txt"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(payload)
+    _git(seed, "add", "-A")
+    _git(seed, "commit", "-q", "--allow-empty", "-m", "synthetic tree")
+    _create_branches(seed, spec.refs, prefix="remote")
+    _git(origin.parent, "clone", "-q", "--bare", str(seed), str(origin))
+    return origin
+
+
+def _create_branches(repo: Path, count: int, *, prefix: str) -> None:
+    head = _git(repo, "rev-parse", "HEAD").strip()
+    commands = "".join(f"create refs/heads/{prefix}/branch-{index:06d} {head}\n" for index in range(count))
+    _git(repo, "update-ref", "--stdin", input_text=commands)
+
+
+def _unpack_refs(repo: Path) -> None:
+    # Clones start with packed-refs; rewrite every ref as a loose file and drop the pack.
+    common_dir = repo / ".git"
+    packed = common_dir / "packed-refs"
+    if not packed.exists():
+        return
+    for line in packed.read_text(encoding="utf-8").splitlines():
+        if not line or line.startswith(("#", "^")):
+            continue
+        sha, _, refname = line.partition(" ")
+        loose = common_dir / refname
+        if not loose.exists():
+            loose.parent.mkdir(parents=True, exist_ok=True)
+            loose.write_text(f"{sha}\n", encoding="utf-8")
+    packed.unlink()
+
+
+def _git(cwd: Path, *args: str, input_text: str | None = None) -> str:
+    cwd.mkdir(parents=True, exist_ok=True)
+    completed = subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        env={**os.environ, **GIT_IDENTITY},
+        input=input_text,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return completed.stdout
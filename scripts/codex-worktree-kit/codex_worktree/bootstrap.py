@@ -1,27 +1,42 @@
 from __future__ import annotations
 
+import os
 import subprocess
 import sys
 from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Callable, Mapping
+from typing import Any, Callable, Mapping
 
+from .bootstrap_state import (
+    BootstrapState,
+    bootstrap_state_path,
+    load_bootstrap_state,
+    step_fingerprint,
+    store_bootstrap_state,
+)
 from .branching import plan_linked_worktree_branch
-from .config import AppConfig
-from .errors import StepExecutionError
-from .git_ops import GitRunner, SubprocessGitRunner
-from .repo_resolution import resolve_repo_path
-from .symlink_ops import ensure_symlink
+from .config import AppConfig, LinkConfig, RepoConfig, StepConfig
+from .errors import GitCommandError, StepExecutionError
+from .git_ops import GitRunner, NativeGitRunner, add_worktree_with_checkout
+from .repo_resolution import RepoResolutionContext
+from .scheduler import Task, run_task_graph
+from .step_cache import StepCache
+from .tracing import command_name, span
+from .symlink_ops import SymlinkReconciler
 
 
 CommandRunner = Callable[[list[str], Path], int]
 
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+
 
 @dataclass(frozen=True)
 class BootstrapResult:
     plan: list[str] = field(default_factory=list)
     resolved_repos: dict[str, Path] = field(default_factory=dict)
     link_targets: dict[str, Path] = field(default_factory=dict)
+    link_counts: dict[str, int] = field(default_factory=dict)
 
 
 def bootstrap_repository(
@@ -32,24 +47,72 @@ def bootstrap_repository(
     git: GitRunner | None = None,
     dry_run: bool = False,
     command_runner: CommandRunner | None = None,
+    jobs: int | None = None,
+    use_step_cache: bool = True,
+    incremental: bool = False,
 ) -> BootstrapResult:
-    git = git or SubprocessGitRunner()
+    if git is None:
+        with NativeGitRunner() as native_git:
+            return bootstrap_repository(
+                root_dir=root_dir,
+                config=config,
+                env=env,
+                git=native_git,
+                dry_run=dry_run,
+                command_runner=command_runner,
+                jobs=jobs,
+                use_step_cache=use_step_cache,
+                incremental=incremental,
+            )
+
     command_runner = command_runner or run_step_command
     env = env or {}
     plan: list[str] = []
     resolved_repos: dict[str, Path] = {}
     link_targets: dict[str, Path] = {}
+    step_cache = None
+    if use_step_cache and any(step.inputs for step in config.steps):
+        step_cache = StepCache.for_worktree(root_dir)
+    state_path = bootstrap_state_path(root_dir)
+    previous = load_bootstrap_state(state_path) if incremental and state_path is not None else None
+    # Task keys whose effect differs from the previous bootstrap; steps downstream of them rerun.
+    changed: set[str] = set()
+    link_keys = {id(link): _link_task_key(index) for index, link in enumerate(config.links)}
+    links = SymlinkReconciler(dry_run=dry_run)
 
     if config.git.hooks_path:
-        result = git.set_hooks_path(root_dir, config.git.hooks_path, dry_run=dry_run)
-        plan.append(" ".join(result.args))
+        with span("hooks", "bootstrap", order=0) as record:
+            if previous is not None and previous.hooks_path == config.git.hooks_path:
+                record["plan"] = [f"unchanged core.hooksPath {config.git.hooks_path}"]
+            else:
+                result = git.set_hooks_path(root_dir, config.git.hooks_path, dry_run=dry_run)
+                record["plan"] = [" ".join(result.args)]
+        plan.extend(record["plan"])
 
-    for repo_key, repo_config in config.repos.items():
-        repo_path = resolve_repo_path(root_dir=root_dir, repo_key=repo_key, repo_config=repo_config, env=env)
+    resolution = RepoResolutionContext(root_dir=root_dir, env=env)
+    with span("resolve repos", "bootstrap", repos=list(config.repos)):
+        repo_paths = resolution.resolve_all(config.repos)
+
+    if previous is not None:
+        with span("remove dropped", "bootstrap", order=1) as record:
+            record["plan"] = _remove_dropped(
+                root_dir=root_dir,
+                config=config,
+                previous=previous,
+                git=git,
+                dry_run=dry_run,
+            )
+        plan.extend(record["plan"])
+
+    def prepare_repo(repo_key: str, repo_config: RepoConfig) -> list[str]:
+        repo_path = repo_paths[repo_key]
         if repo_path is None:
-            continue
+            return []
         resolved_repos[repo_key] = repo_path
         target_path = repo_path
+        lines: list[str] = []
+        if previous is None or previous.repos.get(repo_key) != str(repo_path):
+            changed.add(_repo_task_key(repo_key))
 
         if repo_config.linked_worktree_path:
             linked_path = (root_dir / repo_config.linked_worktree_path).resolve()
@@ -61,7 +124,8 @@ def bootstrap_repository(
                     strategy=repo_config.branch_strategy,
                     git=git,
                 )
-                result = git.add_worktree(
+                results = add_worktree_with_checkout(
+                    git,
                     repo_path,
                     linked_path,
                     branch=branch_plan.branch,
@@ -69,41 +133,232 @@ def bootstrap_repository(
                     detach=branch_plan.detach,
                     start_point=branch_plan.start_point,
                     dry_run=dry_run,
+                    sparse_checkout=repo_config.checkout.sparse_checkout,
+                    no_checkout=repo_config.checkout.no_checkout,
+                    skip_lfs_smudge=repo_config.checkout.skip_lfs_smudge,
                 )
-                plan.append(" ".join(result.args))
+                lines.extend(" ".join(result.args) for result in results)
+                changed.add(_repo_task_key(repo_key))
             else:
-                plan.append(f"reuse existing path {linked_path}")
+                lines.append(f"reuse existing path {linked_path}")
+                if previous is None or previous.worktrees.get(repo_key) != str(linked_path):
+                    changed.add(_repo_task_key(repo_key))
 
         link_targets[repo_key] = target_path
+        return lines
 
-    for link in config.links:
-        rendered = ensure_symlink(
-            link_path=(root_dir / link.path).resolve(),
-            target_path=link_targets[link.repo],
-            dry_run=dry_run,
-        )
-        plan.append(rendered)
+    def prepare_link(link: LinkConfig) -> str:
+        outcome = links.reconcile(_link_location(root_dir, link.path), link_targets[link.repo])
+        unchanged = outcome.action == "unchanged" and previous is not None
+        if not unchanged or previous.links.get(link.path) != str(outcome.target_path):
+            changed.add(link_keys[id(link)])
+        return outcome.plan_line
 
-    for step in config.steps:
+    def run_step(step: StepConfig) -> str:
         cwd = (root_dir / step.cwd).resolve()
         rendered = f"(cd {cwd} && {' '.join(step.run)})"
-        plan.append(rendered)
+        lookup = None
+        if step_cache is not None and step.inputs:
+            try:
+                lookup = step_cache.lookup(step)
+            except OSError:
+                lookup = None
+        if lookup is not None and lookup.unchanged:
+            return f"skip {rendered} (inputs unchanged)"
+        if (
+            lookup is None
+            and previous is not None
+            and previous.steps.get(step.name) == step_fingerprint(step)
+            and not changed.intersection(step_dependencies[_step_task_key(step.name)])
+        ):
+            return f"skip {rendered} (unchanged since last bootstrap)"
+        changed.add(_step_task_key(step.name))
+        if lookup is not None and lookup.restorable:
+            restored = f"restore {rendered} (outputs from step cache)"
+            if dry_run:
+                return restored
+            try:
+                step_cache.restore(lookup)
+                return restored
+            except OSError:
+                pass
         if not dry_run:
-            returncode = command_runner(step.run, cwd)
+            with span(command_name(step.run), "step", step=step.name, argv=step.run, cwd=str(cwd)) as record:
+                returncode = command_runner(step.run, cwd)
+                record["exit_code"] = returncode
             if returncode != 0:
                 print(
                     f"step '{step.name}' failed in {cwd} with exit code {returncode}",
                     file=sys.stderr,
                 )
                 raise StepExecutionError(step_name=step.name, returncode=returncode)
+            if lookup is not None:
+                step_cache.record(lookup)
+        return rendered
+
+    tasks = build_bootstrap_tasks(
+        root_dir=root_dir,
+        config=config,
+        prepare_repo=prepare_repo,
+        prepare_link=prepare_link,
+        run_step=run_step,
+    )
+    step_dependencies = {task.key: task.depends_on for task in tasks}
+    # Task events carry their plan lines, so a trace can reproduce the plan in declaration order.
+    tasks = [
+        Task(key=task.key, run=partial(_run_traced, task, index + 2), depends_on=task.depends_on)
+        for index, task in enumerate(tasks)
+    ]
+    results = run_task_graph(tasks, max_workers=jobs or DEFAULT_JOBS)
+
+    for repo_key in config.repos:
+        plan.extend(results[_repo_task_key(repo_key)])
+    for index, _ in enumerate(config.links):
+        plan.append(results[_link_task_key(index)])
+    for step in config.steps:
+        plan.append(results[_step_task_key(step.name)])
 
     if dry_run:
         for line in plan:
             print(line)
+    elif state_path is not None:
+        store_bootstrap_state(
+            state_path,
+            BootstrapState(
+                hooks_path=config.git.hooks_path,
+                repos={key: str(path) for key, path in resolved_repos.items()},
+                worktrees={
+                    key: str(link_targets[key])
+                    for key, repo_config in config.repos.items()
+                    if repo_config.linked_worktree_path and key in link_targets
+                },
+                links={link.path: str(link_targets[link.repo]) for link in config.links},
+                steps={step.name: step_fingerprint(step) for step in config.steps},
+            ),
+        )
 
-    return BootstrapResult(plan=plan, resolved_repos=resolved_repos, link_targets=link_targets)
+    return BootstrapResult(
+        plan=plan,
+        resolved_repos={key: resolved_repos[key] for key in config.repos if key in resolved_repos},
+        link_targets={key: link_targets[key] for key in config.repos if key in link_targets},
+        link_counts=links.counts,
+    )
+
+
+def build_bootstrap_tasks(
+    *,
+    root_dir: Path,
+    config: AppConfig,
+    prepare_repo: Callable[[str, RepoConfig], Any],
+    prepare_link: Callable[[LinkConfig], Any],
+    run_step: Callable[[StepConfig], Any],
+) -> list[Task]:
+    tasks: list[Task] = []
+    worktree_paths: dict[str, Path] = {}
+    for repo_key, repo_config in config.repos.items():
+        if repo_config.linked_worktree_path:
+            worktree_paths[repo_key] = _lexical_path(root_dir / repo_config.linked_worktree_path)
+        tasks.append(Task(key=_repo_task_key(repo_key), run=partial(prepare_repo, repo_key, repo_config)))
+
+    link_paths: dict[int, Path] = {}
+    for index, link in enumerate(config.links):
+        link_paths[index] = _lexical_path(root_dir / link.path)
+        depends_on = (_repo_task_key(link.repo),) if link.repo in config.repos else ()
+        tasks.append(Task(key=_link_task_key(index), run=partial(prepare_link, link), depends_on=depends_on))
+
+    # Configs that never use depends_on keep running their steps one after another in declaration order.
+    ordered = not any(step.depends_on for step in config.steps)
+    previous_step: str | None = None
+    for step in config.steps:
+        cwd = _lexical_path(root_dir / step.cwd)
+        depends_on = [_step_task_key(name) for name in step.depends_on]
+        if ordered and previous_step is not None:
+            depends_on.append(_step_task_key(previous_step))
+        previous_step = step.name
+        depends_on.extend(
+            _link_task_key(index) for index, link_path in link_paths.items() if _paths_overlap(cwd, link_path)
+        )
+        depends_on.extend(
+            _repo_task_key(repo_key)
+            for repo_key, worktree_path in worktree_paths.items()
+            if _paths_overlap(cwd, worktree_path)
+        )
+        tasks.append(Task(key=_step_task_key(step.name), run=partial(run_step, step), depends_on=tuple(depends_on)))
+    return tasks
+
+
+def _remove_dropped(
+    *,
+    root_dir: Path,
+    config: AppConfig,
+    previous: BootstrapState,
+    git: GitRunner,
+    dry_run: bool,
+) -> list[str]:
+    lines: list[str] = []
+    current_links = {link.path for link in config.links}
+    for link_path in sorted(set(previous.links) - current_links):
+        path = root_dir / link_path
+        if not path.is_symlink():
+            continue
+        lines.append(f"rm {path}")
+        if not dry_run:
+            path.unlink()
+
+    current_worktrees = {
+        str((root_dir / repo_config.linked_worktree_path).resolve())
+        for repo_config in config.repos.values()
+        if repo_config.linked_worktree_path
+    }
+    for repo_key, worktree in sorted(previous.worktrees.items()):
+        repo = previous.repos.get(repo_key)
+        if worktree in current_worktrees or repo is None or not Path(worktree).exists():
+            continue
+        try:
+            result = git.remove_worktree(Path(repo), Path(worktree), dry_run=dry_run)
+        except GitCommandError as exc:
+            # A dirty worktree refuses a non-forced remove; leave it for the user instead of aborting.
+            print(f"kept dropped worktree {worktree}: {exc}", file=sys.stderr)
+            lines.append(f"keep {worktree} (has local changes)")
+            continue
+        lines.append(" ".join(result.args))
+    return lines
+
+
+def _link_location(root_dir: Path, link_path: str) -> Path:
+    # Resolve only the parent: resolving the link itself would follow an existing symlink to its target.
+    location = root_dir / link_path
+    return location.parent.resolve() / location.name
 
 
 def run_step_command(argv: list[str], cwd: Path) -> int:
     completed = subprocess.run(argv, cwd=cwd, check=False)
     return completed.returncode
+
+
+def _run_traced(task: Task, order: int) -> Any:
+    with span(task.key, "bootstrap", order=order) as record:
+        result = task.run()
+        record["plan"] = list(result) if isinstance(result, list) else [result]
+    return result
+
+
+def _repo_task_key(repo_key: str) -> str:
+    return f"repo:{repo_key}"
+
+
+def _link_task_key(index: int) -> str:
+    return f"link:{index}"
+
+
+def _step_task_key(name: str) -> str:
+    return f"step:{name}"
+
+
+def _lexical_path(path: Path) -> Path:
+    # Links may already exist, so dependency edges compare paths without following symlinks.
+    return Path(os.path.normpath(path))
+
+
+def _paths_overlap(left: Path, right: Path) -> bool:
+    return left == right or left in right.parents or right in left.parents
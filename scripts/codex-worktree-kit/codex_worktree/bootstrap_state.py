@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .config import StepConfig
+from .errors import RefReadError
+from .ref_reader import find_git_dir
+from .remote_refs import CACHE_DIR_NAME
+
+
+STATE_FORMAT = 1
+STATE_FILE_NAME = "bootstrap-state.json"
+
+
+@dataclass(frozen=True)
+class BootstrapState:
+    hooks_path: str | None = None
+    repos: dict[str, str] = field(default_factory=dict)
+    worktrees: dict[str, str] = field(default_factory=dict)
+    links: dict[str, str] = field(default_factory=dict)
+    steps: dict[str, str] = field(default_factory=dict)
+
+
+def bootstrap_state_path(root_dir: Path) -> Path | None:
+    # State is per worktree, so it lives in the worktree's own git dir rather than the common dir.
+    try:
+        git_dir = find_git_dir(root_dir)
+    except (RefReadError, OSError):
+        return None
+    if git_dir is None:
+        return None
+    return git_dir / CACHE_DIR_NAME / STATE_FILE_NAME
+
+
+def load_bootstrap_state(path: Path) -> BootstrapState | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != STATE_FORMAT:
+        return None
+    hooks_path = data.get("hooks_path")
+    sections = {name: data.get(name) for name in ("repos", "worktrees", "links", "steps")}
+    if hooks_path is not None and not isinstance(hooks_path, str):
+        return None
+    if not all(_is_str_mapping(section) for section in sections.values()):
+        return None
+    return BootstrapState(hooks_path=hooks_path, **sections)
+
+
+def store_bootstrap_state(path: Path, state: BootstrapState) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump({"format": STATE_FORMAT, **asdict(state)}, handle, indent=2, sort_keys=True)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def step_fingerprint(step: StepConfig) -> str:
+    payload = json.dumps([step.cwd, step.run, step.inputs, step.outputs], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_str_mapping(value: object) -> bool:
+    return isinstance(value, dict) and all(isinstance(key, str) and isinstance(item, str) for key, item in value.items())
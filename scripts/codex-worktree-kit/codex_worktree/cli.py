@@ -4,17 +4,25 @@ import argparse
 import os
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, Mapping
 
-from .bootstrap import bootstrap_repository
-from .config import AppConfig, parse_config
-from .create_worktree import create_primary_worktree
 from .errors import CodexWorktreeError, GitCommandError, StepExecutionError
-from .repo_resolution import resolve_repo_path
 
+if TYPE_CHECKING:
+    from .config import AppConfig
+    from .create_worktree import BatchCreateResult, TargetBootstrapper
+    from .inventory import GcOutcome, Inventory
+    from .seed_ops import SeedProgress, SeedProgressCallback, SeedResult
+    from .tracing import Tracer
 
-def main(argv: list[str] | None = None) -> int:
+# Subcommands import their modules lazily so that cold start only pays for what
+# the command uses; tests/test_startup_budget.py enforces this.
+
+
+def main(argv: list[str] | None = None, *, env: Mapping[str, str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    args.env = os.environ if env is None else env
     try:
         return args.func(args)
     except StepExecutionError as error:
@@ -35,14 +43,23 @@ def build_parser() -> argparse.ArgumentParser:
     bootstrap.add_argument("--root-dir", required=True)
     bootstrap.add_argument("--config", required=True)
     bootstrap.add_argument("--dry-run", action="store_true")
+    bootstrap.add_argument("--jobs", type=_positive_int)
+    bootstrap.add_argument("--refresh-remote-refs", action="store_true")
+    bootstrap.add_argument("--no-step-cache", action="store_true")
+    bootstrap.add_argument("--incremental", action="store_true")
+    bootstrap.add_argument("--profile", action="store_true")
+    bootstrap.add_argument("--trace-out")
     bootstrap.set_defaults(func=_cmd_bootstrap)
 
     create = subparsers.add_parser("create-worktree")
-    create.add_argument("name")
+    create.add_argument("names", nargs="*", metavar="name")
+    create.add_argument("--from-file")
     create.add_argument("--root-dir")
     create.add_argument("--worktree-root")
     create.add_argument("--config")
     create.add_argument("--dry-run", action="store_true")
+    create.add_argument("--jobs", type=_positive_int)
+    create.add_argument("--bootstrap", action="store_true")
     create.set_defaults(func=_cmd_create_worktree)
 
     resolve = subparsers.add_parser("resolve-repo")
@@ -53,7 +70,44 @@ def build_parser() -> argparse.ArgumentParser:
 
     validate = subparsers.add_parser("validate-config")
     validate.add_argument("--config", required=True)
+    validate.add_argument("--no-cache", action="store_true")
     validate.set_defaults(func=_cmd_validate_config)
+
+    list_parser = subparsers.add_parser("list")
+    list_parser.add_argument("--root-dir")
+    list_parser.add_argument("--base")
+    list_parser.add_argument("--jobs", type=_positive_int)
+    list_parser.add_argument("--json", action="store_true")
+    list_parser.set_defaults(func=_cmd_list)
+
+    gc = subparsers.add_parser("gc")
+    gc.add_argument("--root-dir")
+    gc.add_argument("--config")
+    gc.add_argument("--worktree-root")
+    gc.add_argument("--base")
+    gc.add_argument("--max-age-days", type=float, default=30.0)
+    gc.add_argument("--min-age-days", type=float, default=1.0)
+    gc.add_argument("--max-total-size", type=_byte_size)
+    gc.add_argument("--dry-run", action="store_true")
+    gc.add_argument("--jobs", type=_positive_int)
+    gc.set_defaults(func=_cmd_gc)
+
+    pool = subparsers.add_parser("pool")
+    pool_commands = pool.add_subparsers(dest="pool_command", required=True)
+    for pool_command in ("fill", "status", "drain"):
+        pool_parser = pool_commands.add_parser(pool_command)
+        pool_parser.add_argument("--root-dir")
+        pool_parser.add_argument("--worktree-root")
+        pool_parser.add_argument("--config")
+        if pool_command == "fill":
+            pool_parser.add_argument("--size", type=_positive_int, required=True)
+            pool_parser.add_argument("--jobs", type=_positive_int)
+            pool_parser.add_argument("--background", action="store_true")
+        pool_parser.set_defaults(func=_cmd_pool)
+
+    serve = subparsers.add_parser("serve")
+    serve.add_argument("--socket")
+    serve.set_defaults(func=_cmd_serve)
     return parser
 
 
@@ -73,37 +127,119 @@ def validate_config_entrypoint() -> int:
     return main(["validate-config", *sys.argv[1:]])
 
 
+def list_entrypoint() -> int:
+    return main(["list", *sys.argv[1:]])
+
+
+def gc_entrypoint() -> int:
+    return main(["gc", *sys.argv[1:]])
+
+
+def pool_entrypoint() -> int:
+    return main(["pool", *sys.argv[1:]])
+
+
+def serve_entrypoint() -> int:
+    return main(["serve", *sys.argv[1:]])
+
+
 def _cmd_bootstrap(args: argparse.Namespace) -> int:
-    config = parse_config(Path(args.config))
-    bootstrap_repository(
-        root_dir=Path(args.root_dir).resolve(),
-        config=config,
-        env=os.environ,
-        dry_run=args.dry_run,
-    )
+    from contextlib import nullcontext
+
+    from .bootstrap import bootstrap_repository
+    from .config import parse_config
+    from .git_ops import NativeGitRunner
+    from .tracing import Tracer, activate
+
+    tracer = Tracer() if args.profile or args.trace_out else None
+    try:
+        with activate(tracer) if tracer is not None else nullcontext():
+            config = parse_config(Path(args.config))
+            with NativeGitRunner(refresh_remote_refs=args.refresh_remote_refs) as git:
+                result = bootstrap_repository(
+                    root_dir=Path(args.root_dir).resolve(),
+                    config=config,
+                    env=args.env,
+                    git=git,
+                    dry_run=args.dry_run,
+                    jobs=args.jobs,
+                    use_step_cache=not args.no_step_cache,
+                    incremental=args.incremental,
+                )
+        if not args.dry_run:
+            _print_link_summary(result.link_counts)
+    finally:
+        if tracer is not None:
+            if args.profile:
+                _print_profile(tracer)
+            if args.trace_out:
+                tracer.write_chrome_trace(Path(args.trace_out))
     return 0
 
 
 def _cmd_create_worktree(args: argparse.Namespace) -> int:
+    from .config import parse_config
+    from .create_worktree import DEFAULT_CREATE_JOBS, create_primary_worktree, create_primary_worktrees
+
+    names = list(args.names)
+    if args.from_file:
+        names.extend(_read_names(args.from_file))
+    if not names:
+        raise CodexWorktreeError("create-worktree requires at least one name or --from-file")
+
     root_dir = Path(args.root_dir).resolve() if args.root_dir else Path.cwd().resolve()
     config = parse_config(_resolve_config_path(root_dir, args.config))
-    result = create_primary_worktree(
+    worktree_root = Path(args.worktree_root).resolve() if args.worktree_root else None
+    bootstrap = _target_bootstrapper(config, args) if args.bootstrap else None
+
+    if len(names) == 1 and not args.from_file:
+        result = create_primary_worktree(
+            root_dir=root_dir,
+            name=names[0],
+            config=config,
+            worktree_root=worktree_root,
+            env=args.env,
+            dry_run=args.dry_run,
+            seed_progress=_seed_progress_printer(),
+        )
+        _print_seed_summary(result.seeds)
+        if result.claimed:
+            print(f"claimed pre-warmed spare for {result.path}", file=sys.stderr)
+        if bootstrap is not None and not args.dry_run and not result.bootstrapped:
+            bootstrap(result.path)
+        if args.dry_run:
+            for line in result.plan:
+                print(line)
+            if bootstrap is not None:
+                print(f"bootstrap {result.path}")
+        else:
+            print(result.path)
+        return 0
+
+    results = create_primary_worktrees(
         root_dir=root_dir,
-        name=args.name,
+        names=names,
         config=config,
-        worktree_root=Path(args.worktree_root).resolve() if args.worktree_root else None,
-        env=os.environ,
+        worktree_root=worktree_root,
+        env=args.env,
         dry_run=args.dry_run,
+        jobs=args.jobs or DEFAULT_CREATE_JOBS,
+        bootstrap=bootstrap,
     )
+    for result in results:
+        _print_seed_summary(result.seeds)
     if args.dry_run:
-        for line in result.plan:
-            print(line)
-    else:
-        print(result.path)
-    return 0
+        for result in results:
+            for line in result.plan:
+                print(line)
+    _print_batch_results(results)
+    return 0 if all(result.ok for result in results) else 1
 
 
 def _cmd_resolve_repo(args: argparse.Namespace) -> int:
+    from .config import parse_config
+    from .repo_resolution import resolve_repo_path
+
     root_dir = Path(args.root_dir).resolve()
     config = parse_config(Path(args.config))
     repo_config = config.repos.get(args.repo_key)
@@ -113,7 +249,7 @@ def _cmd_resolve_repo(args: argparse.Namespace) -> int:
         root_dir=root_dir,
         repo_key=args.repo_key,
         repo_config=repo_config,
-        env=os.environ,
+        env=args.env,
     )
     if resolved is None:
         raise CodexWorktreeError(f"repo '{args.repo_key}' is not configured as required and was not found")
@@ -122,12 +258,322 @@ def _cmd_resolve_repo(args: argparse.Namespace) -> int:
 
 
 def _cmd_validate_config(args: argparse.Namespace) -> int:
-    config = parse_config(Path(args.config))
+    from .config import parse_config
+
+    config = parse_config(Path(args.config), use_cache=not args.no_cache)
     _ = config
     print(f"valid: {args.config}")
     return 0
 
 
+def _cmd_list(args: argparse.Namespace) -> int:
+    import json
+
+    from .inventory import DEFAULT_SCAN_JOBS, collect_inventory
+
+    root_dir = Path(args.root_dir).resolve() if args.root_dir else Path.cwd().resolve()
+    inventory = collect_inventory(repo=root_dir, base=args.base, jobs=args.jobs or DEFAULT_SCAN_JOBS)
+    if args.json:
+        print(json.dumps(_inventory_json(inventory), indent=2))
+    else:
+        _print_inventory(inventory)
+    return 0
+
+
+def _cmd_gc(args: argparse.Namespace) -> int:
+    from .git_ops import SubprocessGitRunner
+    from .inventory import DEFAULT_SCAN_JOBS, GcPolicy, collect_inventory, plan_gc, run_gc
+
+    root_dir = Path(args.root_dir).resolve() if args.root_dir else Path.cwd().resolve()
+    inventory = collect_inventory(repo=root_dir, base=args.base, jobs=args.jobs or DEFAULT_SCAN_JOBS)
+    policy = GcPolicy(
+        max_age_days=args.max_age_days,
+        min_age_days=args.min_age_days,
+        max_total_bytes=args.max_total_size,
+    )
+    candidates = plan_gc(
+        inventory,
+        policy,
+        worktree_root=_gc_worktree_root(root_dir, args),
+        protected={Path.cwd()},
+    )
+    outcomes = run_gc(repo=root_dir, candidates=candidates, git=SubprocessGitRunner(), dry_run=args.dry_run)
+    _print_gc_outcomes(outcomes, dry_run=args.dry_run)
+    return 0 if all(outcome.error is None for outcome in outcomes) else 1
+
+
+def _cmd_pool(args: argparse.Namespace) -> int:
+    from .config import parse_config
+    from .create_worktree import resolve_primary_worktree_root
+    from .git_ops import SubprocessGitRunner
+    from .pool import (
+        PoolSettings,
+        drain_pool,
+        fill_pool,
+        pool_dir,
+        read_pool_settings,
+        ready_spares,
+        request_refill,
+        store_pool_settings,
+    )
+
+    root_dir = Path(args.root_dir).resolve() if args.root_dir else Path.cwd().resolve()
+    config_path = _resolve_config_path(root_dir, args.config)
+    config = parse_config(config_path)
+    if not config.worktree.configured:
+        raise CodexWorktreeError("pool requires a [worktree] section in the config")
+    worktree_root = Path(args.worktree_root).resolve() if args.worktree_root else None
+    base_root = resolve_primary_worktree_root(
+        root_dir=root_dir,
+        repo_name=root_dir.name,
+        worktree_config=config.worktree,
+        cli_override=worktree_root,
+        env=args.env,
+    )
+    pool = pool_dir(base_root)
+    git = SubprocessGitRunner()
+
+    if args.pool_command == "status":
+        settings = read_pool_settings(pool)
+        spares = ready_spares(pool)
+        print(f"pool {pool}: {len(spares)} ready" + (f" of {settings.size}" if settings else ""))
+        for spare in spares:
+            print(f"  {spare.path}  {spare.head[:12]}")
+        return 0
+    if args.pool_command == "drain":
+        for path in drain_pool(root_dir=root_dir, base_root=base_root, git=git):
+            print(f"removed {path}")
+        return 0
+
+    settings = PoolSettings(
+        size=args.size,
+        root_dir=str(root_dir),
+        config=str(config_path),
+        worktree_root=str(worktree_root) if worktree_root else None,
+    )
+    if args.background:
+        store_pool_settings(pool, settings)
+        request_refill(pool, args.env)
+        print(f"filling {pool} in the background")
+        return 0
+    created = fill_pool(
+        root_dir=root_dir,
+        base_root=base_root,
+        config=config,
+        settings=settings,
+        git=git,
+        bootstrap=_target_bootstrapper(config, args),
+        jobs=args.jobs or 2,
+    )
+    if created is None:
+        print(f"another fill is already running for {pool}", file=sys.stderr)
+        return 0
+    for path in created:
+        print(f"ready {path}")
+    return 0
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    from .daemon import default_socket_path, serve
+
+    socket_path = Path(args.socket).expanduser() if args.socket else default_socket_path(args.env)
+    serve(socket_path)
+    return 0
+
+
+def _read_names(path: str) -> list[str]:
+    text = sys.stdin.read() if path == "-" else Path(path).read_text(encoding="utf-8")
+    names: list[str] = []
+    for line in text.splitlines():
+        name = line.strip()
+        if name and not name.startswith("#"):
+            names.append(name)
+    return names
+
+
+def _target_bootstrapper(config: AppConfig, args: argparse.Namespace) -> TargetBootstrapper:
+    from .bootstrap import bootstrap_repository
+
+    def bootstrap(target: Path) -> None:
+        bootstrap_repository(root_dir=target, config=config, env=args.env)
+
+    return bootstrap
+
+
+def _gc_worktree_root(root_dir: Path, args: argparse.Namespace) -> Path | None:
+    # Only worktrees under the configured primary root are collected; without a config every linked worktree is eligible.
+    if args.worktree_root:
+        return Path(args.worktree_root).resolve()
+    config_path = _resolve_config_path(root_dir, args.config)
+    if not config_path.is_file():
+        return None
+    from .config import parse_config
+    from .create_worktree import resolve_primary_worktree_root
+
+    config = parse_config(config_path)
+    if not config.worktree.configured:
+        return None
+    return resolve_primary_worktree_root(
+        root_dir=root_dir,
+        repo_name=root_dir.name,
+        worktree_config=config.worktree,
+        cli_override=None,
+        env=args.env,
+    )
+
+
+def _inventory_json(inventory: Inventory) -> dict[str, object]:
+    return {
+        "repo": str(inventory.repo),
+        "base": inventory.base,
+        "worktrees": [
+            {
+                "path": str(info.path),
+                "branch": info.record.branch,
+                "head": info.record.head,
+                "main": info.record.is_main,
+                "locked": info.record.locked,
+                "prunable": info.record.prunable,
+                "merged": info.merged,
+                "size_bytes": info.usage.size_bytes if info.usage else None,
+                "files": info.usage.files if info.usage else None,
+                "mtime": info.usage.mtime if info.usage else None,
+            }
+            for info in inventory.worktrees
+        ],
+    }
+
+
+def _print_inventory(inventory: Inventory) -> None:
+    import time
+
+    now = time.time()
+    rows = []
+    for info in inventory.worktrees:
+        record = info.record
+        branch = record.branch or ("(detached)" if record.detached else "-")
+        size = _format_bytes(info.usage.size_bytes) if info.usage else "-"
+        age = _format_age(now - info.usage.mtime) if info.usage else "-"
+        if record.is_main:
+            merged = "main"
+        elif record.prunable or info.usage is None:
+            merged = "missing"
+        else:
+            merged = {True: "merged", False: "unmerged", None: "-"}[info.merged]
+        if record.locked:
+            merged += ",locked"
+        rows.append((str(info.path), branch, size, age, merged))
+    path_width = max([len("PATH"), *(len(row[0]) for row in rows)])
+    branch_width = max([len("BRANCH"), *(len(row[1]) for row in rows)])
+    print(f"{'PATH':<{path_width}}  {'BRANCH':<{branch_width}}  {'SIZE':>10}  {'MODIFIED':>8}  STATUS")
+    for path, branch, size, age, merged in rows:
+        print(f"{path:<{path_width}}  {branch:<{branch_width}}  {size:>10}  {age:>8}  {merged}")
+    if inventory.base:
+        print(f"merge status against {inventory.base}", file=sys.stderr)
+
+
+def _print_gc_outcomes(outcomes: list[GcOutcome], *, dry_run: bool) -> None:
+    for outcome in outcomes:
+        if outcome.reason == "prune":
+            if dry_run:
+                print(*outcome.plan, sep="\n")
+            continue
+        status = "failed" if outcome.error else ("would remove" if dry_run else "removed")
+        print(f"{status} {outcome.path} ({outcome.reason})")
+        if dry_run:
+            for line in outcome.plan:
+                print(f"  {line}")
+        if outcome.error:
+            print(f"  {outcome.error.replace(chr(10), ' ')}", file=sys.stderr)
+
+
+def _print_profile(tracer: Tracer) -> None:
+    rows = tracer.summary_rows()
+    name_width = min(48, max([len("NAME"), *(len(row[1]) for row in rows)]))
+    print(f"{'CATEGORY':<9}  {'NAME':<{name_width}}  {'COUNT':>5}  {'TOTAL_MS':>9}  {'MAX_MS':>8}", file=sys.stderr)
+    for category, name, count, total_ms, max_ms in rows:
+        print(
+            f"{category:<9}  {name[:name_width]:<{name_width}}  {count:>5}  {total_ms:>9.1f}  {max_ms:>8.1f}",
+            file=sys.stderr,
+        )
+
+
+def _seed_progress_printer() -> SeedProgressCallback | None:
+    if not sys.stderr.isatty():
+        return None
+
+    def report(progress: SeedProgress) -> None:
+        print(f"\rseed {progress.path}: {progress.files} files, {_format_bytes(progress.bytes)}", end="", file=sys.stderr)
+
+    return report
+
+
+def _print_seed_summary(seeds: list[SeedResult]) -> None:
+    # Clear the in-place progress line before printing the final summary.
+    prefix = "\r\033[K" if sys.stderr.isatty() else ""
+    for seed in seeds:
+        if seed.method == "planned":
+            continue
+        if seed.method in {"missing", "exists"}:
+            print(f"{prefix}seed {seed.path}: skipped ({seed.method})", file=sys.stderr)
+            continue
+        print(
+            f"{prefix}seed {seed.path}: {seed.method}, {seed.files} files, {_format_bytes(seed.bytes)}",
+            file=sys.stderr,
+        )
+
+
+def _print_link_summary(counts: dict[str, int]) -> None:
+    if sum(counts.values()):
+        print("links: " + ", ".join(f"{count} {action}" for action, count in counts.items()), file=sys.stderr)
+
+
+def _format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{size} B"
+
+
+def _print_batch_results(results: list[BatchCreateResult]) -> None:
+    name_width = max(len("NAME"), *(len(result.name) for result in results))
+    print(f"{'NAME':<{name_width}}  STATUS  SECONDS  DETAIL")
+    for result in results:
+        status = "ok" if result.ok else "failed"
+        detail = str(result.path) if result.ok else (result.error or "").strip().replace("\n", " ")
+        print(f"{result.name:<{name_width}}  {status:<6}  {result.seconds:7.2f}  {detail}")
+
+
+def _format_age(seconds: float) -> str:
+    if seconds < 60 * 60:
+        return f"{max(0, int(seconds // 60))}m ago"
+    if seconds < 24 * 60 * 60:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // (24 * 60 * 60))}d ago"
+
+
+def _byte_size(value: str) -> int:
+    units = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    text = value.strip().upper().removesuffix("IB").removesuffix("B")
+    number, unit = (text[:-1], text[-1]) if text and text[-1] in units else (text, "")
+    try:
+        size = float(number) * units[unit]
+    except ValueError:
+        raise argparse.ArgumentTypeError("must be a size such as 500M or 20G") from None
+    if size < 0:
+        raise argparse.ArgumentTypeError("must not be negative")
+    return int(size)
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+
 def _resolve_config_path(root_dir: Path, cli_value: str | None) -> Path:
     if cli_value:
         return Path(cli_value).resolve()
@@ -0,0 +1,64 @@
+"""Thin socket client for `codex-worktree serve`.
+
+The bin shims run this file directly with `python -I -S` so that it starts
+without importing the package; keep it free of package imports.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import time
+
+
+FALLBACK_EXIT_CODE = 75
+CONNECT_TIMEOUT = 0.2
+# A stuck or busy daemon must not hang the caller; past this the shim runs the command in-process.
+READ_TIMEOUT = 5.0
+
+
+def request(socket_path: str, argv: list[str], *, cwd: str, env: dict[str, str]) -> dict | None:
+    payload = json.dumps({"argv": argv, "cwd": cwd, "env": env}).encode("utf-8") + b"\n"
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(socket_path)
+            deadline = time.monotonic() + READ_TIMEOUT
+            client.settimeout(READ_TIMEOUT)
+            client.sendall(payload)
+            chunks = []
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                client.settimeout(remaining)
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+    except OSError:
+        return None
+    try:
+        response = json.loads(b"".join(chunks))
+    except ValueError:
+        return None
+    if not isinstance(response, dict) or response.get("fallback"):
+        return None
+    return response
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) < 2:
+        return FALLBACK_EXIT_CODE
+    response = request(argv[0], argv[1:], cwd=os.getcwd(), env=dict(os.environ))
+    if response is None:
+        return FALLBACK_EXIT_CODE
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return int(response.get("returncode", 1))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
-import tomllib
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 from typing import Any, Mapping
 
+from .config_cache import CacheKey, CompiledConfigCache, cache_root
 from .errors import ConfigError
+from .scheduler import check_acyclic
 
 
 SUPPORTED_BRANCH_STRATEGIES = {"mirror-current-or-parent", "detach"}
+SUPPORTED_SEED_MODES = {"auto", "reflink", "hardlink", "copy"}
+
+# Long-lived processes (``codex-worktree serve``) reuse configs whose stat is unchanged.
+_memo: dict[str, tuple[CacheKey, AppConfig]] = {}
 
 
 @dataclass(frozen=True)
@@ -16,11 +21,19 @@ class GitConfig:
     hooks_path: str | None = None
 
 
+@dataclass(frozen=True)
+class CheckoutConfig:
+    sparse_checkout: list[str] = field(default_factory=list)
+    no_checkout: bool = False
+    skip_lfs_smudge: bool = False
+
+
 @dataclass(frozen=True)
 class WorktreeConfig:
     configured: bool = False
     default_root: str | None = None
     default_root_env: list[str] = field(default_factory=list)
+    checkout: CheckoutConfig = field(default_factory=CheckoutConfig)
 
 
 @dataclass(frozen=True)
@@ -30,6 +43,7 @@ class RepoConfig:
     linked_worktree_path: str | None = None
     branch_strategy: str = "detach"
     required: bool = False
+    checkout: CheckoutConfig = field(default_factory=CheckoutConfig)
 
 
 @dataclass(frozen=True)
@@ -43,6 +57,15 @@ class StepConfig:
     name: str
     cwd: str
     run: list[str]
+    depends_on: list[str] = field(default_factory=list)
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    path: str
+    mode: str = "auto"
 
 
 @dataclass(frozen=True)
@@ -53,10 +76,37 @@ class AppConfig:
     repos: dict[str, RepoConfig] = field(default_factory=dict)
     links: list[LinkConfig] = field(default_factory=list)
     steps: list[StepConfig] = field(default_factory=list)
+    seeds: list[SeedConfig] = field(default_factory=list)
+
+
+def parse_config(path: Path, *, use_cache: bool = True) -> AppConfig:
+    if not use_cache:
+        return _compile_config(path.read_bytes())
+
+    resolved = path.resolve()
+    stat = resolved.stat()
+    key = CacheKey(path=str(resolved), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    memoized = _memo.get(key.path)
+    if memoized is not None and memoized[0] == key:
+        return memoized[1]
+
+    cache = CompiledConfigCache(cache_root(), schema=_schema_fingerprint())
+    cached, content = cache.load(resolved, key, resolved.read_bytes)
+    if isinstance(cached, AppConfig):
+        config = cached
+    else:
+        if content is None:
+            content = resolved.read_bytes()
+        config = _compile_config(content)
+        cache.store(resolved, key, content, config)
+    _memo[key.path] = (key, config)
+    return config
 
 
-def parse_config(path: Path) -> AppConfig:
-    data = tomllib.loads(path.read_text(encoding="utf-8"))
+def _compile_config(content: bytes) -> AppConfig:
+    import tomllib
+
+    data = tomllib.loads(content.decode("utf-8"))
     worktree_data = data.get("worktree", {})
     config = AppConfig(
         version=_require_int(data, "version"),
@@ -65,6 +115,7 @@ def parse_config(path: Path) -> AppConfig:
         repos=_parse_repos(data.get("repos", {})),
         links=_parse_links(data.get("links", [])),
         steps=_parse_steps(data.get("steps", [])),
+        seeds=_parse_seeds(data.get("seed", [])),
     )
     validate_config(config)
     return config
@@ -85,9 +136,37 @@ def validate_config(config: AppConfig) -> None:
         if link.repo not in config.repos:
             raise ConfigError(f"links.path '{link.path}' references unknown repo '{link.repo}'")
 
+    step_names: set[str] = set()
     for step in config.steps:
         if not step.run:
             raise ConfigError(f"step '{step.name}' must define a non-empty run array")
+        if step.name in step_names:
+            raise ConfigError(f"duplicate step name '{step.name}'")
+        step_names.add(step.name)
+        if step.outputs and not step.inputs:
+            raise ConfigError(f"step '{step.name}' declares outputs without inputs")
+        for pattern in [*step.inputs, *step.outputs]:
+            pattern_path = Path(pattern)
+            if pattern_path.is_absolute() or ".." in pattern_path.parts:
+                raise ConfigError(f"step '{step.name}' glob '{pattern}' must stay inside the worktree")
+
+    for step in config.steps:
+        for dependency in step.depends_on:
+            if dependency not in step_names:
+                raise ConfigError(f"step '{step.name}' depends on unknown step '{dependency}'")
+            if dependency == step.name:
+                raise ConfigError(f"step '{step.name}' cannot depend on itself")
+    try:
+        check_acyclic({step.name: step.depends_on for step in config.steps})
+    except ValueError as error:
+        raise ConfigError(f"steps.depends_on: {error}") from None
+
+    for seed in config.seeds:
+        if seed.mode not in SUPPORTED_SEED_MODES:
+            raise ConfigError(f"seed '{seed.path}' mode must be one of {sorted(SUPPORTED_SEED_MODES)}")
+        seed_path = Path(seed.path)
+        if seed_path.is_absolute() or ".." in seed_path.parts:
+            raise ConfigError(f"seed path '{seed.path}' must stay inside the worktree")
 
 
 def resolve_worktree_root(
@@ -116,6 +195,13 @@ def resolve_worktree_root(
     return (root_dir.parent / ".worktrees" / repo_name).resolve()
 
 
+def _schema_fingerprint() -> str:
+    # Editing the parser or the dataclasses must invalidate previously compiled configs.
+    classes = (AppConfig, GitConfig, CheckoutConfig, WorktreeConfig, RepoConfig, LinkConfig, StepConfig, SeedConfig)
+    shapes = ";".join(f"{cls.__name__}({','.join(item.name for item in fields(cls))})" for cls in classes)
+    return f"{shapes};{Path(__file__).stat().st_mtime_ns}"
+
+
 def _parse_git_config(data: Any) -> GitConfig:
     _require_table(data, "git")
     hooks_path = data.get("hooks_path")
@@ -134,7 +220,19 @@ def _parse_worktree_config(data: Any, *, configured: bool) -> WorktreeConfig:
         configured=configured,
         default_root=default_root,
         default_root_env=default_root_env,
+        checkout=_parse_checkout_config(data, "worktree"),
+    )
+
+
+def _parse_checkout_config(data: Mapping[str, Any], label: str) -> CheckoutConfig:
+    checkout = CheckoutConfig(
+        sparse_checkout=_require_str_list(data.get("sparse_checkout", []), f"{label}.sparse_checkout"),
+        no_checkout=_optional_bool(data.get("no_checkout", False), f"{label}.no_checkout"),
+        skip_lfs_smudge=_optional_bool(data.get("skip_lfs_smudge", False), f"{label}.skip_lfs_smudge"),
     )
+    if checkout.no_checkout and checkout.sparse_checkout:
+        raise ConfigError(f"{label}.no_checkout cannot be combined with {label}.sparse_checkout")
+    return checkout
 
 
 def _parse_repos(data: Any) -> dict[str, RepoConfig]:
@@ -154,6 +252,7 @@ def _parse_repos(data: Any) -> dict[str, RepoConfig]:
             ),
             branch_strategy=branch_strategy,
             required=_optional_bool(repo_data.get("required", False), f"repos.{repo_key}.required"),
+            checkout=_parse_checkout_config(repo_data, f"repos.{repo_key}"),
         )
     return repos
 
@@ -184,11 +283,29 @@ def _parse_steps(data: Any) -> list[StepConfig]:
                 name=_require_str(item, "name", f"steps[{index}].name"),
                 cwd=_require_str(item, "cwd", f"steps[{index}].cwd"),
                 run=_require_str_list(item.get("run", []), f"steps[{index}].run"),
+                depends_on=_require_str_list(item.get("depends_on", []), f"steps[{index}].depends_on"),
+                inputs=_require_str_list(item.get("inputs", []), f"steps[{index}].inputs"),
+                outputs=_require_str_list(item.get("outputs", []), f"steps[{index}].outputs"),
             )
         )
     return steps
 
 
+def _parse_seeds(data: Any) -> list[SeedConfig]:
+    if not isinstance(data, list):
+        raise ConfigError("seed must be an array of tables")
+    seeds: list[SeedConfig] = []
+    for index, item in enumerate(data):
+        _require_table(item, f"seed[{index}]")
+        seeds.append(
+            SeedConfig(
+                path=_require_str(item, "path", f"seed[{index}].path"),
+                mode=_optional_str(item.get("mode"), f"seed[{index}].mode") or "auto",
+            )
+        )
+    return seeds
+
+
 def _require_int(data: Mapping[str, Any], key: str) -> int:
     value = data.get(key)
     if not isinstance(value, int):
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Mapping
+
+
+CACHE_FORMAT = 1
+CACHE_DIR_ENV = "CODEX_WORKTREE_CACHE_DIR"
+MAX_CONFIG_ENTRIES = 32
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    path: str
+    mtime_ns: int
+    size: int
+
+
+def cache_root(env: Mapping[str, str] | None = None) -> Path:
+    env = os.environ if env is None else env
+    override = env.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override).expanduser()
+    xdg_cache = env.get("XDG_CACHE_HOME")
+    base = Path(xdg_cache).expanduser() if xdg_cache else Path.home() / ".cache"
+    return base / "codex-worktree"
+
+
+class CompiledConfigCache:
+    def __init__(self, root: Path, *, schema: str) -> None:
+        self.root = root
+        self.schema = schema
+
+    def entry_path(self, config_path: Path) -> Path:
+        digest = hashlib.sha256(str(config_path).encode("utf-8")).hexdigest()
+        return self.root / "config" / f"{digest}.pickle"
+
+    def load(
+        self,
+        config_path: Path,
+        key: CacheKey,
+        read_bytes: Callable[[], bytes],
+    ) -> tuple[Any | None, bytes | None]:
+        entry = self._read_entry(config_path)
+        if entry is None:
+            return None, None
+        if entry["key"] == key:
+            return entry["value"], None
+        content = read_bytes()
+        if entry["sha256"] != hashlib.sha256(content).hexdigest():
+            return None, content
+        self.store(config_path, key, content, entry["value"])
+        return entry["value"], content
+
+    def store(self, config_path: Path, key: CacheKey, content: bytes, value: Any) -> None:
+        import tempfile
+
+        entry = {
+            "format": CACHE_FORMAT,
+            "schema": self.schema,
+            "key": key,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "value": value,
+        }
+        target = self.entry_path(config_path)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    pickle.dump(entry, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_name, target)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+            self._evict(target.parent)
+        except OSError:
+            # The cache is an optimization; an unwritable cache dir must not break commands.
+            return
+
+    def _evict(self, directory: Path) -> None:
+        # Entries are keyed by config path and never expire on their own, so only the most recently
+        # written ones are kept; a dropped entry just costs one re-parse.
+        entries: list[tuple[int, str]] = []
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(".pickle") and not entry.name.startswith("."):
+                    try:
+                        entries.append((entry.stat().st_mtime_ns, entry.path))
+                    except FileNotFoundError:
+                        continue
+        entries.sort(reverse=True)
+        for _, path in entries[MAX_CONFIG_ENTRIES:]:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _read_entry(self, config_path: Path) -> dict[str, Any] | None:
+        try:
+            with self.entry_path(config_path).open("rb") as handle:
+                entry = pickle.load(handle)
+        except Exception:
+            return None
+        if not isinstance(entry, dict):
+            return None
+        if entry.get("format") != CACHE_FORMAT or entry.get("schema") != self.schema:
+            return None
+        if not isinstance(entry.get("key"), CacheKey):
+            return None
+        return entry
@@ -1,18 +1,45 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Mapping
+from typing import TYPE_CHECKING, Any, Callable, Mapping
 
-from .config import AppConfig, WorktreeConfig, resolve_worktree_root
-from .errors import CodexWorktreeError
-from .git_ops import GitRunner, SubprocessGitRunner
+from .config import AppConfig, CheckoutConfig, SeedConfig, WorktreeConfig, resolve_worktree_root
+from .errors import CodexWorktreeError, GitCommandError
+from .git_ops import GitRunner, SubprocessGitRunner, add_worktree_with_checkout
+
+if TYPE_CHECKING:
+    from .seed_ops import SeedProgressCallback, SeedResult
+
+
+DEFAULT_CREATE_JOBS = 4
+POOL_DIR_NAME = ".pool"
+
+TargetBootstrapper = Callable[[Path], Any]
 
 
 @dataclass(frozen=True)
 class CreateWorktreeResult:
     path: Path
     plan: list[str]
+    seeds: list[SeedResult] = field(default_factory=list)
+    claimed: bool = False
+    bootstrapped: bool = False
+
+
+@dataclass(frozen=True)
+class BatchCreateResult:
+    name: str
+    path: Path
+    seconds: float
+    plan: list[str] = field(default_factory=list)
+    seeds: list[SeedResult] = field(default_factory=list)
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 
 def resolve_primary_worktree_root(
@@ -39,31 +66,162 @@ def create_primary_worktree(
     env: Mapping[str, str] | None,
     git: GitRunner | None = None,
     dry_run: bool = False,
+    seed_progress: SeedProgressCallback | None = None,
+    use_pool: bool = True,
 ) -> CreateWorktreeResult:
     git = git or SubprocessGitRunner()
+    base_root = _resolve_base_root(root_dir=root_dir, config=config, worktree_root=worktree_root, env=env)
+    if use_pool and not dry_run and (base_root / POOL_DIR_NAME).is_dir():
+        from .pool import claim_spare, pool_dir, request_refill
+
+        claimed = claim_spare(root_dir=root_dir, base_root=base_root, name=name, config=config, git=git)
+        if claimed is not None:
+            request_refill(pool_dir(base_root), env or {})
+            return CreateWorktreeResult(
+                path=claimed.path,
+                plan=claimed.plan,
+                claimed=True,
+                bootstrapped=claimed.bootstrapped,
+            )
+    return _create_in_root(
+        root_dir=root_dir,
+        base_root=base_root,
+        name=name,
+        checkout=config.worktree.checkout,
+        seeds=config.seeds,
+        git=git,
+        dry_run=dry_run,
+        seed_progress=seed_progress,
+    )
+
+
+def create_primary_worktrees(
+    *,
+    root_dir: Path,
+    names: list[str],
+    config: AppConfig,
+    worktree_root: Path | None,
+    env: Mapping[str, str] | None,
+    git: GitRunner | None = None,
+    dry_run: bool = False,
+    jobs: int = DEFAULT_CREATE_JOBS,
+    bootstrap: TargetBootstrapper | None = None,
+    seed_progress: SeedProgressCallback | None = None,
+) -> list[BatchCreateResult]:
+    git = git or SubprocessGitRunner()
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise CodexWorktreeError(f"duplicate worktree names: {', '.join(duplicates)}")
+    base_root = _resolve_base_root(root_dir=root_dir, config=config, worktree_root=worktree_root, env=env)
+
+    def create_one(name: str) -> BatchCreateResult:
+        started = time.perf_counter()
+        target_path = (base_root / name).resolve()
+        try:
+            result = _create_in_root(
+                root_dir=root_dir,
+                base_root=base_root,
+                name=name,
+                checkout=config.worktree.checkout,
+                seeds=config.seeds,
+                git=git,
+                dry_run=dry_run,
+                seed_progress=seed_progress,
+            )
+            plan = list(result.plan)
+            if bootstrap is not None:
+                if dry_run:
+                    plan.append(f"bootstrap {result.path}")
+                else:
+                    bootstrap(result.path)
+        except (CodexWorktreeError, OSError) as error:
+            # OSError covers seeding failures such as ENOSPC or EACCES; they fail only this worktree.
+            message = error.stderr.strip() if isinstance(error, GitCommandError) else ""
+            return BatchCreateResult(
+                name=name,
+                path=target_path,
+                seconds=time.perf_counter() - started,
+                error=message or str(error),
+            )
+        return BatchCreateResult(
+            name=name,
+            path=result.path,
+            seconds=time.perf_counter() - started,
+            plan=plan,
+            seeds=result.seeds,
+        )
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        return list(executor.map(create_one, names))
+
+
+def _resolve_base_root(
+    *,
+    root_dir: Path,
+    config: AppConfig,
+    worktree_root: Path | None,
+    env: Mapping[str, str] | None,
+) -> Path:
     if not config.worktree.configured:
         raise CodexWorktreeError(
             "create-worktree requires a [worktree] section in the config; "
             "without it, primary worktree management is treated as external"
         )
-    base_root = resolve_primary_worktree_root(
+    return resolve_primary_worktree_root(
         root_dir=root_dir,
         repo_name=root_dir.name,
         worktree_config=config.worktree,
         cli_override=worktree_root,
         env=env,
     )
+
+
+def _create_in_root(
+    *,
+    root_dir: Path,
+    base_root: Path,
+    name: str,
+    checkout: CheckoutConfig,
+    seeds: list[SeedConfig],
+    git: GitRunner,
+    dry_run: bool,
+    seed_progress: SeedProgressCallback | None = None,
+    detach: bool = False,
+) -> CreateWorktreeResult:
     target_path = (base_root / name).resolve()
     if target_path.exists():
         raise CodexWorktreeError(f"worktree path already exists: {target_path}")
 
-    result = git.add_worktree(
+    results = add_worktree_with_checkout(
+        git,
         root_dir,
         target_path,
-        branch=name,
-        create_branch=True,
+        branch=None if detach else name,
+        create_branch=not detach,
+        detach=detach,
         start_point="HEAD",
         dry_run=dry_run,
+        sparse_checkout=checkout.sparse_checkout,
+        no_checkout=checkout.no_checkout,
+        skip_lfs_smudge=checkout.skip_lfs_smudge,
     )
-    plan = [" ".join(result.args)]
-    return CreateWorktreeResult(path=target_path, plan=plan)
+    plan = [" ".join(result.args) for result in results]
+    if not seeds:
+        return CreateWorktreeResult(path=target_path, plan=plan)
+
+    from .seed_ops import seed_directory
+
+    seeded = [
+        seed_directory(
+            source=root_dir / seed.path,
+            target=target_path / seed.path,
+            mode=seed.mode,
+            dry_run=dry_run,
+            progress=seed_progress,
+        )
+        for seed in seeds
+    ]
+    plan.extend(result.rendered for result in seeded)
+    return CreateWorktreeResult(path=target_path, plan=plan, seeds=seeded)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Any, Iterator, Mapping
+
+from .cli import main
+from .config_cache import cache_root
+from .errors import CodexWorktreeError
+
+
+SOCKET_ENV = "CODEX_WORKTREE_SOCKET"
+SOCKET_NAME = "daemon.sock"
+MAX_REQUEST_BYTES = 1 << 20
+
+
+def default_socket_path(env: Mapping[str, str] | None = None) -> Path:
+    env = os.environ if env is None else env
+    override = env.get(SOCKET_ENV)
+    if override:
+        return Path(override).expanduser()
+    return cache_root(env) / SOCKET_NAME
+
+
+def is_servable(argv: list[str]) -> bool:
+    # Only side-effect-free commands are served; everything else runs in the caller's process.
+    if not argv:
+        return False
+    command = argv[0]
+    if command in {"resolve-repo", "validate-config"}:
+        return True
+    return command == "bootstrap" and "--dry-run" in argv[1:]
+
+
+def handle_request(request: Mapping[str, Any]) -> dict[str, Any]:
+    argv = request.get("argv")
+    cwd = request.get("cwd")
+    env = request.get("env")
+    if (
+        not isinstance(argv, list)
+        or not all(isinstance(item, str) for item in argv)
+        or not isinstance(cwd, str)
+        or not isinstance(env, dict)
+        or not is_servable(argv)
+    ):
+        return {"fallback": True}
+
+    env = {str(key): str(value) for key, value in env.items()}
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with _environment(env), redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                returncode = main(argv, env=env)
+            except SystemExit as exit_request:
+                returncode = _exit_code(exit_request.code)
+    except OSError as error:
+        return {"returncode": 1, "stdout": "", "stderr": f"{error}\n"}
+    finally:
+        os.chdir(previous_cwd)
+    return {"returncode": returncode, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+@contextmanager
+def _environment(env: Mapping[str, str]) -> Iterator[None]:
+    # Code below main() also reads os.environ (HOME for `~`, XDG_CACHE_HOME, git's own variables),
+    # so the caller's environment replaces the daemon's for the duration of the request.
+    previous = dict(os.environ)
+    os.environ.clear()
+    os.environ.update(env)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(previous)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+        except ValueError:
+            response: dict[str, Any] = {"fallback": True}
+        else:
+            response = handle_request(request) if isinstance(request, dict) else {"fallback": True}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+def create_server(socket_path: Path) -> socketserver.UnixStreamServer:
+    socket_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+    if socket_path.exists():
+        if _is_listening(socket_path):
+            raise CodexWorktreeError(f"codex-worktree daemon is already listening on {socket_path}")
+        socket_path.unlink()
+
+    # Requests chdir and swap stdout and os.environ, so a non-threading server handles them one at a time.
+    previous_umask = os.umask(0o177)
+    try:
+        return socketserver.UnixStreamServer(str(socket_path), _RequestHandler)
+    finally:
+        os.umask(previous_umask)
+
+
+def serve(socket_path: Path) -> None:
+    server = create_server(socket_path)
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            socket_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _is_listening(socket_path: Path) -> bool:
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(socket_path))
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def _exit_code(code: object) -> int:
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    return 1
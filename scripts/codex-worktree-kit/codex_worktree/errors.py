@@ -17,6 +17,14 @@ class SymlinkConflictError(CodexWorktreeError):
     """Raised when a symlink target collides with a non-symlink path."""
 
 
+class SeedError(CodexWorktreeError):
+    """Raised when a seed directory cannot be copied into a new worktree."""
+
+
+class RefReadError(CodexWorktreeError):
+    """Raised when git refs cannot be read without invoking git."""
+
+
 class GitCommandError(CodexWorktreeError):
     """Raised when a git command fails."""
 
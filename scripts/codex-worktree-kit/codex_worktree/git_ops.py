@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import os
 import subprocess
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable
 
-from .errors import GitCommandError
+from .errors import GitCommandError, RefReadError
+from .ref_reader import RefStore
+from .ref_reader import is_valid_branch_name as _is_valid_branch_name_natively
+from .remote_refs import DEFAULT_REMOTE_REFS_TTL, RemoteRefIndex
+from .tracing import run_process, span
+
+
+LOCK_RETRIES = 6
+LOCK_RETRY_DELAY = 0.05
+LOCK_CONTENTION_MARKERS = (".lock': File exists", "could not lock", "cannot lock ref", "/commondir")
 
 
 @dataclass(frozen=True)
@@ -38,12 +51,42 @@ class GitRunner:
         detach: bool = False,
         start_point: str | None = None,
         dry_run: bool = False,
+        no_checkout: bool = False,
+    ) -> GitResult:
+        raise NotImplementedError
+
+    def remove_worktree(self, repo: Path, path: Path, *, force: bool = False, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
+    def move_worktree(self, repo: Path, source: Path, target: Path, *, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
+    def repair_worktree(self, worktree: Path, *, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
+    def switch_branch(
+        self,
+        worktree: Path,
+        branch: str,
+        *,
+        create_branch: bool = False,
+        start_point: str | None = None,
+        dry_run: bool = False,
     ) -> GitResult:
         raise NotImplementedError
 
+    def prune_worktrees(self, repo: Path, *, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
     def set_hooks_path(self, repo: Path, hooks_path: str, *, dry_run: bool = False) -> GitResult:
         raise NotImplementedError
 
+    def set_sparse_checkout(self, worktree: Path, patterns: list[str], *, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
+    def checkout_worktree(self, worktree: Path, *, skip_lfs_smudge: bool = False, dry_run: bool = False) -> GitResult:
+        raise NotImplementedError
+
 
 class SubprocessGitRunner(GitRunner):
     def current_branch(self, repo: Path) -> str | None:
@@ -52,7 +95,7 @@ class SubprocessGitRunner(GitRunner):
         return branch or None
 
     def is_valid_branch_name(self, name: str) -> bool:
-        completed = subprocess.run(
+        completed = run_process(
             ["git", "check-ref-format", "--branch", name],
             check=False,
             capture_output=True,
@@ -61,7 +104,7 @@ class SubprocessGitRunner(GitRunner):
         return completed.returncode == 0
 
     def branch_exists(self, repo: Path, branch: str) -> bool:
-        completed = subprocess.run(
+        completed = run_process(
             ["git", "-C", str(repo), "show-ref", "--verify", "--quiet", f"refs/heads/{branch}"],
             check=False,
             capture_output=True,
@@ -70,7 +113,7 @@ class SubprocessGitRunner(GitRunner):
         return completed.returncode == 0
 
     def remote_branch_exists(self, repo: Path, branch: str) -> bool:
-        completed = subprocess.run(
+        completed = run_process(
             ["git", "-C", str(repo), "ls-remote", "--exit-code", "--heads", "origin", branch],
             check=False,
             capture_output=True,
@@ -88,8 +131,11 @@ class SubprocessGitRunner(GitRunner):
         detach: bool = False,
         start_point: str | None = None,
         dry_run: bool = False,
+        no_checkout: bool = False,
     ) -> GitResult:
         args = ["git", "-C", str(repo), "worktree", "add"]
+        if no_checkout:
+            args.append("--no-checkout")
         if detach:
             args.append("--detach")
         if create_branch and branch:
@@ -101,14 +147,70 @@ class SubprocessGitRunner(GitRunner):
             return GitResult(args=args, returncode=0, stdout="", stderr="")
         return self._run(args)
 
+    def remove_worktree(self, repo: Path, path: Path, *, force: bool = False, dry_run: bool = False) -> GitResult:
+        # Without --force git refuses to drop a worktree with local changes, which is what we want.
+        args = ["git", "-C", str(repo), "worktree", "remove", *(["--force"] if force else []), str(path)]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
+    def move_worktree(self, repo: Path, source: Path, target: Path, *, dry_run: bool = False) -> GitResult:
+        args = ["git", "-C", str(repo), "worktree", "move", str(source), str(target)]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
+    def repair_worktree(self, worktree: Path, *, dry_run: bool = False) -> GitResult:
+        args = ["git", "-C", str(worktree), "worktree", "repair"]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
+    def switch_branch(
+        self,
+        worktree: Path,
+        branch: str,
+        *,
+        create_branch: bool = False,
+        start_point: str | None = None,
+        dry_run: bool = False,
+    ) -> GitResult:
+        args = ["git", "-C", str(worktree), "switch", "--quiet"]
+        args.extend(["-c", branch] if create_branch else [branch])
+        if create_branch and start_point:
+            args.append(start_point)
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
+    def prune_worktrees(self, repo: Path, *, dry_run: bool = False) -> GitResult:
+        args = ["git", "-C", str(repo), "worktree", "prune"]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
     def set_hooks_path(self, repo: Path, hooks_path: str, *, dry_run: bool = False) -> GitResult:
         args = ["git", "-C", str(repo), "config", "core.hooksPath", hooks_path]
         if dry_run:
             return GitResult(args=args, returncode=0, stdout="", stderr="")
         return self._run(args)
 
-    def _run(self, args: list[str]) -> GitResult:
-        completed = subprocess.run(args, check=False, capture_output=True, text=True)
+    def set_sparse_checkout(self, worktree: Path, patterns: list[str], *, dry_run: bool = False) -> GitResult:
+        args = ["git", "-C", str(worktree), "sparse-checkout", "set", "--cone", *patterns]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        return self._run(args)
+
+    def checkout_worktree(self, worktree: Path, *, skip_lfs_smudge: bool = False, dry_run: bool = False) -> GitResult:
+        # read-tree -mu populates a --no-checkout worktree while honoring its sparse patterns.
+        args = ["git", "-C", str(worktree), "read-tree", "-mu", "HEAD"]
+        if dry_run:
+            return GitResult(args=args, returncode=0, stdout="", stderr="")
+        env = {**os.environ, "GIT_LFS_SKIP_SMUDGE": "1"} if skip_lfs_smudge else None
+        return self._run(args, env=env)
+
+    def _run(self, args: list[str], *, env: dict[str, str] | None = None) -> GitResult:
+        completed = run_process(args, check=False, capture_output=True, text=True, env=env)
         result = GitResult(
             args=args,
             returncode=completed.returncode,
@@ -118,3 +220,311 @@ class SubprocessGitRunner(GitRunner):
         if completed.returncode != 0:
             raise GitCommandError(args=args, returncode=completed.returncode, stderr=completed.stderr)
         return result
+
+
+def add_worktree_with_checkout(
+    git: GitRunner,
+    repo: Path,
+    path: Path,
+    *,
+    branch: str | None = None,
+    create_branch: bool = False,
+    detach: bool = False,
+    start_point: str | None = None,
+    dry_run: bool = False,
+    sparse_checkout: list[str] | None = None,
+    no_checkout: bool = False,
+    skip_lfs_smudge: bool = False,
+) -> list[GitResult]:
+    worktree_kwargs = {
+        "branch": branch,
+        "create_branch": create_branch,
+        "detach": detach,
+        "start_point": start_point,
+        "dry_run": dry_run,
+    }
+
+    def left_nothing_behind() -> bool:
+        # `worktree add` is only retried when the failed attempt created neither the path nor the branch.
+        if path.exists():
+            return False
+        return not (create_branch and branch and git.branch_exists(repo, branch))
+
+    def add(**extra: bool) -> GitResult:
+        return retry_on_lock_contention(
+            lambda: git.add_worktree(repo, path, **extra, **worktree_kwargs),
+            can_retry=left_nothing_behind,
+        )
+
+    if not (sparse_checkout or no_checkout or skip_lfs_smudge):
+        return [add()]
+
+    results = [add(no_checkout=True)]
+    if no_checkout:
+        return results
+    if sparse_checkout:
+        results.append(
+            retry_on_lock_contention(lambda: git.set_sparse_checkout(path, sparse_checkout, dry_run=dry_run))
+        )
+    results.append(
+        retry_on_lock_contention(
+            lambda: git.checkout_worktree(path, skip_lfs_smudge=skip_lfs_smudge, dry_run=dry_run)
+        )
+    )
+    return results
+
+
+def retry_on_lock_contention(
+    call: Callable[[], GitResult],
+    *,
+    can_retry: Callable[[], bool] | None = None,
+) -> GitResult:
+    # Concurrent worktree operations race on index, config and ref locks in the shared git dir, and
+    # `worktree add` can read a sibling's admin dir under .git/worktrees before its commondir exists.
+    # Non-idempotent calls pass can_retry so a half-applied attempt is reported, not retried.
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return call()
+        except GitCommandError as error:
+            if not any(marker in error.stderr for marker in LOCK_CONTENTION_MARKERS):
+                raise
+            if can_retry is not None and not can_retry():
+                raise
+        time.sleep(LOCK_RETRY_DELAY * 2**attempt)
+    return call()
+
+
+@dataclass(frozen=True)
+class RefSnapshot:
+    current_branch: str | None
+    refs: frozenset[str]
+
+
+class CatFileSession:
+    def __init__(self, repo: Path) -> None:
+        self.repo = repo
+        self._lock = threading.Lock()
+        self._process: subprocess.Popen[str] | None = None
+
+    def resolve(self, rev: str) -> str | None:
+        if "\n" in rev:
+            return None
+        with self._lock, span("git cat-file", "git", argv=self._args(), cwd=str(self.repo), rev=rev):
+            process = self._ensure_process()
+            assert process.stdin is not None and process.stdout is not None
+            try:
+                process.stdin.write(f"{rev}\n")
+                process.stdin.flush()
+                line = process.stdout.readline()
+            except (BrokenPipeError, OSError) as error:
+                self._discard()
+                raise GitCommandError(args=self._args(), returncode=1, stderr=str(error)) from error
+            if not line:
+                self._discard()
+                raise GitCommandError(args=self._args(), returncode=1, stderr="git cat-file session exited")
+        fields = line.split()
+        if len(fields) != 3:
+            return None
+        return fields[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._discard()
+
+    def _args(self) -> list[str]:
+        return ["git", "-C", str(self.repo), "cat-file", "--batch-check"]
+
+    def _ensure_process(self) -> subprocess.Popen[str]:
+        if self._process is None:
+            self._process = subprocess.Popen(
+                self._args(),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+        return self._process
+
+    def _discard(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        for stream in (process.stdin, process.stdout):
+            if stream is not None:
+                stream.close()
+        process.wait()
+
+
+class BatchGitRunner(SubprocessGitRunner):
+    def __init__(
+        self,
+        *,
+        refresh_remote_refs: bool = False,
+        remote_refs_ttl: float | None = DEFAULT_REMOTE_REFS_TTL,
+    ) -> None:
+        self.refresh_remote_refs = refresh_remote_refs
+        self.remote_refs_ttl = remote_refs_ttl
+        self._lock = threading.Lock()
+        self._sessions: dict[Path, CatFileSession] = {}
+        self._snapshots: dict[Path, RefSnapshot] = {}
+        self._valid_names: dict[str, bool] = {}
+        self._common_dirs: dict[Path, Path] = {}
+        self._remote_indexes: dict[Path, RemoteRefIndex] = {}
+        self._refreshed: set[Path] = set()
+
+    def __enter__(self) -> BatchGitRunner:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def current_branch(self, repo: Path) -> str | None:
+        snapshot = self.ref_snapshot(repo)
+        if snapshot.current_branch is not None:
+            return snapshot.current_branch
+        # Detached and unborn HEADs look the same in for-each-ref output.
+        return super().current_branch(repo)
+
+    def is_valid_branch_name(self, name: str) -> bool:
+        with self._lock:
+            cached = self._valid_names.get(name)
+        if cached is not None:
+            return cached
+        valid = super().is_valid_branch_name(name)
+        with self._lock:
+            self._valid_names[name] = valid
+        return valid
+
+    def branch_exists(self, repo: Path, branch: str) -> bool:
+        try:
+            return self.session(repo).resolve(f"refs/heads/{branch}") is not None
+        except GitCommandError:
+            return super().branch_exists(repo, branch)
+
+    def remote_branch_exists(self, repo: Path, branch: str) -> bool:
+        index = self.remote_ref_index(repo)
+        if self.refresh_remote_refs:
+            with self._lock:
+                needs_refresh = index.common_dir not in self._refreshed
+                self._refreshed.add(index.common_dir)
+            if needs_refresh:
+                index.refresh(repo)
+        return index.has_branch(branch)
+
+    def add_worktree(
+        self,
+        repo: Path,
+        path: Path,
+        *,
+        branch: str | None = None,
+        create_branch: bool = False,
+        detach: bool = False,
+        start_point: str | None = None,
+        dry_run: bool = False,
+        no_checkout: bool = False,
+    ) -> GitResult:
+        result = super().add_worktree(
+            repo,
+            path,
+            branch=branch,
+            create_branch=create_branch,
+            detach=detach,
+            start_point=start_point,
+            dry_run=dry_run,
+            no_checkout=no_checkout,
+        )
+        if not dry_run:
+            self.invalidate(repo)
+        return result
+
+    def session(self, repo: Path) -> CatFileSession:
+        key = repo.resolve()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = CatFileSession(key)
+            return session
+
+    def ref_snapshot(self, repo: Path) -> RefSnapshot:
+        key = repo.resolve()
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+        result = self._run(
+            ["git", "-C", str(key), "for-each-ref", "--format=%(HEAD) %(refname)", "refs/heads", "refs/remotes"]
+        )
+        current = None
+        refs: set[str] = set()
+        for line in result.stdout.splitlines():
+            # %(HEAD) renders as "*" for the checked-out branch and " " otherwise.
+            marker, refname = line[:1], line[2:]
+            refs.add(refname)
+            if marker == "*" and refname.startswith("refs/heads/"):
+                current = refname.removeprefix("refs/heads/")
+        snapshot = RefSnapshot(current_branch=current, refs=frozenset(refs))
+        with self._lock:
+            self._snapshots[key] = snapshot
+        return snapshot
+
+    def git_common_dir(self, repo: Path) -> Path:
+        key = repo.resolve()
+        with self._lock:
+            common_dir = self._common_dirs.get(key)
+        if common_dir is not None:
+            return common_dir
+        result = self._run(["git", "-C", str(key), "rev-parse", "--git-common-dir"])
+        common_dir = Path(result.stdout.strip())
+        if not common_dir.is_absolute():
+            common_dir = key / common_dir
+        common_dir = common_dir.resolve()
+        with self._lock:
+            self._common_dirs[key] = common_dir
+        return common_dir
+
+    def remote_ref_index(self, repo: Path) -> RemoteRefIndex:
+        common_dir = self.git_common_dir(repo)
+        with self._lock:
+            index = self._remote_indexes.get(common_dir)
+            if index is None:
+                index = self._remote_indexes[common_dir] = RemoteRefIndex(common_dir, ttl=self.remote_refs_ttl)
+            return index
+
+    def invalidate(self, repo: Path) -> None:
+        with self._lock:
+            self._snapshots.pop(repo.resolve(), None)
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._snapshots.clear()
+            self._remote_indexes.clear()
+        for session in sessions:
+            session.close()
+
+
+class NativeGitRunner(BatchGitRunner):
+    def current_branch(self, repo: Path) -> str | None:
+        try:
+            return RefStore.discover(repo).current_branch()
+        except RefReadError:
+            return super().current_branch(repo)
+
+    def is_valid_branch_name(self, name: str) -> bool:
+        try:
+            return _is_valid_branch_name_natively(name)
+        except RefReadError:
+            return super().is_valid_branch_name(name)
+
+    def branch_exists(self, repo: Path, branch: str) -> bool:
+        try:
+            return RefStore.discover(repo).ref_exists(f"refs/heads/{branch}")
+        except RefReadError:
+            return super().branch_exists(repo, branch)
+
+    def git_common_dir(self, repo: Path) -> Path:
+        try:
+            return RefStore.discover(repo).common_dir
+        except RefReadError:
+            return super().git_common_dir(repo)
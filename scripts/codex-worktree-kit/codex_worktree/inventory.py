@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import os
+import stat
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .bootstrap_state import bootstrap_state_path, load_bootstrap_state
+from .create_worktree import POOL_DIR_NAME
+from .errors import GitCommandError
+from .git_ops import GitRunner
+from .tracing import run_process
+
+
+DEFAULT_SCAN_JOBS = 8
+DAY_SECONDS = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class WorktreeRecord:
+    path: Path
+    head: str | None = None
+    branch: str | None = None
+    bare: bool = False
+    detached: bool = False
+    locked: bool = False
+    prunable: bool = False
+    is_main: bool = False
+
+
+@dataclass(frozen=True)
+class WorktreeUsage:
+    size_bytes: int
+    files: int
+    mtime: float
+
+
+@dataclass(frozen=True)
+class WorktreeInfo:
+    record: WorktreeRecord
+    usage: WorktreeUsage | None
+    merged: bool | None
+
+    @property
+    def path(self) -> Path:
+        return self.record.path
+
+
+@dataclass(frozen=True)
+class Inventory:
+    repo: Path
+    base: str | None
+    worktrees: list[WorktreeInfo] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class GcPolicy:
+    max_age_days: float = 30.0
+    min_age_days: float = 1.0
+    max_total_bytes: int | None = None
+
+
+@dataclass(frozen=True)
+class GcCandidate:
+    info: WorktreeInfo
+    reason: str
+
+
+@dataclass(frozen=True)
+class GcOutcome:
+    path: Path
+    reason: str
+    plan: list[str] = field(default_factory=list)
+    error: str | None = None
+
+
+def collect_inventory(*, repo: Path, base: str | None = None, jobs: int = DEFAULT_SCAN_JOBS) -> Inventory:
+    records = parse_worktree_porcelain(_git(repo, "worktree", "list", "--porcelain"))
+    base = base or _default_base(repo, records)
+    merged = _merged_branches(repo, base) if base else None
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        usages = list(executor.map(_scan_if_present, records))
+    worktrees = [
+        WorktreeInfo(
+            record=record,
+            usage=usage,
+            merged=None if merged is None or record.branch is None else record.branch in merged,
+        )
+        for record, usage in zip(records, usages)
+        if not record.bare
+    ]
+    return Inventory(repo=repo, base=base, worktrees=worktrees)
+
+
+def parse_worktree_porcelain(text: str) -> list[WorktreeRecord]:
+    records: list[WorktreeRecord] = []
+    fields: dict[str, str] = {}
+
+    def flush() -> None:
+        if "worktree" in fields:
+            branch = fields.get("branch")
+            records.append(
+                WorktreeRecord(
+                    path=Path(fields["worktree"]),
+                    head=fields.get("HEAD"),
+                    branch=branch.removeprefix("refs/heads/") if branch else None,
+                    bare="bare" in fields,
+                    detached="detached" in fields,
+                    locked="locked" in fields,
+                    prunable="prunable" in fields,
+                    is_main=not records,
+                )
+            )
+        fields.clear()
+
+    for line in text.splitlines():
+        if not line:
+            flush()
+            continue
+        key, _, value = line.partition(" ")
+        fields[key] = value
+    flush()
+    return records
+
+
+def scan_usage(root: Path) -> WorktreeUsage:
+    # os.scandir hands back cached d_type and a single lstat per entry; symlinks are never followed.
+    size_bytes = 0
+    files = 0
+    latest = root.lstat().st_mtime
+    seen_inodes: set[tuple[int, int]] = set()
+    stack = [str(root)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    info = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                latest = max(latest, info.st_mtime)
+                if stat.S_ISDIR(info.st_mode):
+                    stack.append(entry.path)
+                    continue
+                if info.st_nlink > 1:
+                    inode = (info.st_dev, info.st_ino)
+                    if inode in seen_inodes:
+                        continue
+                    seen_inodes.add(inode)
+                files += 1
+                size_bytes += getattr(info, "st_blocks", 0) * 512 or info.st_size
+    return WorktreeUsage(size_bytes=size_bytes, files=files, mtime=latest)
+
+
+def plan_gc(
+    inventory: Inventory,
+    policy: GcPolicy,
+    *,
+    worktree_root: Path | None = None,
+    protected: set[Path] | None = None,
+    now: float | None = None,
+) -> list[GcCandidate]:
+    now = time.time() if now is None else now
+    protected = {path.resolve() for path in (protected or set())}
+    candidates: list[GcCandidate] = []
+    keep: list[WorktreeInfo] = []
+    for info in inventory.worktrees:
+        record = info.record
+        if record.is_main or record.locked or _is_protected(record.path, protected):
+            continue
+        if record.path.parent.name == POOL_DIR_NAME:
+            # Pool spares are managed by `pool fill` / `pool drain`.
+            continue
+        if worktree_root is not None and not _is_within(record.path, worktree_root):
+            continue
+        if record.prunable or info.usage is None:
+            candidates.append(GcCandidate(info=info, reason="missing"))
+            continue
+        age_days = (now - info.usage.mtime) / DAY_SECONDS
+        if age_days >= policy.max_age_days:
+            candidates.append(GcCandidate(info=info, reason=f"stale {age_days:.0f}d"))
+        elif info.merged and age_days >= policy.min_age_days:
+            candidates.append(GcCandidate(info=info, reason=f"merged into {inventory.base}"))
+        else:
+            keep.append(info)
+
+    if policy.max_total_bytes is not None:
+        total = sum(info.usage.size_bytes for info in keep if info.usage is not None)
+        for info in sorted(keep, key=lambda item: item.usage.mtime if item.usage else 0):
+            if total <= policy.max_total_bytes:
+                break
+            age_days = (now - info.usage.mtime) / DAY_SECONDS if info.usage else 0
+            if age_days < policy.min_age_days:
+                continue
+            candidates.append(GcCandidate(info=info, reason="over size budget"))
+            total -= info.usage.size_bytes if info.usage else 0
+    return candidates
+
+
+def run_gc(
+    *,
+    repo: Path,
+    candidates: list[GcCandidate],
+    git: GitRunner,
+    dry_run: bool,
+) -> list[GcOutcome]:
+    outcomes: list[GcOutcome] = []
+    for candidate in candidates:
+        path = candidate.info.path
+        plan: list[str] = []
+        try:
+            if candidate.reason != "missing":
+                # Linked-repo worktrees recorded by bootstrap go first; the consumer's git dir holds the state.
+                plan.extend(remove_linked_worktrees(path, git=git, dry_run=dry_run))
+                plan.append(" ".join(git.remove_worktree(repo, path, dry_run=dry_run).args))
+        except GitCommandError as error:
+            outcomes.append(
+                GcOutcome(path=path, reason=candidate.reason, plan=plan, error=error.stderr.strip() or str(error))
+            )
+            continue
+        outcomes.append(GcOutcome(path=path, reason=candidate.reason, plan=plan))
+
+    # Admin entries of removed or vanished worktrees are dropped in a single prune.
+    prune = git.prune_worktrees(repo, dry_run=dry_run)
+    outcomes.append(GcOutcome(path=repo, reason="prune", plan=[" ".join(prune.args)]))
+    return outcomes
+
+
+def remove_linked_worktrees(worktree: Path, *, git: GitRunner, force: bool = False, dry_run: bool) -> list[str]:
+    state_path = bootstrap_state_path(worktree)
+    state = load_bootstrap_state(state_path) if state_path is not None else None
+    if state is None:
+        return []
+    lines: list[str] = []
+    for repo_key, linked in sorted(state.worktrees.items()):
+        linked_repo = state.repos.get(repo_key)
+        if linked_repo is None or not Path(linked).exists():
+            continue
+        if not _is_within(Path(linked), worktree):
+            # A linked worktree outside the consumer (e.g. "../docs") is shared with its siblings.
+            continue
+        result = git.remove_worktree(Path(linked_repo), Path(linked), force=force, dry_run=dry_run)
+        lines.append(" ".join(result.args))
+    return lines
+
+
+def _scan_if_present(record: WorktreeRecord) -> WorktreeUsage | None:
+    if record.bare or not record.path.is_dir():
+        return None
+    return scan_usage(record.path)
+
+
+def _default_base(repo: Path, records: list[WorktreeRecord]) -> str | None:
+    completed = run_process(
+        ["git", "-C", str(repo), "symbolic-ref", "--quiet", "--short", "refs/remotes/origin/HEAD"],
+        check=False,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode == 0 and completed.stdout.strip():
+        return completed.stdout.strip()
+    main = next((record for record in records if record.is_main), None)
+    return main.branch if main is not None else None
+
+
+def _merged_branches(repo: Path, base: str) -> set[str]:
+    output = _git(repo, "for-each-ref", "--merged", base, "--format=%(refname:short)", "refs/heads/")
+    return {line.strip() for line in output.splitlines() if line.strip()} - {base}
+
+
+def _is_within(path: Path, root: Path) -> bool:
+    resolved = path.resolve()
+    root = root.resolve()
+    return resolved == root or root in resolved.parents
+
+
+def _is_protected(path: Path, protected: set[Path]) -> bool:
+    resolved = path.resolve()
+    return any(resolved == item or resolved in item.parents for item in protected)
+
+
+def _git(repo: Path, *args: str) -> str:
+    command = ["git", "-C", str(repo), *args]
+    completed = run_process(command, check=False, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise GitCommandError(args=command, returncode=completed.returncode, stderr=completed.stderr)
+    return completed.stdout
+
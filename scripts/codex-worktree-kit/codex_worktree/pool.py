@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import secrets
+import sys
+import tempfile
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Iterator, Mapping
+
+from .bootstrap_state import BootstrapState, bootstrap_state_path, load_bootstrap_state, store_bootstrap_state
+from .branching import plan_linked_worktree_branch
+from .config import AppConfig
+from .create_worktree import POOL_DIR_NAME, TargetBootstrapper, _create_in_root
+from .errors import CodexWorktreeError, GitCommandError, RefReadError
+from .git_ops import GitRunner
+from .inventory import remove_linked_worktrees
+from .ref_reader import RefStore, find_git_dir
+from .remote_refs import CACHE_DIR_NAME
+from .symlink_ops import SymlinkReconciler
+from .tracing import run_process
+
+
+POOL_SETTINGS_FILE = "pool.json"
+POOL_LOG_FILE = "fill.log"
+SPARE_PREFIX = "spare-"
+SPARE_MARKER_FILE = "pool-spare.json"
+NO_REFILL_ENV = "CODEX_WORKTREE_POOL_NO_REFILL"
+KIT_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    size: int
+    root_dir: str
+    config: str
+    worktree_root: str | None = None
+
+
+@dataclass(frozen=True)
+class Spare:
+    path: Path
+    head: str
+    bootstrapped: bool = True
+
+
+@dataclass(frozen=True)
+class ClaimResult:
+    path: Path
+    spare: Path
+    plan: list[str]
+    bootstrapped: bool = True
+
+
+def pool_dir(base_root: Path) -> Path:
+    return base_root / POOL_DIR_NAME
+
+
+def read_pool_settings(pool: Path) -> PoolSettings | None:
+    try:
+        data = json.loads((pool / POOL_SETTINGS_FILE).read_text(encoding="utf-8"))
+        return PoolSettings(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def store_pool_settings(pool: Path, settings: PoolSettings) -> None:
+    _write_json(pool / POOL_SETTINGS_FILE, asdict(settings))
+
+
+def ready_spares(pool: Path) -> list[Spare]:
+    # A spare only counts once its marker exists, i.e. after checkout, seeds and bootstrap all finished.
+    spares: list[Spare] = []
+    for path in _spare_dirs(pool):
+        marker = _marker_path(path)
+        try:
+            data = json.loads(marker.read_text(encoding="utf-8")) if marker is not None else {}
+            head = data["head"]
+            bootstrapped = data.get("bootstrapped", True) is not False
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            head = None
+        if isinstance(head, str) and not (pool / f"{path.name}.claim").exists():
+            spares.append(Spare(path=path, head=head, bootstrapped=bootstrapped))
+    return spares
+
+
+def fill_pool(
+    *,
+    root_dir: Path,
+    base_root: Path,
+    config: AppConfig,
+    settings: PoolSettings,
+    git: GitRunner,
+    bootstrap: TargetBootstrapper | None,
+    jobs: int = 2,
+) -> list[Path] | None:
+    pool = pool_dir(base_root)
+    store_pool_settings(pool, settings)
+    if bootstrap is not None and shared_linked_repos(config):
+        # A linked worktree outside the spare (e.g. "../docs") would be one checkout under .pool shared
+        # by every spare; such spares skip bootstrap and are bootstrapped in place once claimed.
+        bootstrap = None
+    with _fill_lock(pool) as acquired:
+        if not acquired:
+            return None
+        head = _head_sha(root_dir)
+        ready = ready_spares(pool)
+        # Spares built from an older HEAD and leftovers of interrupted fills are replaced, not reused.
+        current = {
+            spare.path for spare in ready if spare.head == head and spare.bootstrapped == (bootstrap is not None)
+        }
+        retired = [path for path in _unclaimed_spare_dirs(pool) if path not in current]
+        for path in retired:
+            _retire_spare(root_dir, path, git=git)
+        if retired:
+            git.prune_worktrees(root_dir)
+
+        def build(_: int) -> Path:
+            name = f"{SPARE_PREFIX}{secrets.token_hex(4)}"
+            result = _create_in_root(
+                root_dir=root_dir,
+                base_root=pool,
+                name=name,
+                checkout=config.worktree.checkout,
+                seeds=config.seeds,
+                git=git,
+                dry_run=False,
+                detach=True,
+            )
+            if bootstrap is not None:
+                bootstrap(result.path)
+            marker = _marker_path(result.path)
+            if marker is None:
+                raise CodexWorktreeError(f"spare worktree has no git dir: {result.path}")
+            _write_json(marker, {"head": _head_sha(result.path), "bootstrapped": bootstrap is not None})
+            return result.path
+
+        needed = max(0, settings.size - len(current))
+        if needed == 0:
+            return []
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max(1, min(jobs, needed))) as executor:
+            return list(executor.map(build, range(needed)))
+
+
+def drain_pool(*, root_dir: Path, base_root: Path, git: GitRunner) -> list[Path]:
+    pool = pool_dir(base_root)
+    if not pool.is_dir():
+        return []
+    (pool / POOL_SETTINGS_FILE).unlink(missing_ok=True)
+    with _fill_lock(pool, blocking=True):
+        removed = _unclaimed_spare_dirs(pool)
+        for path in removed:
+            _retire_spare(root_dir, path, git=git)
+        git.prune_worktrees(root_dir)
+    return removed
+
+
+def claim_spare(
+    *,
+    root_dir: Path,
+    base_root: Path,
+    name: str,
+    config: AppConfig,
+    git: GitRunner,
+) -> ClaimResult | None:
+    pool = pool_dir(base_root)
+    target = (base_root / name).resolve()
+    if target.exists():
+        raise CodexWorktreeError(f"worktree path already exists: {target}")
+    spares = ready_spares(pool)
+    if not spares:
+        return None
+    # Let the regular path report invalid or taken branch names before a spare is consumed.
+    if not git.is_valid_branch_name(name) or git.branch_exists(root_dir, name):
+        return None
+    head = _head_sha(root_dir)
+    shared = bool(shared_linked_repos(config))
+    for spare in spares:
+        if spare.head != head or (spare.bootstrapped and shared):
+            continue
+        claim = pool / f"{spare.path.name}.claim"
+        try:
+            os.close(os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+        except FileExistsError:
+            continue
+        try:
+            return _claim(spare, target=target, name=name, root_dir=root_dir, config=config, git=git)
+        except (CodexWorktreeError, OSError) as error:
+            # The caller falls back to a regular create, so undo whatever part of the claim happened.
+            print(f"could not claim {spare.path}: {error}; creating {target} normally", file=sys.stderr)
+            _abandon_claim(target, name=name, root_dir=root_dir, git=git)
+            return None
+        finally:
+            claim.unlink(missing_ok=True)
+    return None
+
+
+def shared_linked_repos(config: AppConfig) -> list[str]:
+    # Repo keys whose linked_worktree_path points outside the consumer worktree.
+    anchor = Path("/worktree")
+    return [
+        repo_key
+        for repo_key, repo_config in config.repos.items()
+        if repo_config.linked_worktree_path
+        and not Path(os.path.normpath(anchor / repo_config.linked_worktree_path)).is_relative_to(anchor)
+    ]
+
+
+def request_refill(pool: Path, env: Mapping[str, str]) -> bool:
+    settings = read_pool_settings(pool)
+    if settings is None or env.get(NO_REFILL_ENV):
+        return False
+    import subprocess
+
+    args = [
+        sys.executable,
+        "-m",
+        "codex_worktree",
+        "pool",
+        "fill",
+        "--root-dir",
+        settings.root_dir,
+        "--config",
+        settings.config,
+        "--size",
+        str(settings.size),
+    ]
+    if settings.worktree_root:
+        args.extend(["--worktree-root", settings.worktree_root])
+    child_env = {**os.environ, **env}
+    child_env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(KIT_ROOT), child_env.get("PYTHONPATH")]))
+    with open(pool / POOL_LOG_FILE, "ab") as log:
+        subprocess.Popen(
+            args,
+            cwd=settings.root_dir,
+            env=child_env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    return True
+
+
+def _claim(
+    spare: Spare,
+    *,
+    target: Path,
+    name: str,
+    root_dir: Path,
+    config: AppConfig,
+    git: GitRunner,
+) -> ClaimResult:
+    marker = _marker_path(spare.path)
+    # Branch names such as feature/x nest the target; git worktree move does not create parents.
+    target.parent.mkdir(parents=True, exist_ok=True)
+    plan = [" ".join(git.move_worktree(root_dir, spare.path, target).args)]
+    if marker is not None:
+        marker.unlink(missing_ok=True)
+    state, relocated = _relocate(spare.path, target, git=git)
+    plan.extend(relocated)
+    plan.append(" ".join(git.switch_branch(target, name, create_branch=True).args))
+    if state is not None:
+        plan.extend(_switch_linked_worktrees(target, state, config=config, git=git))
+    return ClaimResult(path=target, spare=spare.path, plan=plan, bootstrapped=spare.bootstrapped)
+
+
+def _abandon_claim(target: Path, *, name: str, root_dir: Path, git: GitRunner) -> None:
+    try:
+        if target.exists():
+            _retire_spare(root_dir, target, git=git)
+            git.prune_worktrees(root_dir)
+        if git.branch_exists(root_dir, name):
+            run_process(["git", "-C", str(root_dir), "branch", "-D", name], check=False, capture_output=True)
+    except (CodexWorktreeError, OSError) as error:
+        print(f"could not clean up {target}: {error}", file=sys.stderr)
+
+
+def _relocate(old: Path, new: Path, *, git: GitRunner) -> tuple[BootstrapState | None, list[str]]:
+    # `git worktree move` only fixes the consumer; nested linked worktrees, absolute symlinks and the
+    # recorded bootstrap state still point into the spare directory.
+    state_path = bootstrap_state_path(new)
+    state = load_bootstrap_state(state_path) if state_path is not None else None
+    if state_path is None or state is None:
+        return None, []
+    prefix = str(old)
+
+    def moved(value: str) -> str:
+        if value == prefix or value.startswith(prefix + os.sep):
+            return str(new) + value[len(prefix):]
+        return value
+
+    lines: list[str] = []
+    for linked in state.worktrees.values():
+        if moved(linked) != linked:
+            lines.append(" ".join(git.repair_worktree(Path(moved(linked))).args))
+    reconciler = SymlinkReconciler(dry_run=False)
+    for link_path, link_target in sorted(state.links.items()):
+        if moved(link_target) != link_target:
+            location = new / link_path
+            lines.append(reconciler.reconcile(location.parent.resolve() / location.name, Path(moved(link_target))).plan_line)
+    state = replace(
+        state,
+        repos={key: moved(value) for key, value in state.repos.items()},
+        worktrees={key: moved(value) for key, value in state.worktrees.items()},
+        links={key: moved(value) for key, value in state.links.items()},
+    )
+    store_bootstrap_state(state_path, state)
+    return state, lines
+
+
+def _switch_linked_worktrees(target: Path, state: BootstrapState, *, config: AppConfig, git: GitRunner) -> list[str]:
+    # Spares are detached, so their linked worktrees are too; give them the branch the strategy now picks.
+    lines: list[str] = []
+    for repo_key, linked in sorted(state.worktrees.items()):
+        repo_config = config.repos.get(repo_key)
+        linked_repo = state.repos.get(repo_key)
+        if repo_config is None or linked_repo is None or not Path(linked).is_relative_to(target):
+            continue
+        branch_plan = plan_linked_worktree_branch(
+            consumer_root=target,
+            linked_repo=Path(linked_repo),
+            strategy=repo_config.branch_strategy,
+            git=git,
+        )
+        if branch_plan.detach or branch_plan.branch is None:
+            continue
+        result = git.switch_branch(
+            Path(linked),
+            branch_plan.branch,
+            create_branch=branch_plan.create_branch,
+            start_point=branch_plan.start_point,
+        )
+        lines.append(" ".join(result.args))
+    return lines
+
+
+def _retire_spare(root_dir: Path, spare: Path, *, git: GitRunner) -> None:
+    # Spares hold only generated state, so they are removed with --force.
+    try:
+        remove_linked_worktrees(spare, git=git, force=True, dry_run=False)
+        git.remove_worktree(root_dir, spare, force=True)
+    except GitCommandError:
+        if spare.exists():
+            raise
+
+
+def _spare_dirs(pool: Path) -> list[Path]:
+    try:
+        entries = list(os.scandir(pool))
+    except FileNotFoundError:
+        return []
+    return sorted(
+        Path(entry.path)
+        for entry in entries
+        if entry.name.startswith(SPARE_PREFIX) and entry.is_dir(follow_symlinks=False)
+    )
+
+
+def _unclaimed_spare_dirs(pool: Path) -> list[Path]:
+    return [path for path in _spare_dirs(pool) if not (pool / f"{path.name}.claim").exists()]
+
+
+def _marker_path(spare: Path) -> Path | None:
+    try:
+        git_dir = find_git_dir(spare)
+    except (RefReadError, OSError):
+        return None
+    return git_dir / CACHE_DIR_NAME / SPARE_MARKER_FILE if git_dir is not None else None
+
+
+def _head_sha(repo: Path) -> str:
+    try:
+        store = RefStore.discover(repo)
+        head = store.head()
+        sha = head.sha or (store.resolve(head.symref) if head.symref else None)
+    except (RefReadError, OSError):
+        sha = None
+    if sha:
+        return sha
+    command = ["git", "-C", str(repo), "rev-parse", "HEAD"]
+    completed = run_process(command, check=False, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise GitCommandError(args=command, returncode=completed.returncode, stderr=completed.stderr)
+    return completed.stdout.strip()
+
+
+@contextmanager
+def _fill_lock(pool: Path, *, blocking: bool = False) -> Iterator[bool]:
+    with open(pool / ".fill.lock", "a+b") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _write_json(path: Path, data: object) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2, sort_keys=True)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from .errors import RefReadError
+
+
+MAX_SYMREF_DEPTH = 5
+PER_WORKTREE_REF_PREFIXES = ("refs/bisect/", "refs/worktree/", "refs/rewritten/")
+GIT_DIR_ENV_VARS = ("GIT_DIR", "GIT_COMMON_DIR", "GIT_WORK_TREE")
+
+_REFSTORAGE_PATTERN = re.compile(r"^\s*refstorage\s*=\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+_FORBIDDEN_REF_CHARS = frozenset(" ~^:?*[\\\x7f") | frozenset(chr(code) for code in range(0x20))
+
+_packed_refs_lock = threading.Lock()
+_packed_refs_cache: dict[Path, tuple[tuple[int, int], dict[str, PackedRef]]] = {}
+
+
+@dataclass(frozen=True)
+class PackedRef:
+    sha: str
+    peeled: str | None = None
+
+
+@dataclass(frozen=True)
+class HeadState:
+    symref: str | None
+    sha: str | None
+
+
+class RefStore:
+    def __init__(self, git_dir: Path) -> None:
+        self.git_dir = git_dir
+        self.common_dir = read_git_common_dir(git_dir)
+        _ensure_files_backend(self.common_dir)
+
+    @classmethod
+    def discover(cls, path: Path) -> RefStore:
+        git_dir = find_git_dir(path)
+        if git_dir is None:
+            raise RefReadError(f"not a git repository: {path}")
+        return cls(git_dir)
+
+    def head(self) -> HeadState:
+        raw = _read_ref_file(self.git_dir / "HEAD")
+        if raw is None:
+            raise RefReadError(f"missing HEAD in {self.git_dir}")
+        if raw.startswith("ref:"):
+            return HeadState(symref=raw.removeprefix("ref:").strip(), sha=None)
+        return HeadState(symref=None, sha=raw)
+
+    def current_branch(self) -> str | None:
+        symref = self.head().symref
+        if symref is None or not symref.startswith("refs/heads/"):
+            return None
+        return symref.removeprefix("refs/heads/")
+
+    def resolve(self, refname: str) -> str | None:
+        for _ in range(MAX_SYMREF_DEPTH):
+            raw = _read_ref_file(self._loose_ref_path(refname))
+            if raw is None:
+                packed = self.packed_refs().get(refname)
+                return packed.sha if packed else None
+            if not raw.startswith("ref:"):
+                return raw
+            refname = raw.removeprefix("ref:").strip()
+        raise RefReadError(f"symbolic ref chain too deep at {refname}")
+
+    def ref_exists(self, refname: str) -> bool:
+        return self.resolve(refname) is not None
+
+    def peeled(self, refname: str) -> str | None:
+        packed = self.packed_refs().get(refname)
+        if packed is not None and packed.peeled is not None:
+            return packed.peeled
+        return self.resolve(refname)
+
+    def packed_refs(self) -> dict[str, PackedRef]:
+        return read_packed_refs(self.common_dir)
+
+    def _loose_ref_path(self, refname: str) -> Path:
+        if "/" not in refname or refname.startswith(PER_WORKTREE_REF_PREFIXES):
+            return self.git_dir / refname
+        return self.common_dir / refname
+
+
+def find_git_dir(path: Path) -> Path | None:
+    if any(os.environ.get(name) for name in GIT_DIR_ENV_VARS):
+        raise RefReadError("GIT_DIR style environment overrides are not supported natively")
+    current = path.absolute()
+    for candidate in (current, *current.parents):
+        dot_git = candidate / ".git"
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            return _read_gitfile(dot_git)
+    return None
+
+
+def read_git_common_dir(git_dir: Path) -> Path:
+    commondir_file = git_dir / "commondir"
+    try:
+        raw = commondir_file.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return git_dir.resolve()
+    common_dir = Path(raw)
+    if not common_dir.is_absolute():
+        common_dir = git_dir / common_dir
+    return common_dir.resolve()
+
+
+def read_packed_refs(common_dir: Path) -> dict[str, PackedRef]:
+    # Parsed packed-refs are shared process-wide and re-read only when the file's stat changes.
+    path = common_dir / "packed-refs"
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _packed_refs_lock:
+        cached = _packed_refs_cache.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    refs = _parse_packed_refs(path.read_text(encoding="utf-8"))
+    with _packed_refs_lock:
+        _packed_refs_cache[path] = (key, refs)
+    return refs
+
+
+def is_valid_branch_name(name: str) -> bool:
+    # Mirrors `git check-ref-format --branch` for names without `@` expansions.
+    if "@" in name:
+        raise RefReadError(f"branch name '{name}' needs git to expand @ syntax")
+    if not name or name.startswith("-") or name == "HEAD":
+        return False
+    if name.endswith(("/", ".")) or ".." in name:
+        return False
+    if any(char in _FORBIDDEN_REF_CHARS for char in name):
+        return False
+    for component in name.split("/"):
+        if not component or component.startswith(".") or component.endswith(".lock"):
+            return False
+    return True
+
+
+def _read_gitfile(path: Path) -> Path:
+    raw = path.read_text(encoding="utf-8").strip()
+    if not raw.startswith("gitdir:"):
+        raise RefReadError(f"invalid gitfile format: {path}")
+    git_dir = Path(raw.removeprefix("gitdir:").strip())
+    if not git_dir.is_absolute():
+        git_dir = path.parent / git_dir
+    git_dir = git_dir.resolve()
+    if not git_dir.is_dir():
+        raise RefReadError(f"gitfile points at missing directory: {git_dir}")
+    return git_dir
+
+
+def _ensure_files_backend(common_dir: Path) -> None:
+    if (common_dir / "reftable").is_dir():
+        raise RefReadError(f"reftable repositories are not supported natively: {common_dir}")
+    try:
+        config = (common_dir / "config").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return
+    match = _REFSTORAGE_PATTERN.search(config)
+    if match and match.group(1).lower() != "files":
+        raise RefReadError(f"ref storage '{match.group(1)}' is not supported natively: {common_dir}")
+
+
+def _read_ref_file(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+
+
+def _parse_packed_refs(text: str) -> dict[str, PackedRef]:
+    refs: dict[str, PackedRef] = {}
+    last: str | None = None
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("^"):
+            if last is not None:
+                refs[last] = PackedRef(sha=refs[last].sha, peeled=line[1:].strip())
+            continue
+        sha, _, refname = line.partition(" ")
+        refs[refname] = PackedRef(sha=sha)
+        last = refname
+    return refs
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from .errors import GitCommandError
+from .ref_reader import read_packed_refs
+from .tracing import run_process
+
+
+DEFAULT_REMOTE_REFS_TTL = 15 * 60
+CACHE_DIR_NAME = "codex-worktree"
+
+
+@dataclass(frozen=True)
+class RemoteRefSnapshot:
+    fetched_at: float
+    heads: frozenset[str] = field(default_factory=frozenset)
+
+
+class RemoteRefIndex:
+    def __init__(
+        self,
+        common_dir: Path,
+        *,
+        remote: str = "origin",
+        ttl: float | None = DEFAULT_REMOTE_REFS_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.common_dir = common_dir
+        self.remote = remote
+        self.ttl = ttl
+        self._clock = clock
+        self._tracking: frozenset[str] | None = None
+        self._snapshot: RemoteRefSnapshot | None = None
+        self._snapshot_loaded = False
+
+    @property
+    def cache_path(self) -> Path:
+        return self.common_dir / CACHE_DIR_NAME / "remote-refs" / f"{self.remote}.json"
+
+    def has_branch(self, branch: str) -> bool:
+        if branch in self.tracking_branches():
+            return True
+        snapshot = self.cached_snapshot()
+        return snapshot is not None and branch in snapshot.heads
+
+    def tracking_branches(self) -> frozenset[str]:
+        if self._tracking is None:
+            self._tracking = frozenset(_read_tracking_branches(self.common_dir, self.remote))
+        return self._tracking
+
+    def cached_snapshot(self) -> RemoteRefSnapshot | None:
+        if not self._snapshot_loaded:
+            self._snapshot = _load_snapshot(self.cache_path)
+            self._snapshot_loaded = True
+        snapshot = self._snapshot
+        if snapshot is None or self.ttl is None:
+            return None
+        if self._clock() - snapshot.fetched_at > self.ttl:
+            return None
+        return snapshot
+
+    def refresh(self, repo: Path) -> RemoteRefSnapshot:
+        args = ["git", "-C", str(repo), "ls-remote", "--heads", self.remote]
+        completed = run_process(args, check=False, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise GitCommandError(args=args, returncode=completed.returncode, stderr=completed.stderr)
+        heads: set[str] = set()
+        for line in completed.stdout.splitlines():
+            _, _, refname = line.partition("\t")
+            if refname.startswith("refs/heads/"):
+                heads.add(refname.removeprefix("refs/heads/"))
+        snapshot = RemoteRefSnapshot(fetched_at=self._clock(), heads=frozenset(heads))
+        _store_snapshot(self.cache_path, snapshot)
+        self._snapshot = snapshot
+        self._snapshot_loaded = True
+        return snapshot
+
+
+def _read_tracking_branches(common_dir: Path, remote: str) -> set[str]:
+    prefix = f"refs/remotes/{remote}/"
+    branches: set[str] = set()
+
+    for refname in read_packed_refs(common_dir):
+        if refname.startswith(prefix):
+            branches.add(refname.removeprefix(prefix))
+
+    loose_root = common_dir / "refs" / "remotes" / remote
+    for dirpath, _, filenames in os.walk(loose_root):
+        relative = Path(dirpath).relative_to(loose_root)
+        for filename in filenames:
+            if filename.endswith(".lock"):
+                continue
+            branches.add((relative / filename).as_posix())
+
+    branches.discard("HEAD")
+    return branches
+
+
+def _load_snapshot(path: Path) -> RemoteRefSnapshot | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    fetched_at = data.get("fetched_at")
+    heads = data.get("heads")
+    if not isinstance(fetched_at, (int, float)) or not isinstance(heads, list):
+        return None
+    return RemoteRefSnapshot(fetched_at=float(fetched_at), heads=frozenset(str(head) for head in heads))
+
+
+def _store_snapshot(path: Path, snapshot: RemoteRefSnapshot) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = json.dumps({"fetched_at": snapshot.fetched_at, "heads": sorted(snapshot.heads)})
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(payload)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
@@ -1,15 +1,103 @@
 from __future__ import annotations
 
-import subprocess
+import threading
 from pathlib import Path
 from typing import Callable, Mapping
 
 from .config import RepoConfig
-from .errors import RepoResolutionError
+from .errors import RefReadError, RepoResolutionError
+from .ref_reader import find_git_dir, read_git_common_dir
+from .tracing import run_process, span
 
 GitCommonDirResolver = Callable[[Path], Path | None]
 
 
+class RepoResolutionContext:
+    # One context serves a whole bootstrap: the common dir depends only on root_dir, and
+    # candidate paths repeat across repo keys, so resolve() and .git probes are memoized.
+    def __init__(
+        self,
+        *,
+        root_dir: Path,
+        env: Mapping[str, str] | None,
+        git_common_dir_resolver: GitCommonDirResolver | None = None,
+    ) -> None:
+        self.root_dir = root_dir
+        self.env = env or {}
+        self._git_common_dir_resolver = git_common_dir_resolver or _resolve_git_common_dir
+        self._lock = threading.Lock()
+        self._common_dir: Path | None = None
+        self._common_dir_loaded = False
+        self._resolved: dict[Path, Path] = {}
+        self._git_repos: dict[Path, bool] = {}
+
+    def resolve_all(self, repos: Mapping[str, RepoConfig]) -> dict[str, Path | None]:
+        return {repo_key: self.resolve_repo(repo_key, repo_config) for repo_key, repo_config in repos.items()}
+
+    def resolve_repo(self, repo_key: str, repo_config: RepoConfig) -> Path | None:
+        for env_name in repo_config.repo_env:
+            raw = self.env.get(env_name)
+            if raw:
+                candidate = self.resolve(Path(raw).expanduser())
+                if self.is_git_repo(candidate):
+                    return candidate
+
+        for discover_path in repo_config.discover:
+            candidate = self.resolve(self.root_dir / discover_path)
+            if self.is_git_repo(candidate):
+                return candidate
+
+        sibling = self.resolve(self.root_dir.parent / repo_key)
+        if self.is_git_repo(sibling):
+            return sibling
+
+        worktree_candidates = self.worktree_candidate_paths(repo_key)
+        for candidate in worktree_candidates:
+            if self.is_git_repo(candidate):
+                return candidate
+
+        if repo_config.required:
+            raise RepoResolutionError(
+                f"failed to resolve repo '{repo_key}'. "
+                f"Checked env {repo_config.repo_env}, discover paths {repo_config.discover}, "
+                f"sibling path '{sibling}', and worktree-derived paths "
+                f"{[str(path) for path in worktree_candidates]}."
+            )
+        return None
+
+    def git_common_dir(self) -> Path | None:
+        with self._lock:
+            if not self._common_dir_loaded:
+                self._common_dir = self._git_common_dir_resolver(self.root_dir)
+                self._common_dir_loaded = True
+            return self._common_dir
+
+    def worktree_candidate_paths(self, repo_key: str) -> list[Path]:
+        common_dir = self.git_common_dir()
+        if common_dir is None:
+            return []
+
+        main_root = common_dir.parent
+        return [
+            self.resolve(main_root / f".{repo_key}"),
+            self.resolve(main_root.parent / repo_key),
+        ]
+
+    def resolve(self, path: Path) -> Path:
+        resolved = self._resolved.get(path)
+        if resolved is None:
+            resolved = path.resolve()
+            self._resolved[path] = resolved
+        return resolved
+
+    def is_git_repo(self, path: Path) -> bool:
+        exists = self._git_repos.get(path)
+        if exists is None:
+            exists = _is_git_repo(path)
+            self._git_repos[path] = exists
+        return exists
+
+
 def resolve_repo_path(
     *,
     root_dir: Path,
@@ -17,68 +105,30 @@ def resolve_repo_path(
     repo_config: RepoConfig,
     env: Mapping[str, str] | None,
     git_common_dir_resolver: GitCommonDirResolver | None = None,
+    context: RepoResolutionContext | None = None,
 ) -> Path | None:
-    env = env or {}
-
-    for env_name in repo_config.repo_env:
-        raw = env.get(env_name)
-        if raw:
-            candidate = Path(raw).expanduser().resolve()
-            if _is_git_repo(candidate):
-                return candidate
-
-    for discover_path in repo_config.discover:
-        candidate = (root_dir / discover_path).resolve()
-        if _is_git_repo(candidate):
-            return candidate
-
-    sibling = (root_dir.parent / repo_key).resolve()
-    if _is_git_repo(sibling):
-        return sibling
-
-    worktree_candidates = _worktree_candidate_paths(
-        root_dir=root_dir,
-        repo_key=repo_key,
-        git_common_dir_resolver=git_common_dir_resolver,
-    )
-    for candidate in worktree_candidates:
-        if _is_git_repo(candidate):
-            return candidate
-
-    if repo_config.required:
-        raise RepoResolutionError(
-            f"failed to resolve repo '{repo_key}'. "
-            f"Checked env {repo_config.repo_env}, discover paths {repo_config.discover}, "
-            f"sibling path '{sibling}', and worktree-derived paths "
-            f"{[str(path) for path in worktree_candidates]}."
-        )
-    return None
+    if context is None:
+        context = RepoResolutionContext(root_dir=root_dir, env=env, git_common_dir_resolver=git_common_dir_resolver)
+    return context.resolve_repo(repo_key, repo_config)
 
 
 def _is_git_repo(path: Path) -> bool:
-    return (path / ".git").exists()
+    with span("probe .git", "fs", path=str(path)) as record:
+        record["exists"] = (path / ".git").exists()
+    return record["exists"]
 
 
-def _worktree_candidate_paths(
-    *,
-    root_dir: Path,
-    repo_key: str,
-    git_common_dir_resolver: GitCommonDirResolver | None,
-) -> list[Path]:
-    resolver = git_common_dir_resolver or _resolve_git_common_dir
-    common_dir = resolver(root_dir)
-    if common_dir is None:
-        return []
-
-    main_root = common_dir.parent
-    return [
-        (main_root / f".{repo_key}").resolve(),
-        (main_root.parent / repo_key).resolve(),
-    ]
+def _resolve_git_common_dir(root_dir: Path) -> Path | None:
+    try:
+        with span("read git common dir", "fs", path=str(root_dir)):
+            git_dir = find_git_dir(root_dir)
+            return read_git_common_dir(git_dir) if git_dir is not None else None
+    except RefReadError:
+        return _resolve_git_common_dir_with_git(root_dir)
 
 
-def _resolve_git_common_dir(root_dir: Path) -> Path | None:
-    completed = subprocess.run(
+def _resolve_git_common_dir_with_git(root_dir: Path) -> Path | None:
+    completed = run_process(
         ["git", "-C", str(root_dir), "rev-parse", "--git-common-dir"],
         check=False,
         capture_output=True,
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping, Sequence
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+@dataclass(frozen=True)
+class Task:
+    key: str
+    run: Callable[[], Any]
+    depends_on: tuple[str, ...] = ()
+
+
+def run_task_graph(tasks: Sequence[Task], *, max_workers: int) -> dict[str, Any]:
+    order = {task.key: index for index, task in enumerate(tasks)}
+    if len(order) != len(tasks):
+        raise ValueError("task keys must be unique")
+    for task in tasks:
+        for dependency in task.depends_on:
+            if dependency not in order:
+                raise ValueError(f"task '{task.key}' depends on unknown task '{dependency}'")
+    check_acyclic({task.key: task.depends_on for task in tasks})
+
+    pending = {task.key: set(task.depends_on) for task in tasks}
+    dependents: dict[str, list[str]] = {task.key: [] for task in tasks}
+    for task in tasks:
+        for dependency in task.depends_on:
+            dependents[dependency].append(task.key)
+
+    results: dict[str, Any] = {}
+    errors: dict[str, BaseException] = {}
+    started: set[str] = set()
+
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        running: dict[Future[Any], str] = {}
+
+        def submit_ready() -> None:
+            for task in tasks:
+                if task.key in started or pending[task.key]:
+                    continue
+                started.add(task.key)
+                running[executor.submit(task.run)] = task.key
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = running.pop(future)
+                try:
+                    results[key] = future.result()
+                except BaseException as error:
+                    errors[key] = error
+                    continue
+                for dependent in dependents[key]:
+                    pending[dependent].discard(key)
+            if not errors:
+                submit_ready()
+
+    if errors:
+        raise errors[min(errors, key=order.__getitem__)]
+    return results
+
+
+def check_acyclic(graph: Mapping[str, Iterable[str]]) -> None:
+    remaining = {key: set(dependencies) for key, dependencies in graph.items()}
+    while remaining:
+        ready = [key for key, dependencies in remaining.items() if not dependencies]
+        if not ready:
+            raise ValueError(f"dependency cycle between tasks {sorted(remaining)}")
+        for key in ready:
+            del remaining[key]
+        for dependencies in remaining.values():
+            dependencies.difference_update(ready)
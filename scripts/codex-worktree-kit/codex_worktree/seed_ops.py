@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from .config import SUPPORTED_SEED_MODES
+from .errors import SeedError
+
+
+DEFAULT_SEED_JOBS = 8
+FICLONE = 0x40049409
+_CLONE_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM}
+
+
+@dataclass(frozen=True)
+class SeedProgress:
+    path: str
+    files: int
+    bytes: int
+
+
+@dataclass(frozen=True)
+class SeedResult:
+    path: str
+    method: str
+    files: int = 0
+    bytes: int = 0
+    rendered: str = ""
+
+
+SeedProgressCallback = Callable[[SeedProgress], None]
+
+
+def seed_directory(
+    *,
+    source: Path,
+    target: Path,
+    mode: str = "auto",
+    dry_run: bool = False,
+    jobs: int = DEFAULT_SEED_JOBS,
+    progress: SeedProgressCallback | None = None,
+) -> SeedResult:
+    if mode not in SUPPORTED_SEED_MODES:
+        raise SeedError(f"unsupported seed mode: {mode}")
+    rendered = f"seed {source} -> {target} ({mode})"
+    label = str(target)
+    if dry_run:
+        return SeedResult(path=label, method="planned", rendered=rendered)
+    if not source.is_dir():
+        return SeedResult(path=label, method="missing", rendered=rendered)
+    if os.path.lexists(target):
+        return SeedResult(path=label, method="exists", rendered=rendered)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # The tree is built in a sibling and renamed into place, so a copy that fails partway never leaves
+    # a half-populated target that later runs would skip as "exists".
+    staging = target.parent / f".{target.name}.seeding"
+    if os.path.lexists(staging):
+        shutil.rmtree(staging)
+    try:
+        if mode in {"auto", "reflink"} and sys.platform == "darwin" and _clonefile(source, staging):
+            # APFS clones the whole tree in one call; the walk only reports what was cloned.
+            files, total = _measure_tree(staging)
+            os.rename(staging, target)
+            if progress is not None:
+                progress(SeedProgress(path=label, files=files, bytes=total))
+            return SeedResult(path=label, method="reflink", files=files, bytes=total, rendered=rendered)
+
+        copier = _TreeCopier(mode=mode, label=label, progress=progress)
+        _copy_tree(source, staging, copier=copier, jobs=jobs)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return SeedResult(
+        path=label,
+        method=copier.method,
+        files=copier.files,
+        bytes=copier.bytes,
+        rendered=rendered,
+    )
+
+
+def _copy_tree(source: Path, target: Path, *, copier: _TreeCopier, jobs: int) -> None:
+    directories, files, symlinks = _scan_tree(source)
+    os.mkdir(target)
+    for relative in directories:
+        (target / relative).mkdir()
+    for relative, link_target in symlinks:
+        os.symlink(link_target, target / relative)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        list(executor.map(lambda item: copier.copy(source / item[0], target / item[0], item[1]), files))
+    for relative in reversed(directories):
+        shutil.copystat(source / relative, target / relative, follow_symlinks=False)
+    shutil.copystat(source, target, follow_symlinks=False)
+
+
+class _TreeCopier:
+    def __init__(self, *, mode: str, label: str, progress: SeedProgressCallback | None) -> None:
+        self.mode = mode
+        self.label = label
+        self.progress = progress
+        self.method = {"auto": "reflink", "reflink": "reflink", "hardlink": "hardlink", "copy": "copy"}[mode]
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def copy(self, source: Path, target: Path, size: int) -> None:
+        method = self.method
+        if method == "reflink" and not _reflink_file(source, target):
+            if self.mode == "reflink":
+                raise SeedError(f"filesystem does not support reflinks: {source} -> {target}")
+            method = self._downgrade("copy")
+        if method == "hardlink":
+            try:
+                os.link(source, target)
+            except OSError as error:
+                if error.errno not in {errno.EXDEV, errno.EPERM, errno.EMLINK}:
+                    raise
+                method = self._downgrade("copy")
+        if method == "copy":
+            shutil.copyfile(source, target)
+        if method != "hardlink":
+            shutil.copystat(source, target)
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            files, total = self.files, self.bytes
+        if self.progress is not None:
+            self.progress(SeedProgress(path=self.label, files=files, bytes=total))
+
+    def _downgrade(self, method: str) -> str:
+        with self._lock:
+            self.method = method
+        return method
+
+
+def _scan_tree(root: Path) -> tuple[list[Path], list[tuple[Path, int]], list[tuple[Path, str]]]:
+    directories: list[Path] = []
+    files: list[tuple[Path, int]] = []
+    symlinks: list[tuple[Path, str]] = []
+    stack = [Path()]
+    while stack:
+        relative = stack.pop()
+        with os.scandir(root / relative) as entries:
+            for entry in entries:
+                child = relative / entry.name
+                if entry.is_symlink():
+                    symlinks.append((child, os.readlink(entry.path)))
+                elif entry.is_dir(follow_symlinks=False):
+                    directories.append(child)
+                    stack.append(child)
+                elif entry.is_file(follow_symlinks=False):
+                    files.append((child, entry.stat(follow_symlinks=False).st_size))
+    directories.sort(key=lambda path: len(path.parts))
+    return directories, files, symlinks
+
+
+def _measure_tree(root: Path) -> tuple[int, int]:
+    _, files, _ = _scan_tree(root)
+    return len(files), sum(size for _, size in files)
+
+
+def _reflink_file(source: Path, target: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with open(source, "rb") as src, open(target, "xb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError as error:
+            if error.errno not in _CLONE_UNSUPPORTED:
+                raise
+            dst.close()
+            os.unlink(target)
+            return False
+    return True
+
+
+def _clonefile(source: Path, target: Path) -> bool:
+    import ctypes
+    import ctypes.util
+
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return False
+    libc = ctypes.CDLL(library, use_errno=True)
+    clonefile = getattr(libc, "clonefile", None)
+    if clonefile is None:
+        return False
+    return clonefile(os.fsencode(source), os.fsencode(target), 0) == 0
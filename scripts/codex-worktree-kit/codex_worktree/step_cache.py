@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import StepConfig
+from .errors import RefReadError
+from .ref_reader import find_git_dir, read_git_common_dir
+from .remote_refs import CACHE_DIR_NAME
+
+
+STEP_CACHE_FORMAT = 1
+DIGEST_SIZE = 20
+# Cached output sets kept per step name; older ones are dropped together with objects nobody references.
+MAX_ENTRIES_PER_STEP = 8
+# Objects are stored before the entry that references them is written; a concurrent record must not lose them.
+OBJECT_GRACE_SECONDS = 60
+
+
+@dataclass(frozen=True)
+class FileState:
+    size: int
+    mtime_ns: int
+    digest: str
+    mode: int = 0o644
+
+
+@dataclass(frozen=True)
+class StepLookup:
+    step: StepConfig
+    fingerprint: str
+    inputs: dict[str, FileState] = field(default_factory=dict)
+    unchanged: bool = False
+    cached_outputs: dict[str, FileState] | None = None
+
+    @property
+    def restorable(self) -> bool:
+        return bool(self.cached_outputs)
+
+
+class StepCache:
+    # Manifests and objects live under the git common dir, so every worktree of a repo shares them.
+    def __init__(self, root: Path, *, worktree: Path) -> None:
+        self.root = root
+        self.worktree = worktree
+        self._worktree_key = hashlib.sha256(str(worktree).encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def for_worktree(cls, worktree: Path) -> StepCache | None:
+        try:
+            git_dir = find_git_dir(worktree)
+        except (RefReadError, OSError):
+            return None
+        if git_dir is None:
+            return None
+        common_dir = read_git_common_dir(git_dir)
+        return cls(common_dir / CACHE_DIR_NAME / "steps", worktree=worktree.resolve())
+
+    def lookup(self, step: StepConfig) -> StepLookup:
+        manifest = _read_json(self._manifest_path(step.name)) or {}
+        previous_inputs = _states(manifest.get("inputs"))
+        inputs = {
+            relative: _file_state(self.worktree / relative, previous_inputs.get(relative))
+            for relative in self._expand(step.inputs)
+        }
+        fingerprint = _fingerprint(step, inputs)
+        unchanged = manifest.get("fingerprint") == fingerprint and all(
+            _stat_matches(self.worktree / relative, state)
+            for relative, state in _states(manifest.get("outputs")).items()
+        )
+        cached_outputs = None
+        if not unchanged:
+            entry = _read_json(self._entry_path(fingerprint))
+            if entry is not None:
+                cached_outputs = _states(entry.get("outputs"))
+                if not all(self._object_path(state.digest).is_file() for state in cached_outputs.values()):
+                    cached_outputs = None
+        return StepLookup(
+            step=step,
+            fingerprint=fingerprint,
+            inputs=inputs,
+            unchanged=unchanged,
+            cached_outputs=cached_outputs,
+        )
+
+    def restore(self, lookup: StepLookup) -> None:
+        outputs: dict[str, FileState] = {}
+        for relative, state in (lookup.cached_outputs or {}).items():
+            target = self.worktree / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+            os.close(fd)
+            try:
+                shutil.copyfile(self._object_path(state.digest), tmp_name)
+                os.chmod(tmp_name, state.mode)
+                os.replace(tmp_name, target)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+            stat = target.stat()
+            outputs[relative] = FileState(stat.st_size, stat.st_mtime_ns, state.digest, state.mode)
+        self._write_manifest(lookup, outputs)
+        try:
+            # Entries are evicted oldest first; a restore counts as a use.
+            os.utime(self._entry_path(lookup.fingerprint))
+        except OSError:
+            pass
+
+    def record(self, lookup: StepLookup) -> None:
+        try:
+            outputs = {
+                relative: _file_state(self.worktree / relative, None)
+                for relative in self._expand(lookup.step.outputs)
+            }
+            for relative, state in outputs.items():
+                self._store_object(self.worktree / relative, state.digest)
+            _write_json(
+                self._entry_path(lookup.fingerprint),
+                {"format": STEP_CACHE_FORMAT, "step": lookup.step.name, "outputs": _serialize(outputs)},
+            )
+            self._write_manifest(lookup, outputs)
+            self._evict(lookup.step.name)
+        except OSError:
+            # The step already succeeded; failing to cache its outputs only costs a rerun next time.
+            return
+
+    def _write_manifest(self, lookup: StepLookup, outputs: dict[str, FileState]) -> None:
+        _write_json(
+            self._manifest_path(lookup.step.name),
+            {
+                "format": STEP_CACHE_FORMAT,
+                "step": lookup.step.name,
+                "worktree": str(self.worktree),
+                "fingerprint": lookup.fingerprint,
+                "inputs": _serialize(lookup.inputs),
+                "outputs": _serialize(outputs),
+            },
+        )
+
+    def _evict(self, step_name: str) -> None:
+        entries: list[tuple[float, Path, dict[str, Any]]] = []
+        for path in (self.root / "entries").glob("*.json"):
+            entry = _read_json(path)
+            try:
+                mtime = path.stat().st_mtime
+            except OSError:
+                continue
+            if entry is None:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((mtime, path, entry))
+        entries.sort(key=lambda item: item[0], reverse=True)
+        kept: list[dict[str, Any]] = []
+        per_step = 0
+        for _, path, entry in entries:
+            if entry.get("step") == step_name:
+                per_step += 1
+                if per_step > MAX_ENTRIES_PER_STEP:
+                    path.unlink(missing_ok=True)
+                    continue
+            kept.append(entry)
+
+        referenced = {state.digest for entry in kept for state in _states(entry.get("outputs")).values()}
+        for path in (self.root / "manifests").glob("*/*.json"):
+            manifest = _read_json(path)
+            if manifest is None or not Path(manifest.get("worktree", "")).is_dir():
+                # Manifests of removed worktrees would otherwise pin their outputs forever.
+                path.unlink(missing_ok=True)
+                continue
+            referenced.update(state.digest for state in _states(manifest.get("outputs")).values())
+
+        cutoff = time.time() - OBJECT_GRACE_SECONDS
+        for path in (self.root / "objects").glob("*/*"):
+            if path.parent.name + path.name in referenced:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def _expand(self, patterns: list[str]) -> list[str]:
+        matched: set[str] = set()
+        for pattern in patterns:
+            for path in self.worktree.glob(pattern):
+                if path.is_dir():
+                    for dirpath, _, filenames in os.walk(path):
+                        matched.update(
+                            Path(dirpath, filename).relative_to(self.worktree).as_posix() for filename in filenames
+                        )
+                elif path.is_file():
+                    matched.add(path.relative_to(self.worktree).as_posix())
+        return sorted(matched)
+
+    def _store_object(self, source: Path, digest: str) -> None:
+        target = self._object_path(digest)
+        if target.exists():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.")
+        os.close(fd)
+        try:
+            shutil.copyfile(source, tmp_name)
+            os.replace(tmp_name, target)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+    def _manifest_path(self, step_name: str) -> Path:
+        name_key = hashlib.sha256(step_name.encode("utf-8")).hexdigest()[:16]
+        return self.root / "manifests" / self._worktree_key / f"{name_key}.json"
+
+    def _entry_path(self, fingerprint: str) -> Path:
+        return self.root / "entries" / f"{fingerprint}.json"
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest[2:]
+
+
+def _fingerprint(step: StepConfig, inputs: dict[str, FileState]) -> str:
+    payload = json.dumps(
+        {
+            "format": STEP_CACHE_FORMAT,
+            "cwd": step.cwd,
+            "run": step.run,
+            "inputs": [[relative, state.digest] for relative, state in sorted(inputs.items())],
+            "outputs": step.outputs,
+        },
+        separators=(",", ":"),
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=DIGEST_SIZE).hexdigest()
+
+
+def _file_state(path: Path, previous: FileState | None) -> FileState:
+    stat = path.stat()
+    if previous is not None and previous.size == stat.st_size and previous.mtime_ns == stat.st_mtime_ns:
+        return previous
+    with path.open("rb") as handle:
+        digest = hashlib.file_digest(handle, lambda: hashlib.blake2b(digest_size=DIGEST_SIZE)).hexdigest()
+    return FileState(stat.st_size, stat.st_mtime_ns, digest, stat.st_mode & 0o7777)
+
+
+def _stat_matches(path: Path, state: FileState) -> bool:
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    return stat.st_size == state.size and stat.st_mtime_ns == state.mtime_ns
+
+
+def _serialize(states: dict[str, FileState]) -> dict[str, list[Any]]:
+    return {
+        relative: [state.size, state.mtime_ns, state.digest, state.mode]
+        for relative, state in sorted(states.items())
+    }
+
+
+def _states(data: Any) -> dict[str, FileState]:
+    if not isinstance(data, dict):
+        return {}
+    states: dict[str, FileState] = {}
+    for relative, value in data.items():
+        if isinstance(value, list) and len(value) == 4:
+            states[relative] = FileState(*value)
+    return states
+
+
+def _read_json(path: Path) -> dict[str, Any] | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("format") != STEP_CACHE_FORMAT:
+        return None
+    return data
+
+
+def _write_json(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
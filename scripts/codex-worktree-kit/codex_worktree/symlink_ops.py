@@ -1,25 +1,88 @@
 from __future__ import annotations
 
 import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 
 from .errors import SymlinkConflictError
+from .tracing import span
+
+
+LINK_ACTIONS = ("created", "updated", "unchanged")
+
+
+@dataclass(frozen=True)
+class LinkOutcome:
+    link_path: Path
+    target_path: Path
+    action: str
+    rendered: str
+
+    @property
+    def plan_line(self) -> str:
+        return f"unchanged {self.rendered}" if self.action == "unchanged" else self.rendered
+
+
+class SymlinkReconciler:
+    # Links that already point at the right target are left untouched so file watchers see no churn.
+    def __init__(self, *, dry_run: bool) -> None:
+        self.dry_run = dry_run
+        self._lock = threading.Lock()
+        self._parents: set[Path] = set()
+        self._counts = dict.fromkeys(LINK_ACTIONS, 0)
+
+    @property
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reconcile(self, link_path: Path, target_path: Path) -> LinkOutcome:
+        rendered = f"ln -s {target_path} {link_path}"
+        try:
+            current = os.readlink(link_path)
+        except FileNotFoundError:
+            action = "created"
+        except OSError:
+            if os.path.lexists(link_path):
+                raise SymlinkConflictError(
+                    f"cannot create symlink at '{link_path}': path already exists and is not a symlink"
+                ) from None
+            action = "created"
+        else:
+            action = "unchanged" if current == str(target_path) else "updated"
+
+        if action != "unchanged" and not self.dry_run:
+            with span("symlink", "fs", link=str(link_path), target=str(target_path), action=action):
+                self._ensure_parent(link_path.parent)
+                _swap_symlink(link_path, target_path)
+        with self._lock:
+            self._counts[action] += 1
+        return LinkOutcome(link_path=link_path, target_path=target_path, action=action, rendered=rendered)
+
+    def _ensure_parent(self, parent: Path) -> None:
+        with self._lock:
+            if parent in self._parents:
+                return
+        parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._parents.update((parent, *parent.parents))
 
 
 def ensure_symlink(*, link_path: Path, target_path: Path, dry_run: bool) -> str:
-    rendered = f"ln -s {target_path} {link_path}"
-    if dry_run:
-        return rendered
-
-    if link_path.is_symlink():
-        link_path.unlink()
-    elif link_path.exists():
-        raise SymlinkConflictError(
-            f"cannot create symlink at '{link_path}': path already exists and is not a symlink"
-        )
-    elif os.path.lexists(link_path):
-        link_path.unlink()
-
-    link_path.parent.mkdir(parents=True, exist_ok=True)
-    link_path.symlink_to(target_path)
-    return rendered
+    return SymlinkReconciler(dry_run=dry_run).reconcile(link_path, target_path).rendered
+
+
+def _swap_symlink(link_path: Path, target_path: Path) -> None:
+    # rename(2) replaces the old link in one step, so readers never observe a missing path.
+    tmp_path = link_path.with_name(f".{link_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+    os.symlink(target_path, tmp_path)
+    try:
+        os.replace(tmp_path, link_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
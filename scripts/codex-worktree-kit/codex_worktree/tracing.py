@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+
+# Only one tracer is active per process; worker threads of the bootstrap scheduler report into it.
+_active: Tracer | None = None
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    name: str
+    category: str
+    start_ns: int
+    end_ns: int
+    thread: str
+    args: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._events: list[TraceEvent] = []
+
+    @property
+    def events(self) -> list[TraceEvent]:
+        with self._lock:
+            return sorted(self._events, key=lambda event: event.start_ns)
+
+    def record(self, event: TraceEvent) -> None:
+        with self._lock:
+            self._events.append(event)
+
+    def summary_rows(self) -> list[tuple[str, str, int, float, float]]:
+        totals: dict[tuple[str, str], list[float]] = {}
+        for event in self.events:
+            totals.setdefault((event.category, event.name), []).append(event.duration_ms)
+        rows = [
+            (category, name, len(durations), sum(durations), max(durations))
+            for (category, name), durations in totals.items()
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        pid = os.getpid()
+        thread_ids: dict[str, int] = {}
+        trace_events: list[dict[str, Any]] = []
+        for event in self.events:
+            tid = thread_ids.setdefault(event.thread, len(thread_ids) + 1)
+            trace_events.append(
+                {
+                    "name": event.name,
+                    "cat": event.category,
+                    "ph": "X",
+                    "ts": (event.start_ns - self.origin_ns) / 1000,
+                    "dur": (event.end_ns - event.start_ns) / 1000,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": event.args,
+                }
+            )
+        for thread, tid in thread_ids.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread}})
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Path) -> None:
+        import json
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace(), default=str), encoding="utf-8")
+
+
+@contextmanager
+def activate(tracer: Tracer) -> Iterator[Tracer]:
+    global _active
+    previous, _active = _active, tracer
+    try:
+        yield tracer
+    finally:
+        _active = previous
+
+
+@contextmanager
+def span(name: str, category: str, **args: Any) -> Iterator[dict[str, Any]]:
+    tracer = _active
+    if tracer is None:
+        yield args
+        return
+    start_ns = time.perf_counter_ns()
+    try:
+        yield args
+    except BaseException as error:
+        args.setdefault("error", f"{type(error).__name__}: {error}")
+        raise
+    finally:
+        tracer.record(
+            TraceEvent(
+                name=name,
+                category=category,
+                start_ns=start_ns,
+                end_ns=time.perf_counter_ns(),
+                thread=threading.current_thread().name,
+                args=args,
+            )
+        )
+
+
+def run_process(args: list[str], *, category: str = "git", **kwargs: Any) -> Any:
+    import subprocess
+
+    cwd = str(kwargs.get("cwd") or _git_cwd(args) or os.getcwd())
+    with span(command_name(args), category, argv=args, cwd=cwd) as record:
+        completed = subprocess.run(args, **kwargs)
+        record["exit_code"] = completed.returncode
+    return completed
+
+
+def plan_from_events(events: list[TraceEvent]) -> list[str]:
+    planned = [event for event in events if "plan" in event.args]
+    planned.sort(key=lambda event: event.args.get("order", 0))
+    return [line for event in planned for line in event.args["plan"]]
+
+
+def command_name(args: list[str]) -> str:
+    words = list(args)
+    if words[:1] != ["git"]:
+        return words[0] if words else ""
+    index = 1
+    while index < len(words) and words[index] in {"-C", "-c"}:
+        index += 2
+    return f"git {words[index]}" if index < len(words) else "git"
+
+
+def _git_cwd(args: list[str]) -> str | None:
+    try:
+        return args[args.index("-C") + 1]
+    except (ValueError, IndexError):
+        return None
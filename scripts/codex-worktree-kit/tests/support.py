@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from codex_worktree.config_cache import CACHE_DIR_ENV
+
+
+class IsolatedCacheTestCase(unittest.TestCase):
+    """Points CODEX_WORKTREE_CACHE_DIR at a per-test scratch directory.
+
+    Keeps compiled-config pickles and daemon sockets out of the developer's real cache under both
+    `python -m pytest` and `python -m unittest discover -s tests`.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        patcher = mock.patch.dict(os.environ, {CACHE_DIR_ENV: str(Path(tmp.name) / "codex-worktree-cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
@@ -4,8 +4,10 @@ import tempfile
 import unittest
 from pathlib import Path
 
+from support import IsolatedCacheTestCase
 
-class BinScriptTests(unittest.TestCase):
+
+class BinScriptTests(IsolatedCacheTestCase):
     def test_validate_config_wrapper_uses_project_venv_python(self) -> None:
         project_root = Path(__file__).resolve().parent.parent
         fake_bin = Path(tempfile.mkdtemp())
@@ -1,18 +1,25 @@
 import io
+import os
 import tempfile
 import textwrap
+import threading
+import time
 import unittest
-from contextlib import redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout
 from pathlib import Path
 
 from codex_worktree.bootstrap import bootstrap_repository
+from codex_worktree.cli import main
 from codex_worktree.config import parse_config
-from codex_worktree.errors import StepExecutionError, SymlinkConflictError
+from codex_worktree.errors import GitCommandError, StepExecutionError, SymlinkConflictError
 from codex_worktree.git_ops import GitRunner, GitResult
-from codex_worktree.symlink_ops import ensure_symlink
+from codex_worktree.symlink_ops import SymlinkReconciler, ensure_symlink
+from codex_worktree.tracing import Tracer, activate, plan_from_events
 
+from support import IsolatedCacheTestCase
 
-class BootstrapPlanTests(unittest.TestCase):
+
+class BootstrapPlanTests(IsolatedCacheTestCase):
     def test_symlink_collision_raises_for_real_directory(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             root_dir = Path(tmp) / "backend"
@@ -23,6 +30,87 @@ class BootstrapPlanTests(unittest.TestCase):
             with self.assertRaises(SymlinkConflictError):
                 ensure_symlink(link_path=root_dir / ".docs", target_path=target, dry_run=False)
 
+    def test_symlink_reconciliation_leaves_correct_links_alone(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            old_target = base / "docs-old"
+            new_target = base / "docs-new"
+            correct = base / "backend" / ".docs"
+            stale = base / "backend" / "nested" / ".web"
+            fresh = base / "backend" / "nested" / ".api"
+            correct.parent.mkdir(parents=True)
+            correct.symlink_to(new_target)
+            stale.parent.mkdir(parents=True)
+            stale.symlink_to(old_target)
+            inode = correct.lstat().st_ino
+
+            reconciler = SymlinkReconciler(dry_run=False)
+            outcomes = [reconciler.reconcile(link, new_target) for link in (correct, stale, fresh)]
+
+            self.assertEqual([outcome.action for outcome in outcomes], ["unchanged", "updated", "created"])
+            self.assertEqual(reconciler.counts, {"created": 1, "updated": 1, "unchanged": 1})
+            self.assertEqual(correct.lstat().st_ino, inode)
+            self.assertEqual(os.readlink(stale), str(new_target))
+            self.assertEqual(os.readlink(fresh), str(new_target))
+            self.assertEqual(sorted(path.name for path in stale.parent.iterdir()), [".api", ".web"])
+
+    def test_bootstrap_rerun_keeps_existing_links(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            docs_repo = base / "docs-source"
+            (docs_repo / ".git").mkdir(parents=True)
+            config = self._load_config(base)
+
+            for _ in range(2):
+                result = bootstrap_repository(
+                    root_dir=root_dir,
+                    config=config,
+                    env={"CODEX_DOCS_REPO": str(docs_repo)},
+                    git=RecordingGitRunner(),
+                    command_runner=lambda argv, cwd: 0,
+                )
+
+            self.assertEqual(result.link_counts, {"created": 0, "updated": 0, "unchanged": 1})
+            self.assertEqual(os.readlink(root_dir / ".docs"), str((base / "docs").resolve()))
+
+    def test_bootstrap_command_reports_link_counts(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            (base / "docs" / ".git").mkdir(parents=True)
+            config_path = base / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [repos.docs]
+                    discover = ["../docs"]
+                    required = true
+
+                    [[links]]
+                    path = ".docs"
+                    repo = "docs"
+                    """
+                ),
+                encoding="utf-8",
+            )
+            argv = ["bootstrap", "--root-dir", str(root_dir), "--config", str(config_path)]
+
+            reports = []
+            for _ in range(2):
+                with redirect_stderr(io.StringIO()) as stderr:
+                    self.assertEqual(main(argv, env={}), 0)
+                reports.append(stderr.getvalue())
+
+            self.assertEqual(
+                reports,
+                ["links: 1 created, 0 updated, 0 unchanged\n", "links: 0 created, 0 updated, 1 unchanged\n"],
+            )
+
     def test_bootstrap_dry_run_prints_plan(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             base = Path(tmp)
@@ -51,6 +139,36 @@ class BootstrapPlanTests(unittest.TestCase):
             self.assertIn("make docs-catalog", rendered)
             self.assertTrue(result.plan)
 
+    def test_trace_events_cover_steps_and_reproduce_plan(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            docs_repo = base / "docs-source"
+            docs_repo.mkdir()
+            (docs_repo / ".git").mkdir()
+            config = self._load_config(base)
+            tracer = Tracer()
+
+            with activate(tracer):
+                result = bootstrap_repository(
+                    root_dir=root_dir,
+                    config=config,
+                    env={"CODEX_DOCS_REPO": str(docs_repo)},
+                    git=RecordingGitRunner(),
+                    command_runner=lambda argv, cwd: 0,
+                )
+
+            events = tracer.events
+            self.assertEqual(plan_from_events(events), result.plan)
+            steps = [event for event in events if event.category == "step"]
+            self.assertEqual(sorted(event.args["step"] for event in steps), ["docs-catalog", "sync-openapi"])
+            self.assertTrue(all(event.args["exit_code"] == 0 and event.args["cwd"] for event in steps))
+            self.assertTrue(any(event.category == "fs" and event.name == "symlink" for event in events))
+            trace = tracer.chrome_trace()["traceEvents"]
+            self.assertEqual({event["ph"] for event in trace}, {"X", "M"})
+            self.assertEqual(tracer.summary_rows()[0][3], max(row[3] for row in tracer.summary_rows()))
+
     def test_step_failure_propagates_exit_code(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             base = Path(tmp)
@@ -77,7 +195,265 @@ class BootstrapPlanTests(unittest.TestCase):
             self.assertEqual(ctx.exception.returncode, 23)
             self.assertEqual(ctx.exception.step_name, "sync-openapi")
 
-    def _load_config(self, base: Path):
+    def test_steps_run_after_their_dependencies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            docs_repo = base / "docs-source"
+            docs_repo.mkdir()
+            (docs_repo / ".git").mkdir()
+            config = self._load_config(
+                base,
+                extra_steps="""
+                [[steps]]
+                name = "lint"
+                cwd = "."
+                run = ["make", "lint"]
+                depends_on = ["sync-openapi"]
+                """,
+            )
+            lock = threading.Lock()
+            finished: list[str] = []
+
+            def command_runner(argv: list[str], cwd: Path) -> int:
+                if argv[-1] == "sync-openapi":
+                    time.sleep(0.05)
+                with lock:
+                    finished.append(argv[-1])
+                return 0
+
+            result = bootstrap_repository(
+                root_dir=root_dir,
+                config=config,
+                env={"CODEX_DOCS_REPO": str(docs_repo)},
+                git=RecordingGitRunner(),
+                dry_run=False,
+                command_runner=command_runner,
+                jobs=4,
+            )
+
+            self.assertLess(finished.index("sync-openapi"), finished.index("lint"))
+            self.assertEqual(finished[0], "docs-catalog")
+            self.assertTrue(result.plan[-3].endswith("make sync-openapi)"))
+            self.assertTrue(result.plan[-2].endswith("make docs-catalog)"))
+            self.assertTrue(result.plan[-1].endswith("make lint)"))
+
+    def test_steps_without_depends_on_keep_declaration_order(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            docs_repo = base / "docs-source"
+            docs_repo.mkdir()
+            (docs_repo / ".git").mkdir()
+            config = self._load_config(base)
+            finished: list[str] = []
+
+            def command_runner(argv: list[str], cwd: Path) -> int:
+                if argv[-1] == "sync-openapi":
+                    time.sleep(0.05)
+                finished.append(argv[-1])
+                return 0
+
+            bootstrap_repository(
+                root_dir=root_dir,
+                config=config,
+                env={"CODEX_DOCS_REPO": str(docs_repo)},
+                git=RecordingGitRunner(),
+                dry_run=False,
+                command_runner=command_runner,
+                jobs=4,
+            )
+
+            self.assertEqual(finished, ["sync-openapi", "docs-catalog"])
+
+    def test_failed_step_skips_dependents(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            root_dir.mkdir()
+            docs_repo = base / "docs-source"
+            docs_repo.mkdir()
+            (docs_repo / ".git").mkdir()
+            config = self._load_config(
+                base,
+                extra_steps="""
+                [[steps]]
+                name = "lint"
+                cwd = "."
+                run = ["make", "lint"]
+                depends_on = ["docs-catalog"]
+                """,
+            )
+            executed: list[str] = []
+
+            def command_runner(argv: list[str], cwd: Path) -> int:
+                executed.append(argv[-1])
+                return 5 if argv[-1] == "docs-catalog" else 0
+
+            with self.assertRaises(StepExecutionError) as ctx:
+                bootstrap_repository(
+                    root_dir=root_dir,
+                    config=config,
+                    env={"CODEX_DOCS_REPO": str(docs_repo)},
+                    git=RecordingGitRunner(),
+                    dry_run=False,
+                    command_runner=command_runner,
+                    jobs=1,
+                )
+
+            self.assertEqual(ctx.exception.step_name, "docs-catalog")
+            self.assertNotIn("lint", executed)
+
+    def test_step_cache_skips_unchanged_inputs_and_restores_across_worktrees(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            (root_dir / ".git").mkdir(parents=True)
+            sibling = base / "agent-1"
+            sibling.mkdir()
+            (root_dir / ".git" / "worktrees" / "agent-1").mkdir(parents=True)
+            (root_dir / ".git" / "worktrees" / "agent-1" / "commondir").write_text("../..\n", encoding="utf-8")
+            (sibling / ".git").write_text(f"gitdir: {root_dir / '.git' / 'worktrees' / 'agent-1'}\n", encoding="utf-8")
+            for worktree in (root_dir, sibling):
+                (worktree / "openapi").mkdir()
+                (worktree / "openapi" / "api.yaml").write_text("v1\n", encoding="utf-8")
+            config_path = base / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [[steps]]
+                    name = "sync-openapi"
+                    cwd = "."
+                    run = ["make", "sync-openapi"]
+                    inputs = ["openapi/*.yaml"]
+                    outputs = ["generated"]
+                    """
+                ),
+                encoding="utf-8",
+            )
+            config = parse_config(config_path, use_cache=False)
+            executed: list[Path] = []
+
+            def command_runner(argv: list[str], cwd: Path) -> int:
+                executed.append(cwd)
+                (cwd / "generated").mkdir(exist_ok=True)
+                spec = (cwd / "openapi" / "api.yaml").read_text(encoding="utf-8")
+                (cwd / "generated" / "types.ts").write_text(f"// {spec}", encoding="utf-8")
+                return 0
+
+            def bootstrap(worktree: Path) -> list[str]:
+                return bootstrap_repository(
+                    root_dir=worktree,
+                    config=config,
+                    env={},
+                    git=RecordingGitRunner(),
+                    command_runner=command_runner,
+                ).plan
+
+            bootstrap(root_dir)
+            self.assertTrue(bootstrap(root_dir)[-1].startswith("skip "))
+            self.assertEqual(executed, [root_dir])
+
+            restored = bootstrap(sibling)
+            self.assertTrue(restored[-1].startswith("restore "))
+            self.assertEqual((sibling / "generated" / "types.ts").read_text(encoding="utf-8"), "// v1\n")
+            self.assertEqual(executed, [root_dir])
+
+            (root_dir / "openapi" / "api.yaml").write_text("v2\n", encoding="utf-8")
+            bootstrap(root_dir)
+            self.assertEqual(executed, [root_dir, root_dir])
+            self.assertEqual((root_dir / "generated" / "types.ts").read_text(encoding="utf-8"), "// v2\n")
+
+    def test_incremental_bootstrap_applies_only_config_changes(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            (root_dir / ".git").mkdir(parents=True)
+            docs_repo = base / "docs-source"
+            (docs_repo / ".git").mkdir(parents=True)
+            env = {"CODEX_DOCS_REPO": str(docs_repo)}
+            executed: list[str] = []
+
+            def bootstrap(config, git: RecordingGitRunner) -> list[str]:
+                return bootstrap_repository(
+                    root_dir=root_dir,
+                    config=config,
+                    env=env,
+                    git=git,
+                    command_runner=lambda argv, cwd: executed.append(argv[-1]) or 0,
+                    incremental=True,
+                ).plan
+
+            bootstrap(self._load_config(base), RecordingGitRunner())
+            self.assertEqual(sorted(executed), ["docs-catalog", "sync-openapi"])
+
+            git = RecordingGitRunner()
+            plan = bootstrap(self._load_config(base), git)
+            self.assertEqual(sorted(executed), ["docs-catalog", "sync-openapi"])
+            self.assertEqual([command[0] for command in git.commands], [])
+            self.assertTrue(any(line.startswith("unchanged ln -s") for line in plan))
+
+            config_path = base / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [git]
+                    hooks_path = ".githooks"
+
+                    [[steps]]
+                    name = "sync-openapi"
+                    cwd = "."
+                    run = ["make", "sync-openapi-v2"]
+                    """
+                ),
+                encoding="utf-8",
+            )
+            git = RecordingGitRunner()
+            plan = bootstrap(parse_config(config_path, use_cache=False), git)
+
+            self.assertEqual(executed[-1], "sync-openapi-v2")
+            self.assertFalse((root_dir / ".docs").is_symlink())
+            self.assertIn(f"rm {root_dir / '.docs'}", plan)
+            self.assertEqual(git.commands, [("remove_worktree", docs_repo, (base / "docs").resolve(), False)])
+
+    def test_dirty_dropped_worktree_is_kept_instead_of_aborting(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            root_dir = base / "backend"
+            (root_dir / ".git").mkdir(parents=True)
+            docs_repo = base / "docs-source"
+            (docs_repo / ".git").mkdir(parents=True)
+            env = {"CODEX_DOCS_REPO": str(docs_repo)}
+
+            def bootstrap(config, git: RecordingGitRunner) -> list[str]:
+                return bootstrap_repository(
+                    root_dir=root_dir,
+                    config=config,
+                    env=env,
+                    git=git,
+                    command_runner=lambda argv, cwd: 0,
+                    incremental=True,
+                ).plan
+
+            bootstrap(self._load_config(base), RecordingGitRunner())
+            config_path = base / "worktree.toml"
+            config_path.write_text('version = 1\n\n[git]\nhooks_path = ".githooks"\n', encoding="utf-8")
+
+            with redirect_stderr(io.StringIO()) as stderr:
+                plan = bootstrap(parse_config(config_path, use_cache=False), RecordingGitRunner(dirty_worktrees=True))
+
+            docs_worktree = (base / "docs").resolve()
+            self.assertIn(f"keep {docs_worktree} (has local changes)", plan)
+            self.assertIn("contains modified or untracked files", stderr.getvalue())
+            self.assertTrue(docs_worktree.exists())
+
+    def _load_config(self, base: Path, *, extra_steps: str = ""):
         config_path = base / "worktree.toml"
         config_path.write_text(
             textwrap.dedent(
@@ -108,15 +484,17 @@ class BootstrapPlanTests(unittest.TestCase):
                 cwd = ".docs"
                 run = ["make", "docs-catalog"]
                 """
-            ),
+            )
+            + textwrap.dedent(extra_steps),
             encoding="utf-8",
         )
         return parse_config(config_path)
 
 
 class RecordingGitRunner(GitRunner):
-    def __init__(self, *, skip_existing_worktree: bool = False):
+    def __init__(self, *, skip_existing_worktree: bool = False, dirty_worktrees: bool = False):
         self.skip_existing_worktree = skip_existing_worktree
+        self.dirty_worktrees = dirty_worktrees
         self.commands = []
 
     def current_branch(self, repo: Path) -> str | None:
@@ -147,6 +525,16 @@ class RecordingGitRunner(GitRunner):
             (path / ".git").mkdir(exist_ok=True)
         return GitResult(args=["git", "worktree", "add"], returncode=0, stdout=str(path), stderr="")
 
+    def remove_worktree(self, repo: Path, path: Path, *, force: bool = False, dry_run: bool = False) -> GitResult:
+        self.commands.append(("remove_worktree", repo, path, dry_run))
+        if self.dirty_worktrees:
+            raise GitCommandError(
+                args=["git", "worktree", "remove", str(path)],
+                returncode=128,
+                stderr=f"fatal: '{path}' contains modified or untracked files, use --force to delete it\n",
+            )
+        return GitResult(args=["git", "worktree", "remove", str(path)], returncode=0, stdout="", stderr="")
+
     def set_hooks_path(self, repo: Path, hooks_path: str, *, dry_run: bool = False) -> GitResult:
         self.commands.append(("set_hooks_path", repo, hooks_path, dry_run))
         return GitResult(args=["git", "config", "core.hooksPath", hooks_path], returncode=0, stdout="", stderr="")
@@ -1,21 +1,35 @@
+import subprocess
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from codex_worktree.branching import select_branch_name
-from codex_worktree.config import AppConfig, WorktreeConfig
-from codex_worktree.create_worktree import create_primary_worktree
+from codex_worktree.config import AppConfig, CheckoutConfig, SeedConfig, WorktreeConfig
+from codex_worktree.create_worktree import create_primary_worktree, create_primary_worktrees
 from codex_worktree.create_worktree import resolve_primary_worktree_root
 from codex_worktree.errors import CodexWorktreeError, GitCommandError
-from codex_worktree.git_ops import GitRunner, GitResult
+from codex_worktree.git_ops import GitRunner, GitResult, SubprocessGitRunner
+
+from support import IsolatedCacheTestCase
 
 
 class FakeGitRunner(GitRunner):
-    def __init__(self, *, current_branch=None, valid_branch_names=None, existing_branches=None, worktree_error=None):
+    def __init__(
+        self,
+        *,
+        current_branch=None,
+        valid_branch_names=None,
+        existing_branches=None,
+        worktree_error=None,
+        worktree_errors=None,
+    ):
         self._current_branch = current_branch
         self._valid_branch_names = valid_branch_names or set()
         self._existing_branches = existing_branches or set()
         self._worktree_error = worktree_error
+        self._worktree_errors = worktree_errors or {}
+        self.added = []
 
     def current_branch(self, repo: Path) -> str | None:
         return self._current_branch
@@ -39,13 +53,17 @@ class FakeGitRunner(GitRunner):
     ) -> GitResult:
         if self._worktree_error is not None:
             raise self._worktree_error
-        return GitResult(args=["git"], returncode=0, stdout=str(path), stderr="")
+        pending = self._worktree_errors.get(branch)
+        if pending:
+            raise pending.pop(0)
+        self.added.append(branch)
+        return GitResult(args=["git", "worktree", "add", str(path)], returncode=0, stdout=str(path), stderr="")
 
     def set_hooks_path(self, repo: Path, hooks_path: str, *, dry_run: bool = False) -> GitResult:
         return GitResult(args=["git"], returncode=0, stdout="", stderr="")
 
 
-class CreateWorktreeTests(unittest.TestCase):
+class CreateWorktreeTests(IsolatedCacheTestCase):
     def test_branch_strategy_prefers_current_branch(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             consumer = Path(tmp) / "backend"
@@ -124,6 +142,170 @@ class CreateWorktreeTests(unittest.TestCase):
 
             self.assertEqual(ctx.exception.returncode, 17)
 
+    def test_batch_creation_reports_each_name(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            root_dir.mkdir()
+            (Path(tmp) / "wt" / "taken").mkdir(parents=True)
+            lock_error = GitCommandError(
+                args=["git", "worktree", "add"],
+                returncode=128,
+                stderr="fatal: Unable to create '/repo/.git/index.lock': File exists.",
+            )
+            git = FakeGitRunner(worktree_errors={"agent-2": [lock_error]})
+            bootstrapped = []
+
+            results = create_primary_worktrees(
+                root_dir=root_dir,
+                names=["agent-1", "agent-2", "taken"],
+                config=AppConfig(version=1, worktree=WorktreeConfig(configured=True)),
+                worktree_root=Path(tmp) / "wt",
+                env={},
+                git=git,
+                jobs=3,
+                bootstrap=bootstrapped.append,
+            )
+
+            self.assertEqual([result.name for result in results], ["agent-1", "agent-2", "taken"])
+            self.assertEqual([result.ok for result in results], [True, True, False])
+            self.assertIn("already exists", results[2].error)
+            self.assertEqual(sorted(git.added), ["agent-1", "agent-2"])
+            self.assertEqual(sorted(path.name for path in bootstrapped), ["agent-1", "agent-2"])
+
+    def test_lock_contention_is_not_retried_after_a_partial_add(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            root_dir.mkdir()
+            lock_error = GitCommandError(
+                args=["git", "worktree", "add"],
+                returncode=128,
+                stderr="fatal: cannot lock ref 'refs/heads/agent-2'",
+            )
+            # The failed attempt already created the branch, so a retry would fail differently.
+            git = FakeGitRunner(worktree_errors={"agent-2": [lock_error]}, existing_branches={"agent-2"})
+
+            results = create_primary_worktrees(
+                root_dir=root_dir,
+                names=["agent-1", "agent-2"],
+                config=AppConfig(version=1, worktree=WorktreeConfig(configured=True)),
+                worktree_root=Path(tmp) / "wt",
+                env={},
+                git=git,
+            )
+
+            self.assertEqual([result.ok for result in results], [True, False])
+            self.assertIn("cannot lock ref", results[1].error)
+            self.assertEqual(git.added, ["agent-1"])
+
+    def test_batch_creation_reports_seed_os_errors_per_worktree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            root_dir.mkdir()
+            seeded = []
+
+            def seed_directory(*, source, target, **kwargs):
+                if target.parent.name == "agent-2":
+                    raise OSError(28, "No space left on device")
+                seeded.append(target.parent.name)
+                return mock.Mock(rendered=f"seed {target}")
+
+            with mock.patch("codex_worktree.seed_ops.seed_directory", side_effect=seed_directory):
+                results = create_primary_worktrees(
+                    root_dir=root_dir,
+                    names=["agent-1", "agent-2"],
+                    config=AppConfig(
+                        version=1,
+                        worktree=WorktreeConfig(configured=True),
+                        seeds=[SeedConfig(path="node_modules")],
+                    ),
+                    worktree_root=Path(tmp) / "wt",
+                    env={},
+                    git=FakeGitRunner(),
+                )
+
+            self.assertEqual([result.ok for result in results], [True, False])
+            self.assertIn("No space left on device", results[1].error)
+            self.assertEqual(seeded, ["agent-1"])
+
+    def test_batch_creation_rejects_duplicate_names(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            root_dir.mkdir()
+
+            with self.assertRaises(CodexWorktreeError):
+                create_primary_worktrees(
+                    root_dir=root_dir,
+                    names=["agent-1", "agent-1"],
+                    config=AppConfig(version=1, worktree=WorktreeConfig(configured=True)),
+                    worktree_root=None,
+                    env={},
+                    git=FakeGitRunner(),
+                    dry_run=True,
+                )
+
+    def test_seeds_are_copied_into_new_worktree(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            (root_dir / "node_modules" / "pkg").mkdir(parents=True)
+            (root_dir / "node_modules" / "pkg" / "index.js").write_text("module.exports = 1\n", encoding="utf-8")
+            config = AppConfig(
+                version=1,
+                worktree=WorktreeConfig(configured=True),
+                seeds=[SeedConfig(path="node_modules"), SeedConfig(path=".venv")],
+            )
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="agent-1",
+                config=config,
+                worktree_root=Path(tmp) / "wt",
+                env={},
+                git=FakeGitRunner(),
+            )
+
+            self.assertEqual(
+                (result.path / "node_modules" / "pkg" / "index.js").read_text(encoding="utf-8"),
+                "module.exports = 1\n",
+            )
+            self.assertEqual([seed.files for seed in result.seeds], [1, 0])
+            self.assertEqual(result.seeds[1].method, "missing")
+            self.assertTrue(result.plan[1].startswith("seed "))
+
+    def test_sparse_checkout_only_materializes_configured_directories(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root_dir = Path(tmp) / "backend"
+            for relative in ["api/main.py", "web/app.ts", "docs/readme.md"]:
+                (root_dir / relative).parent.mkdir(parents=True, exist_ok=True)
+                (root_dir / relative).write_text("x\n", encoding="utf-8")
+            for args in (["init", "-q", "-b", "main"], ["add", "."], ["commit", "-q", "-m", "init"]):
+                subprocess.run(
+                    ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(root_dir), *args],
+                    check=True,
+                )
+            config = AppConfig(
+                version=1,
+                worktree=WorktreeConfig(
+                    configured=True,
+                    checkout=CheckoutConfig(sparse_checkout=["api"], skip_lfs_smudge=True),
+                ),
+            )
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="agent-1",
+                config=config,
+                worktree_root=Path(tmp) / "wt",
+                env={},
+                git=SubprocessGitRunner(),
+            )
+
+            self.assertTrue((result.path / "api" / "main.py").exists())
+            self.assertFalse((result.path / "web").exists())
+            self.assertIn("--no-checkout", result.plan[0])
+            self.assertIn("sparse-checkout set --cone api", result.plan[1])
+            self.assertTrue(result.plan[2].startswith("git -C "))
+            self.assertIn("read-tree -mu HEAD", result.plan[2])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,125 @@
+import os
+import socket
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from codex_worktree import client
+from codex_worktree.client import request
+from codex_worktree.daemon import create_server, handle_request, is_servable
+
+from support import IsolatedCacheTestCase
+
+
+class DaemonTests(IsolatedCacheTestCase):
+    def test_serves_read_only_commands_over_socket(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            consumer = base / "backend"
+            docs = base / "docs"
+            consumer.mkdir()
+            (docs / ".git").mkdir(parents=True)
+            config_path = base / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [repos.docs]
+                    discover = ["../docs"]
+                    required = true
+                    """
+                ),
+                encoding="utf-8",
+            )
+            socket_path = base / "daemon.sock"
+            env = {"CODEX_WORKTREE_CACHE_DIR": str(base / "cache")}
+            original_cwd = os.getcwd()
+            server = create_server(socket_path)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                resolved = request(
+                    str(socket_path),
+                    ["resolve-repo", "--root-dir", "backend", "--config", "worktree.toml", "--repo-key", "docs"],
+                    cwd=str(base),
+                    env=env,
+                )
+                unknown = request(
+                    str(socket_path),
+                    ["resolve-repo", "--root-dir", "backend", "--config", "worktree.toml", "--repo-key", "api"],
+                    cwd=str(base),
+                    env=env,
+                )
+                mutating = request(
+                    str(socket_path),
+                    ["bootstrap", "--root-dir", "backend", "--config", "worktree.toml"],
+                    cwd=str(base),
+                    env=env,
+                )
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            self.assertEqual(resolved, {"returncode": 0, "stdout": f"{docs.resolve()}\n", "stderr": ""})
+            self.assertEqual(unknown["returncode"], 1)
+            self.assertIn("unknown repo key: api", unknown["stderr"])
+            self.assertIsNone(mutating)
+            self.assertEqual(os.getcwd(), original_cwd)
+
+    def test_request_environment_applies_during_the_call(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            (base / "backend").mkdir()
+            (base / "home" / "docs" / ".git").mkdir(parents=True)
+            (base / "worktree.toml").write_text(
+                'version = 1\n\n[repos.docs]\nrepo_env = ["CODEX_DOCS_REPO"]\nrequired = true\n',
+                encoding="utf-8",
+            )
+            env = {
+                "CODEX_WORKTREE_CACHE_DIR": str(base / "cache"),
+                "HOME": str(base / "home"),
+                "CODEX_DOCS_REPO": "~/docs",
+            }
+            original_home = os.environ.get("HOME")
+
+            argv = ["resolve-repo", "--root-dir", "backend", "--config", "worktree.toml", "--repo-key", "docs"]
+            response = handle_request({"argv": argv, "cwd": str(base), "env": env})
+
+            self.assertEqual(response["stdout"], f"{(base / 'home' / 'docs').resolve()}\n")
+            self.assertEqual(os.environ.get("HOME"), original_home)
+            self.assertNotIn("CODEX_DOCS_REPO", os.environ)
+
+    def test_unresponsive_daemon_falls_back_after_read_timeout(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            socket_path = Path(tmp) / "daemon.sock"
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+                listener.bind(str(socket_path))
+                listener.listen(1)
+                with mock.patch.object(client, "READ_TIMEOUT", 0.1):
+                    started = time.monotonic()
+                    response = request(str(socket_path), ["validate-config"], cwd=tmp, env={})
+
+            self.assertIsNone(response)
+            self.assertLess(time.monotonic() - started, 2)
+
+    def test_missing_socket_falls_back(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            response = request(str(Path(tmp) / "missing.sock"), ["validate-config"], cwd=tmp, env={})
+
+            self.assertIsNone(response)
+
+    def test_only_side_effect_free_commands_are_servable(self) -> None:
+        self.assertTrue(is_servable(["resolve-repo", "--repo-key", "docs"]))
+        self.assertTrue(is_servable(["validate-config", "--config", "x"]))
+        self.assertTrue(is_servable(["bootstrap", "--dry-run"]))
+        self.assertFalse(is_servable(["bootstrap"]))
+        self.assertFalse(is_servable(["create-worktree", "x", "--dry-run"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
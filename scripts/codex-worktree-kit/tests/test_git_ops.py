@@ -0,0 +1,60 @@
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from codex_worktree.git_ops import BatchGitRunner
+
+from support import IsolatedCacheTestCase
+
+
+class BatchGitRunnerTests(IsolatedCacheTestCase):
+    def test_answers_branch_queries_from_session(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "repo"
+            _init_repo(repo, branch="feature/docs-sync")
+            _git(repo, "branch", "other")
+
+            with BatchGitRunner() as git:
+                self.assertEqual(git.current_branch(repo), "feature/docs-sync")
+                self.assertTrue(git.branch_exists(repo, "other"))
+                self.assertFalse(git.branch_exists(repo, "missing"))
+                self.assertTrue(git.branch_exists(repo, "feature/docs-sync"))
+
+    def test_detached_head_has_no_current_branch(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "repo"
+            _init_repo(repo, branch="main")
+            _git(repo, "checkout", "--detach")
+
+            with BatchGitRunner() as git:
+                self.assertIsNone(git.current_branch(repo))
+
+    def test_add_worktree_invalidates_snapshot(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "repo"
+            _init_repo(repo, branch="main")
+
+            with BatchGitRunner() as git:
+                self.assertNotIn("refs/heads/feature-x", git.ref_snapshot(repo).refs)
+                git.add_worktree(repo, Path(tmp) / "feature-x", branch="feature-x", create_branch=True, start_point="HEAD")
+                self.assertIn("refs/heads/feature-x", git.ref_snapshot(repo).refs)
+                self.assertTrue(git.branch_exists(repo, "feature-x"))
+
+
+def _init_repo(path: Path, *, branch: str) -> None:
+    path.mkdir(parents=True)
+    _git(path, "init", "-q", "-b", branch)
+    _git(path, "commit", "-q", "--allow-empty", "-m", "init")
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+if __name__ == "__main__":
+    unittest.main()
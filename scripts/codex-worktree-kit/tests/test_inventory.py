@@ -0,0 +1,205 @@
+import os
+import subprocess
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from codex_worktree.bootstrap_state import BootstrapState, bootstrap_state_path, store_bootstrap_state
+from codex_worktree.git_ops import SubprocessGitRunner
+from codex_worktree.inventory import GcPolicy, collect_inventory, parse_worktree_porcelain, plan_gc, run_gc, scan_usage
+
+from support import IsolatedCacheTestCase
+
+
+DAY = 24 * 60 * 60
+
+
+class InventoryTests(IsolatedCacheTestCase):
+    def test_parse_worktree_porcelain(self) -> None:
+        records = parse_worktree_porcelain(
+            "worktree /src/app\nHEAD abc\nbranch refs/heads/main\n\n"
+            "worktree /wt/feature\nHEAD def\nbranch refs/heads/feature/x\nlocked in use\n\n"
+            "worktree /wt/gone\nHEAD 123\ndetached\nprunable gitdir file points to non-existent location\n"
+        )
+
+        self.assertEqual([record.path for record in records], [Path("/src/app"), Path("/wt/feature"), Path("/wt/gone")])
+        self.assertTrue(records[0].is_main)
+        self.assertEqual(records[1].branch, "feature/x")
+        self.assertTrue(records[1].locked)
+        self.assertTrue(records[2].detached)
+        self.assertTrue(records[2].prunable)
+        self.assertIsNone(records[2].branch)
+
+    def test_scan_usage_skips_symlinks_and_counts_hardlinks_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "tree"
+            (root / "sub").mkdir(parents=True)
+            (root / "sub" / "a.txt").write_bytes(b"a" * 10_000)
+            os.link(root / "sub" / "a.txt", root / "b.txt")
+            outside = Path(tmp) / "outside"
+            outside.mkdir()
+            (outside / "big.bin").write_bytes(b"b" * 100_000)
+            (root / "link").symlink_to(outside)
+            os.utime(root / "sub" / "a.txt", (1_000_000_000, 2_000_000_000))
+
+            usage = scan_usage(root)
+
+            self.assertEqual(usage.files, 2)
+            self.assertLess(usage.size_bytes, 100_000)
+            self.assertGreaterEqual(usage.mtime, 2_000_000_000)
+
+    def test_gc_removes_stale_and_merged_worktrees_with_linked_worktrees(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            repo = base / "backend"
+            docs = base / "docs"
+            self._init_repo(repo)
+            self._init_repo(docs)
+            root = base / "worktrees"
+            stale = root / "stale"
+            merged = root / "merged"
+            fresh = root / "fresh"
+            outside = base / "outside"
+            for path in (stale, merged, fresh, outside):
+                self._git(repo, "worktree", "add", "-q", "-b", path.name, str(path))
+            (fresh / "work.txt").write_text("new\n", encoding="utf-8")
+            self._git(fresh, "add", "work.txt")
+            self._git(fresh, "commit", "-q", "-m", "work")
+            (stale / "work.txt").write_text("old\n", encoding="utf-8")
+            self._git(stale, "add", "work.txt")
+            self._git(stale, "commit", "-q", "-m", "old work")
+            linked = merged / ".docs-wt"
+            self._git(docs, "worktree", "add", "-q", "-b", "merged", str(linked))
+            state_path = bootstrap_state_path(merged)
+            assert state_path is not None
+            store_bootstrap_state(
+                state_path,
+                BootstrapState(repos={"docs": str(docs)}, worktrees={"docs": str(linked)}),
+            )
+            now = time.time()
+            self._age(stale, now - 40 * DAY)
+            self._age(merged, now - 2 * DAY)
+            self._age(outside, now - 40 * DAY)
+
+            inventory = collect_inventory(repo=repo, base="main", jobs=2)
+            by_name = {info.path.name: info for info in inventory.worktrees}
+            self.assertTrue(by_name["merged"].merged)
+            self.assertFalse(by_name["fresh"].merged)
+            self.assertGreater(by_name["fresh"].usage.size_bytes, 0)
+
+            candidates = plan_gc(inventory, GcPolicy(), worktree_root=root, now=now)
+            self.assertEqual(
+                {candidate.info.path.name: candidate.reason.split()[0] for candidate in candidates},
+                {"stale": "stale", "merged": "merged"},
+            )
+
+            outcomes = run_gc(repo=repo, candidates=candidates, git=SubprocessGitRunner(), dry_run=False)
+
+            self.assertTrue(all(outcome.error is None for outcome in outcomes))
+            self.assertFalse(stale.exists())
+            self.assertFalse(merged.exists())
+            self.assertFalse(linked.exists())
+            self.assertTrue(fresh.exists())
+            self.assertTrue(outside.exists())
+
+    def test_gc_keeps_linked_worktree_shared_with_other_consumers(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            repo = base / "backend"
+            docs = base / "docs-repo"
+            self._init_repo(repo)
+            self._init_repo(docs)
+            root = base / "worktrees"
+            merged = root / "merged"
+            live = root / "live"
+            shared = root / "docs"
+            for path in (merged, live):
+                self._git(repo, "worktree", "add", "-q", "-b", path.name, str(path))
+            self._git(docs, "worktree", "add", "-q", "--detach", str(shared))
+            for consumer in (merged, live):
+                state_path = bootstrap_state_path(consumer)
+                assert state_path is not None
+                store_bootstrap_state(
+                    state_path,
+                    BootstrapState(repos={"docs": str(docs)}, worktrees={"docs": str(shared)}),
+                )
+            now = time.time()
+            self._age(merged, now - 2 * DAY)
+
+            inventory = collect_inventory(repo=repo, base="main")
+            candidates = plan_gc(inventory, GcPolicy(), worktree_root=root, now=now)
+            self.assertEqual([candidate.info.path.name for candidate in candidates], ["merged"])
+
+            outcomes = run_gc(repo=repo, candidates=candidates, git=SubprocessGitRunner(), dry_run=False)
+
+            self.assertTrue(all(outcome.error is None for outcome in outcomes))
+            self.assertFalse(merged.exists())
+            self.assertTrue(shared.is_dir())
+            self.assertTrue(live.exists())
+
+    def test_gc_reports_dirty_worktree_and_keeps_going(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            repo = base / "backend"
+            self._init_repo(repo)
+            dirty = base / "wt" / "dirty"
+            clean = base / "wt" / "clean"
+            for path in (dirty, clean):
+                self._git(repo, "worktree", "add", "-q", "-b", path.name, str(path))
+            (dirty / "README.md").write_text("edited\n", encoding="utf-8")
+            now = time.time()
+
+            inventory = collect_inventory(repo=repo, base="main")
+            candidates = plan_gc(inventory, GcPolicy(max_age_days=0), now=now)
+            outcomes = run_gc(repo=repo, candidates=candidates, git=SubprocessGitRunner(), dry_run=False)
+
+            errors = {outcome.path.name: outcome.error for outcome in outcomes if outcome.reason != "prune"}
+            self.assertIsNotNone(errors["dirty"])
+            self.assertIsNone(errors["clean"])
+            self.assertTrue(dirty.exists())
+            self.assertFalse(clean.exists())
+
+    def test_size_budget_removes_oldest_first(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            repo = base / "backend"
+            self._init_repo(repo)
+            now = time.time()
+            paths = [base / "wt" / name for name in ("a", "b", "c")]
+            for offset, path in enumerate(paths):
+                self._git(repo, "worktree", "add", "-q", "--detach", str(path))
+                (path / "blob.bin").write_bytes(os.urandom(64 * 1024))
+                self._age(path, now - (10 - offset) * DAY)
+
+            inventory = collect_inventory(repo=repo, base="main")
+            sizes = sorted(info.usage.size_bytes for info in inventory.worktrees if not info.record.is_main)
+            policy = GcPolicy(max_age_days=365, max_total_bytes=sizes[0] + sizes[1])
+
+            candidates = plan_gc(inventory, policy, now=now)
+
+            self.assertEqual([candidate.info.path.name for candidate in candidates], ["a"])
+            self.assertEqual(candidates[0].reason, "over size budget")
+
+    def _init_repo(self, path: Path) -> None:
+        path.mkdir(parents=True)
+        self._git(path, "init", "-q", "-b", "main")
+        (path / "README.md").write_text("seed\n", encoding="utf-8")
+        self._git(path, "add", "README.md")
+        self._git(path, "commit", "-q", "-m", "init")
+
+    def _git(self, cwd: Path, *args: str) -> None:
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(cwd), *args],
+            check=True,
+        )
+
+    def _age(self, root: Path, mtime: float) -> None:
+        for dirpath, dirnames, filenames in os.walk(root):
+            for name in [*dirnames, *filenames]:
+                os.utime(Path(dirpath) / name, (mtime, mtime), follow_symlinks=False)
+        os.utime(root, (mtime, mtime))
+
+
+if __name__ == "__main__":
+    unittest.main()
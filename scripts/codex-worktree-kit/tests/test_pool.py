@@ -0,0 +1,213 @@
+import os
+import subprocess
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+from codex_worktree.bootstrap import bootstrap_repository
+from codex_worktree.bootstrap_state import bootstrap_state_path, load_bootstrap_state
+from codex_worktree.config import parse_config
+from codex_worktree.create_worktree import create_primary_worktree
+from codex_worktree.git_ops import SubprocessGitRunner
+from codex_worktree.pool import NO_REFILL_ENV, PoolSettings, drain_pool, fill_pool, pool_dir, ready_spares
+
+from support import IsolatedCacheTestCase
+
+
+class PoolTests(IsolatedCacheTestCase):
+    def test_claim_moves_bootstrapped_spare_into_place(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp).resolve()
+            root_dir, docs, config = self._workspace(base)
+            env = {NO_REFILL_ENV: "1", "CODEX_DOCS_REPO": str(docs)}
+            git = SubprocessGitRunner()
+            worktree_root = base / "worktrees"
+
+            created = fill_pool(
+                root_dir=root_dir,
+                base_root=worktree_root,
+                config=config,
+                settings=PoolSettings(size=2, root_dir=str(root_dir), config=str(base / "worktree.toml")),
+                git=git,
+                bootstrap=lambda target: bootstrap_repository(root_dir=target, config=config, env=env),
+            )
+            self.assertEqual(len(created), 2)
+            self.assertEqual(len(ready_spares(pool_dir(worktree_root))), 2)
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="feature-x",
+                config=config,
+                worktree_root=None,
+                env=env,
+            )
+
+            target = worktree_root / "feature-x"
+            self.assertTrue(result.claimed)
+            self.assertEqual(result.path, target)
+            self.assertEqual(self._git(target, "branch", "--show-current"), "feature-x")
+            self.assertEqual(os.readlink(target / ".docs"), str(target / ".docs-wt"))
+            self.assertEqual(self._git(target / ".docs-wt", "branch", "--show-current"), "feature-x")
+            self.assertIn(str(target / ".docs-wt"), self._git(docs, "worktree", "list", "--porcelain"))
+            state = load_bootstrap_state(bootstrap_state_path(target))
+            self.assertEqual(state.worktrees["docs"], str(target / ".docs-wt"))
+            self.assertEqual(len(ready_spares(pool_dir(worktree_root))), 1)
+
+            removed = drain_pool(root_dir=root_dir, base_root=worktree_root, git=git)
+            self.assertEqual(len(removed), 1)
+            self.assertNotIn(".pool", self._git(root_dir, "worktree", "list", "--porcelain"))
+            self.assertNotIn(".pool", self._git(docs, "worktree", "list", "--porcelain"))
+
+    def test_stale_spare_is_not_claimed_and_is_rebuilt(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp).resolve()
+            root_dir, docs, config = self._workspace(base)
+            env = {NO_REFILL_ENV: "1"}
+            git = SubprocessGitRunner()
+            worktree_root = base / "worktrees"
+            settings = PoolSettings(size=1, root_dir=str(root_dir), config=str(base / "worktree.toml"))
+            (spare,) = fill_pool(
+                root_dir=root_dir,
+                base_root=worktree_root,
+                config=config,
+                settings=settings,
+                git=git,
+                bootstrap=None,
+            )
+            self._git(root_dir, "commit", "-q", "--allow-empty", "-m", "move HEAD")
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="feature-y",
+                config=config,
+                worktree_root=None,
+                env=env,
+            )
+            self.assertFalse(result.claimed)
+            self.assertTrue(spare.exists())
+
+            (rebuilt,) = fill_pool(
+                root_dir=root_dir,
+                base_root=worktree_root,
+                config=config,
+                settings=settings,
+                git=git,
+                bootstrap=None,
+            )
+            self.assertFalse(spare.exists())
+            self.assertEqual(self._git(rebuilt, "rev-parse", "HEAD"), self._git(root_dir, "rev-parse", "HEAD"))
+
+    def test_claim_creates_parent_directory_for_slashed_branch(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp).resolve()
+            root_dir, _, config = self._workspace(base)
+            worktree_root = base / "worktrees"
+            fill_pool(
+                root_dir=root_dir,
+                base_root=worktree_root,
+                config=config,
+                settings=PoolSettings(size=1, root_dir=str(root_dir), config=str(base / "worktree.toml")),
+                git=SubprocessGitRunner(),
+                bootstrap=None,
+            )
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="feature/slash",
+                config=config,
+                worktree_root=None,
+                env={NO_REFILL_ENV: "1"},
+            )
+
+            self.assertTrue(result.claimed)
+            self.assertEqual(result.path, worktree_root / "feature" / "slash")
+            self.assertEqual(self._git(result.path, "branch", "--show-current"), "feature/slash")
+
+    def test_shared_linked_worktree_is_bootstrapped_after_claim(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp).resolve()
+            root_dir, docs, config = self._workspace(base, linked_worktree_path="../docs")
+            env = {NO_REFILL_ENV: "1", "CODEX_DOCS_REPO": str(docs)}
+            git = SubprocessGitRunner()
+            worktree_root = base / "worktrees"
+            settings = PoolSettings(size=1, root_dir=str(root_dir), config=str(base / "worktree.toml"))
+
+            def fill() -> list[Path] | None:
+                return fill_pool(
+                    root_dir=root_dir,
+                    base_root=worktree_root,
+                    config=config,
+                    settings=settings,
+                    git=git,
+                    bootstrap=lambda target: bootstrap_repository(root_dir=target, config=config, env=env),
+                )
+
+            fill()
+            self.assertFalse((pool_dir(worktree_root) / "docs").exists())
+
+            result = create_primary_worktree(
+                root_dir=root_dir,
+                name="feature-z",
+                config=config,
+                worktree_root=None,
+                env=env,
+            )
+            self.assertTrue(result.claimed)
+            self.assertFalse(result.bootstrapped)
+            bootstrap_repository(root_dir=result.path, config=config, env=env)
+
+            shared = worktree_root / "docs"
+            self.assertEqual(os.readlink(result.path / ".docs"), str(shared))
+            self.assertEqual(self._git(shared, "branch", "--show-current"), "feature-z")
+
+            self._git(root_dir, "commit", "-q", "--allow-empty", "-m", "move HEAD")
+            self.assertEqual(len(fill()), 1)
+            drain_pool(root_dir=root_dir, base_root=worktree_root, git=git)
+            self.assertTrue(shared.is_dir())
+            self.assertIn(str(shared), self._git(docs, "worktree", "list", "--porcelain"))
+
+    def _workspace(self, base: Path, linked_worktree_path: str = ".docs-wt"):
+        root_dir = base / "backend"
+        docs = base / "docs"
+        for repo in (root_dir, docs):
+            repo.mkdir()
+            self._git(repo, "init", "-q", "-b", "main")
+            self._git(repo, "commit", "-q", "--allow-empty", "-m", "init")
+        config_path = base / "worktree.toml"
+        config_path.write_text(
+            textwrap.dedent(
+                f"""
+                version = 1
+
+                [worktree]
+                default_root = "{base / 'worktrees'}"
+
+                [repos.docs]
+                repo_env = ["CODEX_DOCS_REPO"]
+                discover = ["../docs"]
+                linked_worktree_path = "{linked_worktree_path}"
+                branch_strategy = "mirror-current-or-parent"
+                required = true
+
+                [[links]]
+                path = ".docs"
+                repo = "docs"
+                """
+            ),
+            encoding="utf-8",
+        )
+        return root_dir, docs, parse_config(config_path, use_cache=False)
+
+    def _git(self, cwd: Path, *args: str) -> str:
+        completed = subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(cwd), *args],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from codex_worktree.branching import select_branch_name
+from codex_worktree.errors import RefReadError
+from codex_worktree.git_ops import NativeGitRunner
+from codex_worktree.ref_reader import RefStore, find_git_dir, is_valid_branch_name
+from codex_worktree.repo_resolution import _resolve_git_common_dir
+
+from support import IsolatedCacheTestCase
+
+
+class RefReaderTests(IsolatedCacheTestCase):
+    def test_linked_worktree_gitfile_resolves_common_dir_and_head(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            main = base / "main"
+            _init_repo(main)
+            _git(main, "worktree", "add", "-q", "-b", "feature/docs", str(base / "linked"))
+
+            store = RefStore.discover(base / "linked")
+
+            self.assertTrue((base / "linked" / ".git").is_file())
+            self.assertEqual(store.common_dir, (main / ".git").resolve())
+            self.assertEqual(store.current_branch(), "feature/docs")
+            self.assertTrue(store.ref_exists("refs/heads/main"))
+            self.assertEqual(_resolve_git_common_dir(base / "linked"), (main / ".git").resolve())
+
+    def test_packed_refs_are_read_with_peeled_tags(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "repo"
+            _init_repo(repo)
+            _git(repo, "branch", "packed")
+            _git(repo, "tag", "-a", "v1", "-m", "release")
+            _git(repo, "pack-refs", "--all")
+            commit = _git(repo, "rev-parse", "HEAD")
+            tag = _git(repo, "rev-parse", "v1")
+
+            store = RefStore.discover(repo)
+
+            self.assertFalse((repo / ".git" / "refs" / "heads" / "packed").exists())
+            self.assertEqual(store.resolve("refs/heads/packed"), commit)
+            self.assertEqual(store.resolve("refs/tags/v1"), tag)
+            self.assertEqual(store.peeled("refs/tags/v1"), commit)
+            self.assertIsNone(store.resolve("refs/heads/missing"))
+
+    def test_reftable_repositories_are_rejected(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "repo"
+            (repo / ".git").mkdir(parents=True)
+            (repo / ".git" / "config").write_text("[extensions]\n\trefStorage = reftable\n", encoding="utf-8")
+
+            with self.assertRaises(RefReadError):
+                RefStore(find_git_dir(repo))
+
+    def test_branch_name_validation_matches_git(self) -> None:
+        for name in ["feature-x", "feature/docs-sync", "fix.1", "日本語"]:
+            self.assertTrue(is_valid_branch_name(name), name)
+        for name in ["", "-x", "HEAD", "a..b", "a/", "a.", ".a", "a/.b", "a.lock", "a b", "a:b", "a//b"]:
+            self.assertFalse(is_valid_branch_name(name), name)
+
+    def test_native_runner_selects_branch_without_subprocess(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "feature-x" / "repo"
+            _init_repo(repo)
+            _git(repo, "checkout", "-q", "--detach")
+
+            with mock.patch("subprocess.run", side_effect=AssertionError("forked")), mock.patch(
+                "subprocess.Popen", side_effect=AssertionError("forked")
+            ):
+                with NativeGitRunner() as git:
+                    branch = select_branch_name(consumer_root=repo, strategy="mirror-current-or-parent", git=git)
+                    self.assertTrue(git.branch_exists(repo, "main"))
+
+            self.assertEqual(branch, "feature-x")
+
+
+def _init_repo(path: Path) -> None:
+    path.mkdir(parents=True)
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "commit", "-q", "--allow-empty", "-m", "init")
+
+
+def _git(repo: Path, *args: str) -> str:
+    completed = subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return completed.stdout.strip()
+
+
+if __name__ == "__main__":
+    unittest.main()
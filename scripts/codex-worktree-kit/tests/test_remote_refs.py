@@ -0,0 +1,75 @@
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from codex_worktree.git_ops import BatchGitRunner
+from codex_worktree.remote_refs import RemoteRefIndex
+
+from support import IsolatedCacheTestCase
+
+
+class RemoteRefIndexTests(IsolatedCacheTestCase):
+    def test_reads_loose_and_packed_tracking_refs(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            clone = _clone_with_branches(Path(tmp), ["feature/packed", "feature/loose"])
+            _git(clone, "pack-refs", "--all")
+            _git(clone, "update-ref", "refs/remotes/origin/feature/loose", "HEAD")
+
+            index = RemoteRefIndex(clone / ".git")
+
+            self.assertTrue(index.has_branch("feature/packed"))
+            self.assertTrue(index.has_branch("feature/loose"))
+            self.assertTrue(index.has_branch("main"))
+            self.assertFalse(index.has_branch("HEAD"))
+            self.assertFalse(index.has_branch("missing"))
+
+    def test_refresh_snapshot_is_cached_until_ttl_expires(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            clone = _clone_with_branches(base, [])
+            _git(base / "origin.git", "branch", "pushed-later", "main")
+            now = [1000.0]
+
+            RemoteRefIndex(clone / ".git", clock=lambda: now[0]).refresh(clone)
+            now[0] += 30
+            self.assertTrue(RemoteRefIndex(clone / ".git", ttl=60, clock=lambda: now[0]).has_branch("pushed-later"))
+            now[0] += 60
+            self.assertFalse(RemoteRefIndex(clone / ".git", ttl=60, clock=lambda: now[0]).has_branch("pushed-later"))
+
+    def test_batch_runner_refreshes_only_when_requested(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            clone = _clone_with_branches(base, [])
+            _git(base / "origin.git", "branch", "pushed-later", "main")
+
+            with BatchGitRunner() as git:
+                self.assertFalse(git.remote_branch_exists(clone, "pushed-later"))
+            with BatchGitRunner(refresh_remote_refs=True) as git:
+                self.assertTrue(git.remote_branch_exists(clone, "pushed-later"))
+            with BatchGitRunner() as git:
+                self.assertTrue(git.remote_branch_exists(clone, "pushed-later"))
+
+
+def _clone_with_branches(base: Path, branches: list[str]) -> Path:
+    seed = base / "seed"
+    seed.mkdir()
+    _git(seed, "init", "-q", "-b", "main")
+    _git(seed, "commit", "-q", "--allow-empty", "-m", "init")
+    for branch in branches:
+        _git(seed, "branch", branch)
+    _git(base, "clone", "-q", "--bare", str(seed), str(base / "origin.git"))
+    _git(base, "clone", "-q", str(base / "origin.git"), str(base / "clone"))
+    return base / "clone"
+
+
+def _git(repo: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", "-C", str(repo), *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+if __name__ == "__main__":
+    unittest.main()
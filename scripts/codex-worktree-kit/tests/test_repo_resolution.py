@@ -6,10 +6,13 @@ from pathlib import Path
 
 from codex_worktree.config import parse_config
 from codex_worktree.errors import RepoResolutionError
-from codex_worktree.repo_resolution import resolve_repo_path
+from codex_worktree.config import RepoConfig
+from codex_worktree.repo_resolution import RepoResolutionContext, resolve_repo_path
 
+from support import IsolatedCacheTestCase
 
-class RepoResolutionTests(unittest.TestCase):
+
+class RepoResolutionTests(IsolatedCacheTestCase):
     def test_repo_env_takes_precedence_over_discover(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             base = Path(tmp)
@@ -85,6 +88,39 @@ class RepoResolutionTests(unittest.TestCase):
 
             self.assertEqual(resolved, docs_repo.resolve())
 
+    def test_context_resolves_all_repos_with_one_common_dir_lookup(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            main_root = base / "project" / "backend"
+            app_worktree = base / "app" / "backend"
+            main_root.mkdir(parents=True)
+            app_worktree.mkdir(parents=True)
+            for name in ("docs", "web"):
+                self._init_repo(base / "project" / name)
+            lookups: list[Path] = []
+
+            def resolver(root: Path) -> Path:
+                lookups.append(root)
+                return main_root / ".git"
+
+            context = RepoResolutionContext(root_dir=app_worktree, env={}, git_common_dir_resolver=resolver)
+            repos = {
+                name: RepoConfig(discover=[".docs", "../shared"], required=name != "api")
+                for name in ("docs", "web", "api")
+            }
+
+            resolved = context.resolve_all(repos)
+
+            self.assertEqual(resolved["docs"], (base / "project" / "docs").resolve())
+            self.assertEqual(resolved["web"], (base / "project" / "web").resolve())
+            self.assertIsNone(resolved["api"])
+            self.assertEqual(lookups, [app_worktree])
+
+            with self.assertRaises(RepoResolutionError) as ctx:
+                context.resolve_repo("missing", RepoConfig(discover=["docs"], required=True))
+            self.assertIn("worktree-derived paths", str(ctx.exception))
+            self.assertIn(str(main_root.parent / "missing"), str(ctx.exception))
+
     def _load_config(self, base: Path):
         config_path = base / "worktree.toml"
         config_path.write_text(
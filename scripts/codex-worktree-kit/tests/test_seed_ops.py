@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from codex_worktree.errors import SeedError
+from codex_worktree.seed_ops import seed_directory
+
+from support import IsolatedCacheTestCase
+
+
+class SeedDirectoryTests(IsolatedCacheTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = Path(tmp.name)
+        self.source = self.base / "source" / "node_modules"
+        (self.source / "pkg" / "bin").mkdir(parents=True)
+        (self.source / "pkg" / "index.js").write_text("module.exports = 1\n", encoding="utf-8")
+        (self.source / "pkg" / "bin" / "run").write_text("#!/bin/sh\n", encoding="utf-8")
+        (self.source / "pkg" / "bin" / "run").chmod(0o755)
+        os.symlink("../pkg/bin/run", self.source / "run")
+
+    def test_copy_preserves_tree_modes_and_symlinks(self) -> None:
+        target = self.base / "target" / "node_modules"
+        reported = []
+
+        result = seed_directory(source=self.source, target=target, mode="copy", progress=reported.append)
+
+        self.assertEqual(result.method, "copy")
+        self.assertEqual(result.files, 2)
+        self.assertEqual(result.bytes, len("module.exports = 1\n") + len("#!/bin/sh\n"))
+        self.assertEqual(reported[-1].files, 2)
+        self.assertEqual((target / "pkg" / "index.js").read_text(encoding="utf-8"), "module.exports = 1\n")
+        self.assertEqual((target / "pkg" / "bin" / "run").stat().st_mode & 0o777, 0o755)
+        self.assertEqual(os.readlink(target / "run"), "../pkg/bin/run")
+        self.assertFalse((target / "pkg" / "index.js").samefile(self.source / "pkg" / "index.js"))
+
+    def test_hardlink_shares_inodes(self) -> None:
+        target = self.base / "target" / "node_modules"
+
+        result = seed_directory(source=self.source, target=target, mode="hardlink")
+
+        self.assertEqual(result.method, "hardlink")
+        self.assertTrue((target / "pkg" / "index.js").samefile(self.source / "pkg" / "index.js"))
+
+    def test_auto_falls_back_when_reflink_is_unavailable(self) -> None:
+        target = self.base / "target" / "node_modules"
+
+        result = seed_directory(source=self.source, target=target)
+
+        self.assertIn(result.method, {"reflink", "copy"})
+        self.assertEqual(result.files, 2)
+        self.assertEqual((target / "pkg" / "index.js").read_text(encoding="utf-8"), "module.exports = 1\n")
+
+    def test_existing_target_and_dry_run_are_left_alone(self) -> None:
+        target = self.base / "target" / "node_modules"
+        target.mkdir(parents=True)
+
+        self.assertEqual(seed_directory(source=self.source, target=target).method, "exists")
+        self.assertEqual(seed_directory(source=self.source, target=self.base / "other", dry_run=True).method, "planned")
+        self.assertFalse((self.base / "other").exists())
+        with self.assertRaises(SeedError):
+            seed_directory(source=self.source, target=self.base / "other", mode="rsync")
+
+    def test_failed_copy_leaves_no_partial_target(self) -> None:
+        target = self.base / "target" / "node_modules"
+
+        with mock.patch("shutil.copyfile", side_effect=OSError(28, "No space left on device")):
+            with self.assertRaises(OSError):
+                seed_directory(source=self.source, target=target, mode="copy")
+
+        self.assertFalse(os.path.lexists(target))
+        self.assertEqual(os.listdir(target.parent), [])
+        self.assertEqual(seed_directory(source=self.source, target=target, mode="copy").files, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import tomllib
+import unittest
+from pathlib import Path
+
+from support import IsolatedCacheTestCase
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class StartupBudgetTests(IsolatedCacheTestCase):
+    """Cold-start checks for the bin/codex-worktree-* shims users actually run.
+
+    The shims exec `.venv/bin/python -m codex_worktree <subcommand>`; a scratch copy of bin/ gets a
+    `.venv/bin/python` that points at the running interpreter, so the test works without `uv sync`.
+    """
+
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name)
+        self.root_dir = base / "backend"
+        self.docs_repo = base / "docs-source"
+        for repo in (self.root_dir, self.docs_repo):
+            repo.mkdir()
+            subprocess.run(["git", "init", "-q", "-b", "main", str(repo)], check=True)
+        self.config_path = base / "worktree.toml"
+        self.config_path.write_text(
+            textwrap.dedent(
+                f"""
+                version = 1
+
+                [worktree]
+                default_root = "{base / "worktrees"}"
+
+                [repos.docs]
+                repo_env = ["CODEX_DOCS_REPO"]
+                linked_worktree_path = "../docs"
+                branch_strategy = "mirror-current-or-parent"
+                required = true
+
+                [[links]]
+                path = ".docs"
+                repo = "docs"
+
+                [[steps]]
+                name = "docs-catalog"
+                cwd = ".docs"
+                run = ["make", "docs-catalog"]
+                """
+            ),
+            encoding="utf-8",
+        )
+        self.env = {
+            **os.environ,
+            "PYTHONPATH": str(PROJECT_ROOT),
+            "CODEX_WORKTREE_CACHE_DIR": str(base / "cache"),
+            "CODEX_DOCS_REPO": str(self.docs_repo),
+        }
+        self.bin_dir = base / "kit" / "bin"
+        shutil.copytree(PROJECT_ROOT / "bin", self.bin_dir)
+        venv_bin = base / "kit" / ".venv" / "bin"
+        venv_bin.mkdir(parents=True)
+        (venv_bin / "python").symlink_to(sys.executable)
+        config = str(self.config_path)
+        root = str(self.root_dir)
+        self.entrypoints = {
+            "codex-worktree-bootstrap": ["--root-dir", root, "--config", config, "--dry-run"],
+            "codex-worktree-create-worktree": ["feature-x", "--root-dir", root, "--config", config, "--dry-run"],
+            "codex-worktree-resolve-repo": ["--root-dir", root, "--config", config, "--repo-key", "docs"],
+            "codex-worktree-validate-config": ["--config", config],
+        }
+
+    def test_subcommands_import_only_what_they_use(self) -> None:
+        forbidden = {
+            "codex-worktree-validate-config": {
+                "codex_worktree.bootstrap",
+                "codex_worktree.create_worktree",
+                "codex_worktree.git_ops",
+                "codex_worktree.repo_resolution",
+                "concurrent.futures",
+                "subprocess",
+            },
+            "codex-worktree-resolve-repo": {
+                "codex_worktree.bootstrap",
+                "codex_worktree.create_worktree",
+                "codex_worktree.git_ops",
+                "concurrent.futures",
+                "subprocess",
+            },
+            "codex-worktree-create-worktree": {
+                "codex_worktree.bootstrap",
+                "codex_worktree.repo_resolution",
+                "concurrent.futures",
+            },
+            "codex-worktree-bootstrap": {
+                "codex_worktree.create_worktree",
+                "codex_worktree.daemon",
+            },
+        }
+        for entrypoint, modules in forbidden.items():
+            with self.subTest(entrypoint=entrypoint):
+                completed = self._run(entrypoint, PYTHONPROFILEIMPORTTIME="1")
+                imported = {line.rsplit("|", 1)[-1].strip() for line in completed.stderr.splitlines()}
+                self.assertEqual(completed.returncode, 0, completed.stderr)
+                self.assertEqual(modules & imported, set())
+
+    def test_entrypoints_start_within_budget(self) -> None:
+        budget_ms = _budget_ms()
+        for entrypoint in self.entrypoints:
+            with self.subTest(entrypoint=entrypoint):
+                elapsed_ms = min(self._timed_run(entrypoint) for _ in range(3))
+                self.assertLessEqual(
+                    elapsed_ms,
+                    budget_ms,
+                    f"{entrypoint} cold start took {elapsed_ms:.0f} ms (budget {budget_ms} ms)",
+                )
+
+    def _timed_run(self, entrypoint: str) -> float:
+        started = time.perf_counter()
+        completed = self._run(entrypoint)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        return elapsed_ms
+
+    def _run(self, entrypoint: str, **extra_env: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            [str(self.bin_dir / entrypoint), *self.entrypoints[entrypoint]],
+            cwd=self.root_dir,
+            env={**self.env, **extra_env},
+            check=False,
+            capture_output=True,
+            text=True,
+        )
+
+
+def _budget_ms() -> int:
+    override = os.environ.get("CODEX_WORKTREE_STARTUP_BUDGET_MS")
+    if override:
+        return int(override)
+    pyproject = tomllib.loads((PROJECT_ROOT / "pyproject.toml").read_text(encoding="utf-8"))
+    return int(pyproject["tool"]["codex-worktree"]["startup-budget"]["wall_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
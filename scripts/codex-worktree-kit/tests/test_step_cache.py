@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from codex_worktree import step_cache
+from codex_worktree.config import StepConfig
+from codex_worktree.step_cache import StepCache
+
+from support import IsolatedCacheTestCase
+
+
+class StepCacheEvictionTests(IsolatedCacheTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.base = Path(tmp.name)
+        self.root = self.base / "cache" / "steps"
+        for name, value in (("MAX_ENTRIES_PER_STEP", 2), ("OBJECT_GRACE_SECONDS", -1)):
+            patcher = mock.patch.object(step_cache, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.step = StepConfig(name="gen", cwd=".", run=["make"], inputs=["in.txt"], outputs=["out.txt"])
+
+    def _record(self, worktree: Path, version: int) -> None:
+        worktree.mkdir(exist_ok=True)
+        (worktree / "in.txt").write_text(f"v{version}\n", encoding="utf-8")
+        (worktree / "out.txt").write_text(f"out {version}\n", encoding="utf-8")
+        cache = StepCache(self.root, worktree=worktree)
+        cache.record(cache.lookup(self.step))
+        # Entries are evicted by mtime; keep them apart on filesystems with coarse timestamps.
+        entries = sorted((self.root / "entries").glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for age, path in enumerate(reversed(entries)):
+            os.utime(path, (1_000_000 - age, 1_000_000 - age))
+
+    def _objects(self) -> int:
+        return len(list((self.root / "objects").glob("*/*")))
+
+    def test_record_caps_entries_per_step_and_drops_unreferenced_objects(self) -> None:
+        worktree = self.base / "wt"
+        for version in range(1, 5):
+            self._record(worktree, version)
+
+        self.assertEqual(len(list((self.root / "entries").glob("*.json"))), 2)
+        self.assertEqual(self._objects(), 2)
+        cache = StepCache(self.root, worktree=worktree)
+        (worktree / "in.txt").write_text("v1\n", encoding="utf-8")
+        self.assertIsNone(cache.lookup(self.step).cached_outputs)
+        (worktree / "in.txt").write_text("v3\n", encoding="utf-8")
+        self.assertTrue(cache.lookup(self.step).restorable)
+
+    def test_manifests_of_removed_worktrees_stop_pinning_objects(self) -> None:
+        gone = self.base / "gone"
+        self._record(gone, 1)
+        shutil.rmtree(gone)
+        worktree = self.base / "wt"
+        for version in range(2, 5):
+            self._record(worktree, version)
+
+        self.assertEqual(len(list((self.root / "manifests").glob("*/*.json"))), 1)
+        self.assertEqual(self._objects(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
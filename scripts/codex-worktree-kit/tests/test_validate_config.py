@@ -1,13 +1,18 @@
+import os
 import tempfile
 import textwrap
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from codex_worktree.config import parse_config, resolve_worktree_root
+from codex_worktree.config_cache import MAX_CONFIG_ENTRIES, CacheKey, CompiledConfigCache
 from codex_worktree.errors import ConfigError
 
+from support import IsolatedCacheTestCase
 
-class ValidateConfigTests(unittest.TestCase):
+
+class ValidateConfigTests(IsolatedCacheTestCase):
     def test_parse_and_validate_config(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             config_path = Path(tmp) / "worktree.toml"
@@ -60,6 +65,118 @@ class ValidateConfigTests(unittest.TestCase):
             with self.assertRaises(ConfigError):
                 parse_config(config_path)
 
+    def test_checkout_options_are_parsed_per_repo(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [worktree]
+                    sparse_checkout = ["apps/web", "packages/ui"]
+                    skip_lfs_smudge = true
+
+                    [repos.docs]
+                    no_checkout = true
+                    """
+                ),
+                encoding="utf-8",
+            )
+
+            config = parse_config(config_path, use_cache=False)
+
+            self.assertEqual(config.worktree.checkout.sparse_checkout, ["apps/web", "packages/ui"])
+            self.assertTrue(config.worktree.checkout.skip_lfs_smudge)
+            self.assertTrue(config.repos["docs"].checkout.no_checkout)
+
+            config_path.write_text(
+                'version = 1\n\n[repos.docs]\nno_checkout = true\nsparse_checkout = ["a"]\n',
+                encoding="utf-8",
+            )
+            with self.assertRaises(ConfigError):
+                parse_config(config_path, use_cache=False)
+
+    def test_seed_entries_are_parsed_and_validated(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "worktree.toml"
+            config_path.write_text(
+                'version = 1\n\n[[seed]]\npath = "node_modules"\n\n[[seed]]\npath = ".venv"\nmode = "hardlink"\n',
+                encoding="utf-8",
+            )
+
+            config = parse_config(config_path, use_cache=False)
+
+            self.assertEqual([(seed.path, seed.mode) for seed in config.seeds], [("node_modules", "auto"), (".venv", "hardlink")])
+
+            for body in ('path = "../outside"', 'path = "node_modules"\nmode = "rsync"'):
+                config_path.write_text(f"version = 1\n\n[[seed]]\n{body}\n", encoding="utf-8")
+                with self.assertRaises(ConfigError):
+                    parse_config(config_path, use_cache=False)
+
+    def test_step_dependency_cycle_raises(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "worktree.toml"
+            config_path.write_text(
+                textwrap.dedent(
+                    """
+                    version = 1
+
+                    [[steps]]
+                    name = "a"
+                    cwd = "."
+                    run = ["true"]
+                    depends_on = ["b"]
+
+                    [[steps]]
+                    name = "b"
+                    cwd = "."
+                    run = ["true"]
+                    depends_on = ["a"]
+                    """
+                ),
+                encoding="utf-8",
+            )
+
+            with self.assertRaises(ConfigError) as ctx:
+                parse_config(config_path)
+
+            self.assertIn("cycle", str(ctx.exception))
+
+    def test_compiled_config_cache_skips_toml_parsing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            config_path = Path(tmp) / "worktree.toml"
+            config_path.write_text('version = 1\n\n[git]\nhooks_path = ".githooks"\n', encoding="utf-8")
+
+            with mock.patch.dict(os.environ, {"CODEX_WORKTREE_CACHE_DIR": str(Path(tmp) / "cache")}):
+                first = parse_config(config_path)
+                with mock.patch("tomllib.loads", side_effect=AssertionError("parsed")):
+                    cached = parse_config(config_path)
+                    os.utime(config_path, ns=(0, 0))
+                    touched = parse_config(config_path)
+                    with self.assertRaises(AssertionError):
+                        parse_config(config_path, use_cache=False)
+
+                config_path.write_text('version = 1\n\n[git]\nhooks_path = ".hooks"\n', encoding="utf-8")
+                edited = parse_config(config_path)
+
+            self.assertEqual(first, cached)
+            self.assertEqual(first, touched)
+            self.assertEqual(edited.git.hooks_path, ".hooks")
+
+    def test_compiled_config_cache_keeps_only_recent_entries(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CompiledConfigCache(Path(tmp) / "cache", schema="test")
+            for index in range(MAX_CONFIG_ENTRIES + 5):
+                cache.store(Path(tmp) / f"{index}.toml", CacheKey(path=str(index), mtime_ns=index, size=0), b"", index)
+                os.utime(cache.entry_path(Path(tmp) / f"{index}.toml"), ns=(index, index))
+
+            entries = list((Path(tmp) / "cache" / "config").glob("*.pickle"))
+
+            self.assertEqual(len(entries), MAX_CONFIG_ENTRIES)
+            self.assertFalse(cache.entry_path(Path(tmp) / "0.toml").exists())
+            self.assertTrue(cache.entry_path(Path(tmp) / f"{MAX_CONFIG_ENTRIES + 4}.toml").exists())
+
     def test_worktree_root_resolution_priority(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             root_dir = Path(tmp) / "backend"
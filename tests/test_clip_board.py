@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# Run with `python3 tests/test_clip_board.py` (stdlib unittest only, no third-party runner).
+
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def load_clip_board():
+    spec = importlib.util.spec_from_file_location('clip_board', REPO_ROOT / 'scripts' / 'clip_board.py')
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+clip_board = load_clip_board()
+Block = clip_board.Block
+Candidate = clip_board.Candidate
+Filters = clip_board.Filters
+IgnoreRules = clip_board.IgnoreRules
+
+
+def matches(pattern, path):
+    return re.fullmatch(clip_board.glob_to_regex(pattern), path) is not None
+
+
+def rules(base, *lines, prefix=''):
+    return IgnoreRules(base, [clip_board.parse_ignore_line(line) for line in lines], prefix)
+
+
+def git(repo, *args):
+    subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', '-C', str(repo), *args],
+        check=True,
+        capture_output=True,
+    )
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp_path = Path(tmp.name)
+
+
+class GlobTests(unittest.TestCase):
+    def test_glob_to_regex(self):
+        cases = [
+            ('*.py', 'a.py', True),
+            ('*.py', 'pkg/a.py', False),
+            ('?.py', 'ab.py', False),
+            ('[ab].txt', 'b.txt', True),
+            ('[!ab].txt', 'a.txt', False),
+            ('**/build', 'build', True),
+            ('**/build', 'a/b/build', True),
+            ('src/**', 'src/a/b.py', True),
+            ('src/**/test_*.py', 'src/test_a.py', True),
+            ('src/**/test_*.py', 'src/x/y/test_a.py', True),
+            ('a**b', 'a/b', False),
+            (r'\*.py', '*.py', True),
+            (r'\*.py', 'a.py', False),
+        ]
+        for pattern, path, expected in cases:
+            with self.subTest(pattern=pattern, path=path):
+                self.assertIs(matches(pattern, path), expected)
+
+
+class IgnoreTests(unittest.TestCase):
+    def test_parse_ignore_line_skips_blank_and_comment_lines(self):
+        for line in ['', '   ', '# comment', '/']:
+            with self.subTest(line=line):
+                self.assertIsNone(clip_board.parse_ignore_line(line))
+
+    def test_parse_ignore_line_flags_and_anchoring(self):
+        regex, negate, dir_only = clip_board.parse_ignore_line('!keep.log')
+        self.assertTrue(negate)
+        self.assertFalse(dir_only)
+        self.assertTrue(regex.fullmatch('logs/keep.log'))
+
+        regex, negate, dir_only = clip_board.parse_ignore_line('build/')
+        self.assertTrue(dir_only)
+        self.assertFalse(negate)
+        self.assertTrue(regex.fullmatch('build'))
+        self.assertTrue(regex.fullmatch('pkg/build'))
+
+        regex, _, _ = clip_board.parse_ignore_line('/root.txt')
+        self.assertTrue(regex.fullmatch('root.txt'))
+        self.assertFalse(regex.fullmatch('sub/root.txt'))
+
+        regex, _, _ = clip_board.parse_ignore_line('docs/*.md')
+        self.assertTrue(regex.fullmatch('docs/a.md'))
+        self.assertFalse(regex.fullmatch('pkg/docs/a.md'))
+
+        regex, negate, _ = clip_board.parse_ignore_line(r'\#notes')
+        self.assertFalse(negate)
+        self.assertTrue(regex.fullmatch('#notes'))
+
+    def test_is_ignored_last_matching_rule_wins(self):
+        ignores = [rules('/repo', '*.log', '!keep.log')]
+
+        self.assertTrue(clip_board.is_ignored(ignores, '/repo/a.log', False))
+        self.assertFalse(clip_board.is_ignored(ignores, '/repo/keep.log', False))
+        self.assertFalse(clip_board.is_ignored(ignores, '/repo/a.txt', False))
+
+    def test_is_ignored_deeper_file_wins_and_dir_only_rules_skip_files(self):
+        ignores = [rules('/repo', '*.gen', 'out/'), rules('/repo/pkg', '!*.gen')]
+
+        self.assertTrue(clip_board.is_ignored(ignores, '/repo/a.gen', False))
+        self.assertFalse(clip_board.is_ignored(ignores, '/repo/pkg/b.gen', False))
+        self.assertTrue(clip_board.is_ignored(ignores, '/repo/out', True))
+        self.assertFalse(clip_board.is_ignored(ignores, '/repo/out', False))
+
+    def test_is_ignored_applies_ancestor_prefix(self):
+        # Rules loaded from a parent of the walk root see paths relative to that parent.
+        ignores = [rules('/repo/pkg', 'pkg/generated/', prefix='pkg/')]
+
+        self.assertTrue(clip_board.is_ignored(ignores, '/repo/pkg/generated', True))
+        self.assertFalse(clip_board.is_ignored(ignores, '/repo/pkg/src', True))
+
+
+class WalkTests(TempDirTestCase):
+    def test_trailing_double_star_dir_includes_the_base_directory(self):
+        (self.tmp_path / 'src' / 'sub').mkdir(parents=True)
+        (self.tmp_path / 'src' / 'a.py').write_text('a\n')
+        (self.tmp_path / 'src' / 'sub' / 'b.py').write_text('b\n')
+        cwd = os.getcwd()
+        os.chdir(self.tmp_path)
+        self.addCleanup(os.chdir, cwd)
+
+        paths = [candidate.path for candidate in clip_board.iter_file_paths(['src/**'], [], use_ignore=False)]
+
+        self.assertEqual(sorted(paths), ['src/a.py', 'src/sub/b.py'])
+
+
+class DiffTests(TempDirTestCase):
+    def test_diff_hunks_splits_one_diff_into_files(self):
+        repo = self.tmp_path / 'repo'
+        (repo / 'src').mkdir(parents=True)
+        git(repo, 'init', '-q', '-b', 'main')
+        (repo / 'src' / 'a.py').write_text(''.join(f'{n}\n' for n in range(1, 41)))
+        (repo / 'notes.md').write_text('one\n')
+        (repo / 'skip.txt').write_text('old\n')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-q', '-m', 'init')
+        (repo / 'src' / 'a.py').write_text(
+            ''.join('five\n' if n == 5 else '-- thirty\n' if n == 30 else f'{n}\n' for n in range(1, 41))
+        )
+        (repo / 'notes.md').write_text('one\ntwo\n')
+        (repo / 'skip.txt').write_text('new\n')
+        root = str(repo)
+        candidates = [
+            Candidate(os.path.join(root, 'src', 'a.py'), False, None, root),
+            Candidate(os.path.join(root, 'notes.md'), False, None, root),
+        ]
+
+        diffs = clip_board.diff_hunks(root, candidates, 'main', 1)
+
+        self.assertEqual(set(diffs), {candidate.path for candidate in candidates})
+        hunks = diffs[os.path.join(root, 'src', 'a.py')].splitlines()
+        self.assertEqual(
+            hunks,
+            ['@@ -4,3 +4,3 @@', ' 4', '-5', '+five', ' 6', '@@ -29,3 +29,3 @@', ' 29', '-30', '+-- thirty', ' 31'],
+        )
+        self.assertEqual(diffs[os.path.join(root, 'notes.md')].splitlines()[-1], '+two')
+
+
+    def test_diff_hunks_only_splits_on_newlines(self):
+        repo = self.tmp_path / 'repo'
+        repo.mkdir()
+        git(repo, 'init', '-q', '-b', 'main')
+        (repo / 'a.txt').write_text('one\n')
+        (repo / 'b.txt').write_text('two\n')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-q', '-m', 'init')
+        # A form feed is a line break to str.splitlines(); here it must not start a new file header.
+        (repo / 'a.txt').write_bytes(b'one\x0cdiff --git a/b.txt b/b.txt\n')
+        (repo / 'b.txt').write_text('two\nthree\n')
+        root = str(repo)
+        candidates = [Candidate(os.path.join(root, name), False, None, root) for name in ['a.txt', 'b.txt']]
+
+        diffs = clip_board.diff_hunks(root, candidates, 'main', 1)
+
+        self.assertEqual(
+            diffs[os.path.join(root, 'a.txt')], '@@ -1 +1 @@\n-one\n+one\x0cdiff --git a/b.txt b/b.txt'
+        )
+        self.assertEqual(diffs[os.path.join(root, 'b.txt')], '@@ -1 +1,2 @@\n two\n+three')
+
+class ArchiveTests(TempDirTestCase):
+    def test_patch_archive_round_trips_through_git_apply(self):
+        texts = {
+            'plain.txt': 'one\ntwo\n',
+            'controls.txt': 'page\x0cbreak\nlone\rcarriage\ncrlf\r\n\x1cgroup\u2028sep\n',
+            'no_newline.txt': 'first\nlast',
+            'empty.txt': '',
+            'copy.txt': 'one\ntwo\n',
+        }
+        blocks = list(clip_board.dedupe_blocks(Block(path, text) for path, text in texts.items()))
+        patch = self.tmp_path / 'out.patch'
+        repo = self.tmp_path / 'repo'
+        repo.mkdir()
+        git(repo, 'init', '-q')
+
+        count, _ = clip_board.write_archive(blocks, str(patch))
+        git(repo, 'apply', str(patch))
+
+        self.assertEqual(count, len(texts))
+        for path, text in texts.items():
+            with self.subTest(path=path):
+                self.assertEqual((repo / path).read_bytes(), text.encode('utf-8'))
+
+
+    def test_failed_archive_leaves_no_partial_file(self):
+        def blocks():
+            yield Block('a.txt', 'one\n' * 1000)
+            raise KeyboardInterrupt
+
+        names = ['out.tar', 'out.tar.gz', 'out.patch']
+        if shutil.which('zstd'):
+            names.append('out.tar.zst')
+        for name in names:
+            with self.subTest(name=name):
+                path = self.tmp_path / name
+                with self.assertRaises(KeyboardInterrupt):
+                    clip_board.write_archive(blocks(), str(path))
+                self.assertFalse(path.exists())
+
+class OutputTests(unittest.TestCase):
+    def test_dedupe_blocks_drops_repeats_and_references_identical_content(self):
+        shared = 'def helper():\n    return "the same body in two places"\n'
+        blocks = [
+            Block('pkg/a.py', shared),
+            Block('./pkg/a.py', shared),
+            Block('vendor/a.py', shared),
+            Block('pkg/__init__.py', ''),
+            Block('vendor/__init__.py', ''),
+        ]
+
+        deduped = list(clip_board.dedupe_blocks(blocks))
+
+        self.assertEqual(
+            [block.path for block in deduped], ['pkg/a.py', 'vendor/a.py', 'pkg/__init__.py', 'vendor/__init__.py']
+        )
+        self.assertIsNone(deduped[1].text)
+        self.assertEqual(deduped[1].same_as, 'pkg/a.py')
+        self.assertEqual(
+            clip_board.render_block(deduped[1]), '# filepath: vendor/a.py (same content as pkg/a.py)\n\n'
+        )
+        self.assertEqual(deduped[3], Block('vendor/__init__.py', ''))
+
+    def test_filters_accept_extensions_and_exclusions(self):
+        filters = Filters(['.py'], [], ['conftest.py', 'test_*'], ['.pyc'], True)
+
+        self.assertTrue(filters.accepts('a.py'))
+        self.assertFalse(filters.accepts('conftest.py'))
+        self.assertFalse(filters.accepts('test_a.py'))
+        self.assertFalse(filters.accepts('a.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()